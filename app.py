@@ -1,15 +1,35 @@
+import atexit
+import cProfile
 import os
+import pstats
 import sqlite3
+import base64
+import json
 import csv
+import fcntl
+import gzip
 import io
 import hashlib
+import hmac
 import secrets
+import socket
+import threading
 import unicodedata
 import re
-from collections import Counter
+import time
+import weakref
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from datetime import date, datetime
+from functools import lru_cache
+from itertools import chain, count, islice
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
+import click
 from flask import (
     Flask,
     g,
@@ -22,8 +42,16 @@ from flask import (
     jsonify,
     send_from_directory,
     abort,
+    has_request_context,
+    stream_with_context,
 )
 
+try:
+    import brotli
+except ImportError:
+    # Opcional: sin brotli las respuestas se comprimen solo con gzip.
+    brotli = None
+
 
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / "data"
@@ -79,8 +107,44 @@ app = Flask(__name__)
 app.config.update(
     SECRET_KEY=os.environ.get("BANBIF_DASHBOARD_SECRET", secrets.token_hex(16)),
     DATABASE=str(DB_PATH),
-    MAX_CONTENT_LENGTH=5 * 1024 * 1024,
+    MAX_CONTENT_LENGTH=int(os.environ.get("BANBIF_MAX_UPLOAD_MB", "1024")) * 1024 * 1024,
+    INGEST_BATCH_SIZE=int(os.environ.get("BANBIF_INGEST_BATCH_SIZE", "1000")),
+    IMPORTS_DIR=str(DATA_DIR / "imports"),
+    IMPORT_WORKER_ENABLED=os.environ.get("BANBIF_IMPORT_WORKER", "1") != "0",
+    IMPORT_POLL_SECONDS=2.0,
+    IMPORT_STALE_SECONDS=60.0,
+    SNAPSHOT_RETENTION=int(os.environ.get("BANBIF_SNAPSHOT_RETENTION", "3")),
+    CHANGE_LOG_RETENTION=int(os.environ.get("BANBIF_CHANGE_LOG_RETENTION", "50000")),
+    CHANGE_LOG_MAX_DELTA=2000,
+    STREAM_MAX_SUBSCRIBERS=int(os.environ.get("BANBIF_STREAM_MAX_SUBSCRIBERS", "48")),
+    STREAM_POLL_SECONDS=1.0,
+    STREAM_HEARTBEAT_SECONDS=15.0,
+    STREAM_MAX_SECONDS=300.0,
+    STREAM_RETRY_MS=5000,
+    RECORDS_PAGE_SIZE=int(os.environ.get("BANBIF_RECORDS_PAGE_SIZE", "50")),
+    RECORDS_MAX_PAGE_SIZE=500,
+    RESPONSE_COMPRESS_MIN_BYTES=int(os.environ.get("BANBIF_COMPRESS_MIN_BYTES", "1024")),
+    RESPONSE_GZIP_LEVEL=6,
+    RESPONSE_BROTLI_QUALITY=5,
+    METRICS_ENABLED=os.environ.get("BANBIF_METRICS", "1") != "0",
+    METRICS_DATABASE=str(DATA_DIR / "metrics.db"),
+    METRICS_FLUSH_SECONDS=5.0,
+    METRICS_TOKEN=os.environ.get("BANBIF_METRICS_TOKEN"),
+    PROFILES_DIR=str(DATA_DIR / "profiles"),
+    PROFILE_RETENTION=int(os.environ.get("BANBIF_PROFILE_RETENTION", "20")),
+    SUMMARY_CACHE_DATABASE=str(DATA_DIR / "summary_cache.db"),
+    SUMMARY_CACHE_MAX_ENTRIES=int(os.environ.get("BANBIF_SUMMARY_CACHE_ENTRIES", "256")),
+    SUMMARY_CACHE_MAX_BYTES=int(os.environ.get("BANBIF_SUMMARY_CACHE_BYTES", str(32 * 1024 * 1024))),
+    SUMMARY_CACHE_TOUCH_SECONDS=60.0,
+    SQLITE_BUSY_TIMEOUT_MS=int(os.environ.get("BANBIF_SQLITE_BUSY_TIMEOUT_MS", "15000")),
+    SQLITE_CACHE_MB=int(os.environ.get("BANBIF_SQLITE_CACHE_MB", "32")),
+    SQLITE_MMAP_MB=int(os.environ.get("BANBIF_SQLITE_MMAP_MB", "256")),
+    SQLITE_STATEMENT_CACHE=256,
     INITIAL_ADMIN_PASSWORD=os.environ.get("BANBIF_ADMIN_CODE"),
+    PASSWORD_HASH_ITERATIONS=int(os.environ.get("BANBIF_PASSWORD_ITERATIONS", "200000")),
+    AUTH_HASH_SLOTS=int(os.environ.get("BANBIF_AUTH_HASH_SLOTS", "2")),
+    AUTH_HASH_WAIT_SECONDS=0.25,
+    AUTH_USER_CACHE_SECONDS=1.0,
 )
 @app.route("/health")
 def health():
@@ -93,649 +157,4001 @@ def health():
 
 
 
-def get_db() -> sqlite3.Connection:
-    if "db" not in g:
-        g.db = sqlite3.connect(app.config["DATABASE"])
-        g.db.row_factory = sqlite3.Row
-    return g.db
+def strip_accents(value: str) -> str:
+    # La mayoria de nombres y hostnames ya son ASCII; los triggers de busqueda llaman esto en cada fila escrita.
+    if value.isascii():
+        return value
+    normalized = unicodedata.normalize("NFD", value)
+    return "".join(c for c in normalized if not unicodedata.combining(c))
 
 
-@app.teardown_appcontext
-def close_db(exception=None):
-    db = g.pop("db", None)
-    if db is not None:
-        db.close()
+def fold_search_text(value: Optional[str]) -> str:
+    if not value:
+        return ""
+    return strip_accents(value).lower()
 
 
-def ensure_user_role_column(db: sqlite3.Connection) -> None:
-    columns = {row[1] for row in db.execute("PRAGMA table_info(users)")}
-    if "role" not in columns:
-        db.execute("ALTER TABLE users ADD COLUMN role TEXT NOT NULL DEFAULT 'standard'")
-        db.commit()
+def configure_connection(db: sqlite3.Connection) -> sqlite3.Connection:
+    db.row_factory = sqlite3.Row
+    # Los triggers del indice de busqueda llaman a esta funcion.
+    db.create_function("fold_search_text", 1, fold_search_text, deterministic=True)
+    return db
 
 
-def ensure_project_schema(db: sqlite3.Connection) -> None:
-    existing = {row[1] for row in db.execute("PRAGMA table_info(project_records)")}
-    expected = set(["id", *PROJECT_COLUMNS, "last_updated"])
-    if existing != expected:
-        db.execute("DROP TABLE IF EXISTS project_records")
-        db.execute(
-            """
-            CREATE TABLE project_records (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                record_id TEXT UNIQUE,
-                ubicacion TEXT,
-                nom_sede TEXT,
-                categoria_trab TEXT,
-                nombre_completo TEXT,
-                perfil_imagen TEXT,
-                marca TEXT,
-                modelo TEXT,
-                serial_num TEXT,
-                hostname TEXT,
-                ip_equipo TEXT,
-                email_trabajo TEXT,
-                fecha_estado TEXT,
-                estado TEXT,
-                estado_coordinacion TEXT,
-                estado_upgrade TEXT,
-                fecha_programada TEXT,
-                fecha_ejecucion TEXT,
-                notas TEXT,
-                last_updated TEXT DEFAULT CURRENT_TIMESTAMP
-            );
-            """
-        )
-        db.commit()
+def connection_pragmas(readonly: bool) -> List[str]:
+    pragmas = [
+        f"busy_timeout = {app.config['SQLITE_BUSY_TIMEOUT_MS']}",
+        f"cache_size = -{app.config['SQLITE_CACHE_MB'] * 1024}",
+        f"mmap_size = {app.config['SQLITE_MMAP_MB'] * 1024 * 1024}",
+        "temp_store = MEMORY",
+    ]
+    if readonly:
+        pragmas.append("query_only = 1")
+    else:
+        # En WAL los lectores no esperan a la escritura; NORMAL solo arriesga el ultimo commit ante un corte de luz.
+        pragmas += ["journal_mode = WAL", "synchronous = NORMAL"]
+    return pragmas
 
 
+def sqlite_uri(path: str, readonly: bool) -> str:
+    return f"{Path(path).resolve().as_uri()}?mode=ro" if readonly else str(path)
 
 
-def ensure_initial_admin() -> None:
-    password = app.config.get("INITIAL_ADMIN_PASSWORD")
-    if not password:
-        app.logger.warning("BANBIF_ADMIN_CODE no esta definido; no se creo el administrador inicial.")
-        return
-    db = get_db()
-    existing = db.execute("SELECT 1 FROM users WHERE role = 'admin' LIMIT 1").fetchone()
-    if existing:
-        return
-    db.execute(
-        "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-        ("admin", hash_password(password), "admin"),
+def open_connection(database: str, dataset: Optional[str] = None, readonly: bool = False) -> sqlite3.Connection:
+    # Con un snapshot activo la base principal de la conexion es el snapshot y la de la app se adjunta
+    # como "control": usuarios y cargas se resuelven ahi sin calificar porque el snapshot no los tiene.
+    db = sqlite3.connect(
+        sqlite_uri(dataset or database, readonly),
+        uri=readonly,
+        cached_statements=app.config["SQLITE_STATEMENT_CACHE"],
+        factory=InstrumentedConnection if app.config["METRICS_ENABLED"] else sqlite3.Connection,
     )
-    db.commit()
-    app.logger.info("Usuario administrador inicial 'admin' creado.")
+    configure_connection(db)
+    for pragma in connection_pragmas(readonly):
+        db.execute(f"PRAGMA {pragma}")
+    if dataset is not None:
+        db.execute("ATTACH DATABASE ? AS control", (sqlite_uri(database, readonly),))
+        if not readonly:
+            db.execute("PRAGMA control.synchronous = NORMAL")
+    return db
 
-def init_db() -> None:
-    db = get_db()
-    db.executescript(
-        """
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            role TEXT NOT NULL DEFAULT 'standard'
-        );
-        """
-    )
-    ensure_user_role_column(db)
-    ensure_project_schema(db)
-    ensure_initial_admin()
 
+class _ThreadConnections:
+    def __init__(self) -> None:
+        self.connections: Dict[Tuple[str, str], Tuple[Optional[str], sqlite3.Connection]] = {}
 
-def hash_password(password: str) -> str:
-    salt = secrets.token_hex(16)
-    hashed = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt.encode("utf-8"), 200_000)
-    return f"{salt}${hashed.hex()}"
 
+class ConnectionPool:
+    """Conexiones SQLite de larga vida por proceso e hilo: una de escritura y otra de solo lectura por base."""
 
-def verify_password(stored: str, password: str) -> bool:
-    try:
-        salt, hashed_hex = stored.split("$")
-    except ValueError:
-        return False
-    new_hash = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt.encode("utf-8"), 200_000)
-    return secrets.compare_digest(hashed_hex, new_hash.hex())
+    MODES = ("writer", "reader")
 
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._reset()
 
-def normalize_header(header: str) -> str:
-    if header is None:
-        return ""
-    normalized = unicodedata.normalize("NFD", header)
-    ascii_only = "".join(c for c in normalized if not unicodedata.combining(c))
-    return ascii_only.strip().lower().replace(" ", "_")
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._local = threading.local()
+        # Al terminar un hilo se libera su contenedor y sus conexiones se cierran solas.
+        self._holders: "weakref.WeakSet[_ThreadConnections]" = weakref.WeakSet()
+        self._wal_ready = set()
+        self._opened = dict.fromkeys(self.MODES, 0)
+        self._reused = dict.fromkeys(self.MODES, 0)
+        self._events = {"rollbacks": 0, "discarded": 0, "lock_errors": 0, "snapshot_switches": 0}
 
-def normalize_date(value: str) -> str:
-    if not value:
-        return ""
-    value = value.strip()
-    if not value:
-        return ""
-    from datetime import datetime
+    def _thread_connections(self) -> Dict[Tuple[str, str], Tuple[Optional[str], sqlite3.Connection]]:
+        if self._pid != os.getpid():
+            # Tras un fork no se reutilizan ni se cierran las conexiones del proceso padre.
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._reset()
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            holder = self._local.holder = _ThreadConnections()
+            with self._lock:
+                self._holders.add(holder)
+        return holder.connections
 
-    candidates = [value]
-    for separator in (" ", "T"):
-        if separator in value:
-            head = value.split(separator, 1)[0].strip()
-            if head:
-                candidates.append(head)
+    def connection(self, path: str, readonly: bool = False, dataset: Optional[str] = None) -> sqlite3.Connection:
+        if readonly and path not in self._wal_ready:
+            # Una conexion de solo lectura no puede crear la base ni activar WAL.
+            self.connection(path, dataset=dataset)
+        mode = "reader" if readonly else "writer"
+        connections = self._thread_connections()
+        pooled = connections.get((mode, path))
+        if pooled is not None:
+            pooled_dataset, db = pooled
+            if pooled_dataset == dataset:
+                with self._lock:
+                    self._reused[mode] += 1
+                return db
+            # Se activo otro snapshot: la conexion vieja se cierra y se abre una sobre el nuevo archivo.
+            del connections[(mode, path)]
+            db.close()
+            self.record("snapshot_switches")
+        db = open_connection(path, dataset, readonly)
+        connections[(mode, path)] = (dataset, db)
+        with self._lock:
+            self._opened[mode] += 1
+            if not readonly:
+                self._wal_ready.add(path)
+        return db
 
-    for candidate in list(candidates):
-        if len(candidate) >= 10:
-            slice_ = candidate[:10]
-            if len(slice_) == 10 and slice_[4] in ("-", "/", ".") and slice_ not in candidates:
-                candidates.append(slice_)
+    def release(self, db: sqlite3.Connection, exception: Optional[BaseException] = None) -> None:
+        if isinstance(exception, sqlite3.OperationalError) and "locked" in str(exception):
+            self.record("lock_errors")
+        if not db.in_transaction:
+            return
+        try:
+            db.rollback()
+            self.record("rollbacks")
+        except sqlite3.Error:
+            self.discard(db)
 
-    unique_candidates = []
-    for candidate in candidates:
-        candidate = candidate.strip()
-        if candidate and candidate not in unique_candidates:
-            unique_candidates.append(candidate)
+    def discard(self, db: sqlite3.Connection) -> None:
+        connections = self._thread_connections()
+        for key, (_dataset, pooled) in list(connections.items()):
+            if pooled is db:
+                del connections[key]
+                self.record("discarded")
+        db.close()
 
-    for candidate in unique_candidates:
-        try:
-            dt = datetime.fromisoformat(candidate)
-        except ValueError:
-            pass
-        else:
-            return dt.date().isoformat()
+    def record(self, event: str) -> None:
+        with self._lock:
+            self._events[event] += 1
 
-    patterns = [
-        "%Y-%m-%d",
-        "%Y/%m/%d",
-        "%Y.%m.%d",
-        "%d/%m/%Y",
-        "%d-%m-%Y",
-        "%m/%d/%Y",
-        "%m-%d-%Y",
-    ]
-    for candidate in unique_candidates:
-        for pattern in patterns:
-            try:
-                dt = datetime.strptime(candidate, pattern)
-            except ValueError:
-                continue
-            return dt.strftime("%Y-%m-%d")
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            holders = list(self._holders)
+            open_connections = dict.fromkeys(self.MODES, 0)
+            for holder in holders:
+                for mode, _path in list(holder.connections):
+                    open_connections[mode] += 1
+            return {
+                "pid": self._pid,
+                "threads": len(holders),
+                "open": open_connections,
+                "opened": dict(self._opened),
+                "reused": dict(self._reused),
+                **self._events,
+                "pragmas": {mode: connection_pragmas(mode == "reader") for mode in self.MODES},
+            }
 
-    return value
 
+connection_pool = ConnectionPool()
 
-def coerce_iso_date(value: str) -> str:
-    if not value:
-        return ""
-    normalized = normalize_date(value)
-    if normalized and ISO_DATE_PATTERN.match(normalized):
-        return normalized
-    return ""
 
+def snapshot_pointer_path(database: str) -> Path:
+    return Path(database).with_suffix(".active")
 
-CSV_FIELD_MAP = {
-    "id": "record_id",
-    "record_id": "record_id",
-    "ubicacion": "ubicacion",
-    "nom_sede": "nom_sede",
-    "categoria_trab": "categoria_trab",
-    "categoria": "categoria_trab",
-    "nombre_completo": "nombre_completo",
-    "nombre": "nombre_completo",
-    "perfil_imagen": "perfil_imagen",
-    "perfil": "perfil_imagen",
-    "marca": "marca",
-    "modelo": "modelo",
-    "serial_num": "serial_num",
-    "serialnumber": "serial_num",
-    "hostname": "hostname",
-    "ip_equipo": "ip_equipo",
-    "email_trabajo": "email_trabajo",
-    "correo": "email_trabajo",
-    "fecha_estado": "fecha_estado",
-    "estado": "estado",
-    "estado_coordinacion": "estado_coordinacion",
-    "estado_coordinacin": "estado_coordinacion",
-    "estado_upgrade": "estado_upgrade",
-    "fecha_programada": "fecha_programada",
-    "fecha_programacion": "fecha_programada",
-    "fecha_ejecucion": "fecha_ejecucion",
-    "fecha_upgrade": "fecha_ejecucion",
-    "notas": "notas",
-}
 
+_active_pointer_cache: Dict[str, Tuple[Tuple[int, int], Optional[str]]] = {}
 
-@app.before_request
-def load_logged_in_user():
-    user_id = session.get("user_id")
-    if user_id is None:
-        g.user = None
-    else:
-        g.user = get_db().execute(
-            "SELECT id, username, role FROM users WHERE id = ?",
-            (user_id,),
-        ).fetchone()
 
+def active_dataset_path(database: str) -> Optional[str]:
+    # Un stat por request; el archivo se relee solo cuando activate_snapshot lo reemplaza.
+    pointer = snapshot_pointer_path(database)
+    try:
+        stat = pointer.stat()
+    except FileNotFoundError:
+        return None
+    key = (stat.st_ino, stat.st_mtime_ns)
+    cached = _active_pointer_cache.get(database)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    name = pointer.read_text(encoding="utf-8").strip()
+    path = str(pointer.parent / name) if name else None
+    _active_pointer_cache[database] = (key, path)
+    return path
 
-def login_required(view):
-    from functools import wraps
 
-    @wraps(view)
-    def wrapped_view(**kwargs):
-        if g.user is None:
-            flash("Inicia sesion para continuar", "warning")
-            return redirect(url_for("login"))
-        return view(**kwargs)
+def get_db() -> sqlite3.Connection:
+    # Unica via de escritura; las consultas del dashboard usan get_read_db().
+    if "db" not in g:
+        database = app.config["DATABASE"]
+        g.db = connection_pool.connection(database, dataset=active_dataset_path(database))
+    return g.db
 
-    return wrapped_view
 
+def get_read_db() -> sqlite3.Connection:
+    if "read_db" not in g:
+        database = app.config["DATABASE"]
+        g.read_db = connection_pool.connection(database, readonly=True, dataset=active_dataset_path(database))
+    return g.read_db
 
-def admin_required(view):
-    from functools import wraps
 
-    @wraps(view)
-    def wrapped_view(**kwargs):
-        if g.user is None or g.user["role"] != "admin":
-            flash("Requiere privilegios administrativos", "warning")
-            return redirect(url_for("dashboard"))
-        return view(**kwargs)
+@contextmanager
+def read_snapshot(db: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    # Todas las consultas de la respuesta ven la misma version de los datos que su data_version.
+    db.execute("BEGIN")
+    try:
+        yield db
+    finally:
+        db.rollback()
 
-    return wrapped_view
 
+@app.teardown_appcontext
+def close_db(exception=None):
+    for name in ("db", "read_db", "cache_db"):
+        db = g.pop(name, None)
+        if db is not None:
+            connection_pool.release(db, exception)
 
-def attempt_user_creation(
-    username: str,
-    password: str,
-    confirm: str,
-    role: str,
-) -> Tuple[bool, str]:
-    username = (username or "").strip()
-    role = (role or "standard").strip()
-    if not username:
-        return False, "El usuario es obligatorio"
-    if not password:
-        return False, "La contrasena es obligatoria"
-    if password != confirm:
-        return False, "Las contrasenas no coinciden"
-    if len(password) < 8:
-        return False, "La contrasena debe tener al menos 8 caracteres"
-    if role not in {"standard", "admin"}:
-        return False, "Rol invalido"
 
-    db = get_db()
-    try:
-        db.execute(
-            "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
-            (username, hash_password(password), role),
-        )
-        db.commit()
-    except sqlite3.IntegrityError:
-        return False, "Este usuario ya existe"
-    return True, ""
+# (tipo, ayuda, limites del histograma en segundos)
+METRIC_FAMILIES: Dict[str, Tuple[str, str, Tuple[float, ...]]] = {
+    "banbif_http_requests_total": ("counter", "Peticiones atendidas por ruta, metodo y codigo.", ()),
+    "banbif_http_request_duration_seconds": (
+        "histogram",
+        "Duracion de las peticiones hasta armar la respuesta.",
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    ),
+    "banbif_sql_statement_duration_seconds": (
+        "histogram",
+        "Duracion de cada sentencia SQL hasta la primera fila, por operacion y tabla.",
+        (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+    ),
+    "banbif_sql_rows_total": ("counter", "Filas leidas o modificadas por las sentencias SQL.", ()),
+    "banbif_import_jobs_total": ("counter", "Cargas terminadas por modo y estado.", ()),
+    "banbif_import_rows_total": ("counter", "Filas procesadas por las cargas, por resultado.", ()),
+    "banbif_import_bytes_total": ("counter", "Bytes de CSV procesados por las cargas.", ()),
+    "banbif_import_seconds_total": ("counter", "Tiempo de proceso de las cargas.", ()),
+    "banbif_import_rows_per_second": ("gauge", "Filas por segundo de la ultima carga terminada.", ()),
+    "banbif_summary_cache_events_total": ("counter", "Aciertos, fallos, 304 y desalojos de la cache de resumen.", ()),
+}
+SQL_STATEMENT_PATTERN = re.compile(r"\s*([A-Za-z]+)")
+SQL_TABLE_PATTERN = re.compile(
+    r"\b(?:FROM|INTO|UPDATE|TABLE)\s+(?:OR\s+\w+\s+)?(?:IF\s+NOT\s+EXISTS\s+)?([A-Za-z_][\w.]*)", re.I
+)
 
 
-@app.context_processor
-def inject_globals():
-    return {"current_user": g.get("user")}
+def metric_labels(**labels: object) -> str:
+    escaped = {
+        name: str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for name, value in labels.items()
+    }
+    return ",".join(f'{name}="{value}"' for name, value in escaped.items())
 
 
-@app.route("/register", methods=["GET", "POST"])
-def register():
-    abort(404)
-@app.route("/admin/usuarios/nuevo", methods=["GET", "POST"])
-@login_required
-@admin_required
-def admin_new_user():
-    selected_role = request.form.get("role", "standard")
-    if request.method == "POST":
-        success, error = attempt_user_creation(
-            username=request.form.get("username", ""),
-            password=request.form.get("password", ""),
-            confirm=request.form.get("confirm", ""),
-            role=selected_role,
-        )
-        if success:
-            flash("Usuario creado correctamente", "success")
-            return redirect(url_for("admin_new_user"))
-        flash(error, "danger")
-    return render_template(
-        "register.html",
-        admin_mode=True,
-        selected_role=selected_role,
+def metric_series(name: str, labels: str) -> str:
+    return f"{name}{{{labels}}}" if labels else name
+
+
+def format_metric(value: float) -> str:
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+@lru_cache(maxsize=1024)
+def sql_statement_labels(sql: str) -> str:
+    # Operacion y primera tabla: acota las series aunque el texto cambie con los filtros.
+    operation = SQL_STATEMENT_PATTERN.match(sql)
+    table = SQL_TABLE_PATTERN.search(sql)
+    return metric_labels(
+        operation=operation.group(1).upper() if operation else "OTRA",
+        table=table.group(1).split(".")[-1] if table else "",
     )
 
 
-@app.route("/login", methods=["GET", "POST"])
-def login():
-    if g.user:
-        return redirect(url_for("dashboard"))
-    if request.method == "POST":
-        username = request.form.get("username", "").strip()
-        password = request.form.get("password", "")
-        error = "Credenciales invalidas"
-        user = get_db().execute(
-            "SELECT id, password_hash FROM users WHERE username = ?",
-            (username,),
-        ).fetchone()
-        if user and verify_password(user["password_hash"], password):
-            session.clear()
-            session["user_id"] = user["id"]
-            flash("Bienvenido de nuevo", "success")
-            return redirect(url_for("dashboard"))
-        flash(error, "danger")
-    return render_template("login.html")
+class MetricsRegistry:
+    """Metricas de cada proceso; cada METRICS_FLUSH_SECONDS se suman en METRICS_DATABASE, compartida por los workers."""
 
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._ready = set()
+        self._reset()
 
-@app.route("/logout")
-@login_required
-def logout():
-    session.clear()
-    flash("Sesion finalizada", "info")
-    return redirect(url_for("login"))
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        # (nombre, etiquetas, bucket) -> incremento pendiente; bucket -1 es el valor simple o la suma del histograma.
+        self._pending: Dict[Tuple[str, str, int], float] = {}
+        self._gauges: Dict[Tuple[str, str, int], float] = {}
+        # Incrementos de finalizadores: se encolan sin tomar _lock y flush los suma.
+        self._deferred: "deque[Tuple[str, str, float]]" = deque()
+        self._flushed_at = time.monotonic()
 
+    def inc(self, name: str, labels: str = "", amount: float = 1.0) -> None:
+        key = (name, labels, -1)
+        with self._lock:
+            self._pending[key] = self._pending.get(key, 0.0) + amount
 
-@app.route("/")
-def index():
-    if g.user:
-        return redirect(url_for("dashboard"))
-    return redirect(url_for("login"))
+    def inc_deferred(self, name: str, labels: str = "", amount: float = 1.0) -> None:
+        # deque.append es atomico: sirve desde __del__ aunque el GC corra con _lock tomado en este hilo.
+        self._deferred.append((name, labels, amount))
 
+    def observe(self, name: str, labels: str, seconds: float) -> None:
+        bucket = bisect_left(METRIC_FAMILIES[name][2], seconds)
+        with self._lock:
+            pending = self._pending
+            pending[(name, labels, bucket)] = pending.get((name, labels, bucket), 0.0) + 1
+            pending[(name, labels, -1)] = pending.get((name, labels, -1), 0.0) + seconds
 
-@app.route("/dashboard")
-@login_required
-def dashboard():
-    return render_template("dashboard.html")
+    def set_gauge(self, name: str, labels: str, value: float) -> None:
+        with self._lock:
+            self._gauges[(name, labels, -1)] = value
 
+    def maybe_flush(self) -> None:
+        if time.monotonic() - self._flushed_at >= app.config["METRICS_FLUSH_SECONDS"]:
+            self.flush()
 
-def build_filters_payload(filters: Dict[str, str]) -> Dict[str, Dict[str, List[str]]]:
-    db = get_db()
-    payload: Dict[str, Dict[str, List[str]]] = {}
-    for field in ("ubicacion", "nom_sede", "categoria_trab"):
-        rows = db.execute(
-            f"SELECT DISTINCT {field} FROM project_records WHERE {field} IS NOT NULL AND {field} <> '' ORDER BY {field}"
-        ).fetchall()
-        payload[field] = {
-            "options": [row[0] for row in rows],
-            "selected": filters.get(field) or "",
-        }
+    def _connect(self) -> sqlite3.Connection:
+        path = app.config["METRICS_DATABASE"]
+        db = sqlite3.connect(path, timeout=1)
+        if path not in self._ready:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS metric_samples ("
+                "name TEXT NOT NULL, labels TEXT NOT NULL, bucket INTEGER NOT NULL, value REAL NOT NULL, "
+                "PRIMARY KEY (name, labels, bucket)) WITHOUT ROWID"
+            )
+            self._ready.add(path)
+        return db
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._pid != os.getpid():
+                # Tras un fork lo pendiente es del proceso padre, que lo guarda por su cuenta.
+                self._reset()
+            while self._deferred:
+                name, labels, amount = self._deferred.popleft()
+                key = (name, labels, -1)
+                self._pending[key] = self._pending.get(key, 0.0) + amount
+            pending, gauges = self._pending, self._gauges
+            self._pending, self._gauges = {}, {}
+            self._flushed_at = time.monotonic()
+        if not pending and not gauges:
+            return
+        try:
+            db = self._connect()
+            try:
+                with db:
+                    db.executemany(
+                        "INSERT INTO metric_samples (name, labels, bucket, value) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(name, labels, bucket) DO UPDATE SET value = value + excluded.value",
+                        [(*key, value) for key, value in pending.items()],
+                    )
+                    db.executemany(
+                        "INSERT OR REPLACE INTO metric_samples (name, labels, bucket, value) VALUES (?, ?, ?, ?)",
+                        [(*key, value) for key, value in gauges.items()],
+                    )
+            finally:
+                db.close()
+        except sqlite3.Error:
+            # Se reintenta en el proximo flush sin perder los incrementos.
+            with self._lock:
+                for key, value in pending.items():
+                    self._pending[key] = self._pending.get(key, 0.0) + value
+                for key, value in gauges.items():
+                    self._gauges.setdefault(key, value)
+
+    def totals(self, name: str) -> Dict[str, float]:
+        # Valor acumulado de todos los workers por etiquetas; lo pendiente de este proceso se guarda antes.
+        self.flush()
+        db = self._connect()
+        try:
+            rows = db.execute(
+                "SELECT labels, value FROM metric_samples WHERE name = ? AND bucket = -1", (name,)
+            ).fetchall()
+        finally:
+            db.close()
+        return dict(rows)
+
+    def render(self) -> str:
+        self.flush()
+        db = self._connect()
+        try:
+            rows = db.execute("SELECT name, labels, bucket, value FROM metric_samples").fetchall()
+        finally:
+            db.close()
+        series: Dict[str, Dict[str, Dict[int, float]]] = {}
+        for name, labels, bucket, value in rows:
+            series.setdefault(name, {}).setdefault(labels, {})[bucket] = value
+        lines = []
+        for name, (kind, help_text, bounds) in METRIC_FAMILIES.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for labels, values in sorted(series.get(name, {}).items()):
+                if kind != "histogram":
+                    lines.append(f"{metric_series(name, labels)} {format_metric(values[-1])}")
+                    continue
+                prefix = f"{labels}," if labels else ""
+                cumulative = 0.0
+                for index, bound in enumerate((*bounds, "+Inf")):
+                    cumulative += values.get(index, 0.0)
+                    lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {format_metric(cumulative)}')
+                lines.append(f"{metric_series(f'{name}_sum', labels)} {format_metric(values.get(-1, 0.0))}")
+                lines.append(f"{metric_series(f'{name}_count', labels)} {format_metric(cumulative)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+atexit.register(metrics.flush)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Mide cada sentencia y cuenta sus filas; las filas se informan al cerrar, reutilizar o liberar el cursor."""
+
+    _labels: Optional[str] = None
+    _rows = 0
+    _counter: Optional[Iterator[int]] = None
+
+    def execute(self, sql, parameters=()):
+        return self._run(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._run(super().executemany, sql, seq_of_parameters)
+
+    def _run(self, method, sql, parameters):
+        self._report()
+        labels = sql_statement_labels(sql)
+        start = time.perf_counter()
+        try:
+            method(sql, parameters)
+        finally:
+            metrics.observe("banbif_sql_statement_duration_seconds", labels, time.perf_counter() - start)
+        self._labels = labels
+        # rowcount es -1 en los SELECT; esas filas se cuentan al leerlas.
+        self._rows = max(self.rowcount, 0)
+        self._counter = None
+        return self
+
+    def _take_rows(self) -> Optional[Tuple[str, int]]:
+        if self._labels is None:
+            return None
+        labels, self._labels = self._labels, None
+        rows = self._rows + (next(self._counter) if self._counter is not None else 0)
+        return (labels, rows) if rows else None
+
+    def _report(self) -> None:
+        taken = self._take_rows()
+        if taken is not None:
+            metrics.inc("banbif_sql_rows_total", *taken)
+
+    def __iter__(self):
+        # Todo en C: redefinir __next__ en Python costaria casi lo mismo que leer la fila.
+        # El cursor va primero en zip, asi el contador avanza solo con filas entregadas.
+        self._counter = count()
+        return map(itemgetter(0), zip(iter(super().fetchone, None), self._counter))
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = super().fetchmany(*args, **kwargs)
+        self._rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        self._rows += len(rows)
+        self._report()
+        return rows
+
+    def close(self):
+        self._report()
+        super().close()
+
+    def __del__(self):
+        # El GC puede correr esto con metrics._lock tomado en este mismo hilo: se encola sin lock.
+        # Al cerrar el interprete los globales del modulo pueden ya ser None; esas filas se pierden.
+        try:
+            taken = self._take_rows()
+            if taken is not None:
+                metrics.inc_deferred("banbif_sql_rows_total", *taken)
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    # Connection.execute en C no pasa por cursor(); se redefine para que use el cursor medido.
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+@app.before_request
+def start_request_timer():
+    if app.config["METRICS_ENABLED"]:
+        g.request_started = time.perf_counter()
+
+
+def record_request(status: int) -> None:
+    started = g.pop("request_started", None)
+    if started is None:
+        return
+    route = request.url_rule.rule if request.url_rule else "sin_ruta"
+    metrics.inc("banbif_http_requests_total", metric_labels(route=route, method=request.method, status=status))
+    metrics.observe("banbif_http_request_duration_seconds", metric_labels(route=route), time.perf_counter() - started)
+    metrics.maybe_flush()
+
+
+@app.after_request
+def record_request_metrics(response):
+    # Se registra antes que compress_response, asi que Flask lo ejecuta despues e incluye la compresion.
+    record_request(response.status_code)
+    return response
+
+
+@app.teardown_request
+def record_failed_request(exception=None):
+    # Una excepcion no manejada no pasa por after_request.
+    if exception is not None:
+        record_request(500)
+
+
+PROJECT_RECORDS_COLUMN_TYPES = {
+    "last_updated": "TEXT DEFAULT CURRENT_TIMESTAMP",
+}
+
+
+def table_columns(db: sqlite3.Connection, table: str) -> set:
+    return {row[1] for row in db.execute(f"PRAGMA table_info({table})")}
+
+
+def migrate_users_table(db: sqlite3.Connection) -> None:
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            role TEXT NOT NULL DEFAULT 'standard'
+        )
+        """
+    )
+    if "role" not in table_columns(db, "users"):
+        db.execute("ALTER TABLE users ADD COLUMN role TEXT NOT NULL DEFAULT 'standard'")
+
+
+def migrate_project_records_table(db: sqlite3.Connection) -> None:
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS project_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            record_id TEXT UNIQUE,
+            ubicacion TEXT,
+            nom_sede TEXT,
+            categoria_trab TEXT,
+            nombre_completo TEXT,
+            perfil_imagen TEXT,
+            marca TEXT,
+            modelo TEXT,
+            serial_num TEXT,
+            hostname TEXT,
+            ip_equipo TEXT,
+            email_trabajo TEXT,
+            fecha_estado TEXT,
+            estado TEXT,
+            estado_coordinacion TEXT,
+            estado_upgrade TEXT,
+            fecha_programada TEXT,
+            fecha_ejecucion TEXT,
+            notas TEXT,
+            last_updated TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+    # Bases creadas con versiones anteriores: se agregan las columnas faltantes sin borrar datos.
+    existing = table_columns(db, "project_records")
+    for column in [*PROJECT_COLUMNS[1:], "last_updated"]:
+        if column not in existing:
+            column_type = PROJECT_RECORDS_COLUMN_TYPES.get(column, "TEXT")
+            db.execute(f"ALTER TABLE project_records ADD COLUMN {column} {column_type}")
+
+
+def migrate_dashboard_indexes(db: sqlite3.Connection) -> None:
+    # Cada indice sigue la forma de las consultas de /api/summary y /api/records:
+    # filtro por igualdad al inicio y luego estado/fecha/marca para que los GROUP BY
+    # se resuelvan solo con el indice.
+    statements = [
+        "CREATE INDEX IF NOT EXISTS idx_records_ubicacion_sede_categoria "
+        "ON project_records (ubicacion, nom_sede, categoria_trab, estado, fecha_estado, marca)",
+        "CREATE INDEX IF NOT EXISTS idx_records_sede_categoria "
+        "ON project_records (nom_sede, categoria_trab, estado, fecha_estado, marca)",
+        "CREATE INDEX IF NOT EXISTS idx_records_categoria "
+        "ON project_records (categoria_trab, estado, fecha_estado, marca)",
+        "CREATE INDEX IF NOT EXISTS idx_records_estado_upper "
+        "ON project_records (UPPER(estado), fecha_estado, marca)",
+        "CREATE INDEX IF NOT EXISTS idx_records_fecha_estado "
+        "ON project_records (fecha_estado, marca, estado)",
+        "CREATE INDEX IF NOT EXISTS idx_records_last_updated "
+        "ON project_records (last_updated)",
+    ]
+    for statement in statements:
+        db.execute(statement)
+
+
+RECORDS_STORE = "project_records_store"
+DICTIONARY_TABLE = "record_dictionary"
+# Columna -> dominio del diccionario; los tres estados comparten vocabulario.
+DICTIONARY_COLUMNS = {
+    "ubicacion": "ubicacion",
+    "nom_sede": "nom_sede",
+    "categoria_trab": "categoria_trab",
+    "marca": "marca",
+    "estado": "estado",
+    "estado_coordinacion": "estado",
+    "estado_upgrade": "estado",
+}
+# Dia 1 = 0001-01-01, igual que date.toordinal(); julianday() cuenta desde el mediodia.
+DAY_NUMBER_OFFSET = 1721424.5
+ISO_DATE_GLOB = "[1-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]"
+
+
+def dictionary_id_sql(column: str, source: str) -> str:
+    domain = DICTIONARY_COLUMNS[column]
+    value = f"UPPER({source})" if domain == "estado" else source
+    return f"(SELECT id FROM {DICTIONARY_TABLE} WHERE domain = '{domain}' AND value = {value})"
+
+
+def dictionary_value_sql(id_column: str) -> str:
+    return f"(SELECT value FROM {DICTIONARY_TABLE} WHERE id = {id_column})"
+
+
+def iso_date_sql(source: str) -> str:
+    return f"({source} GLOB '{ISO_DATE_GLOB}' AND date({source}) = {source})"
+
+
+def date_value_sql(column: str, prefix: str = "") -> str:
+    # Lo que no es una fecha ISO valida se conserva tal cual en la columna _texto.
+    return (
+        f"CASE WHEN {prefix}{column}_dia > 0 THEN date({prefix}{column}_dia + {DAY_NUMBER_OFFSET}) "
+        f"ELSE {prefix}{column}_texto END"
+    )
+
+
+def typed_record_columns(prefix: str = "") -> List[Tuple[str, str, str]]:
+    # (columna de RECORDS_STORE, tipo, expresion que la calcula desde el texto de PROJECT_COLUMNS)
+    columns = []
+    for column in PROJECT_COLUMNS:
+        source = f"{prefix}{column}"
+        if column in DICTIONARY_COLUMNS:
+            columns.append((f"{column}_id", f"INTEGER REFERENCES {DICTIONARY_TABLE} (id)", dictionary_id_sql(column, source)))
+        elif column in DATE_FIELDS:
+            iso = iso_date_sql(source)
+            columns.append((f"{column}_dia", "INTEGER", f"CASE WHEN {iso} THEN CAST(julianday({source}) - {DAY_NUMBER_OFFSET} AS INTEGER) END"))
+            columns.append((f"{column}_texto", "TEXT", f"CASE WHEN {iso} THEN NULL ELSE {source} END"))
+        elif column == "record_id":
+            columns.append((column, "TEXT UNIQUE", source))
+        else:
+            columns.append((column, "TEXT", source))
+    return columns
+
+
+def record_value_sql(column: str, prefix: str = "") -> str:
+    if column in DICTIONARY_COLUMNS:
+        return dictionary_value_sql(f"{prefix}{column}_id")
+    if column in DATE_FIELDS:
+        return date_value_sql(column, prefix)
+    return f"{prefix}{column}"
+
+
+def register_dictionary_values(db: sqlite3.Connection, source_table: str) -> None:
+    for column, domain in DICTIONARY_COLUMNS.items():
+        value = f"UPPER({column})" if domain == "estado" else column
+        db.execute(
+            f"INSERT OR IGNORE INTO {DICTIONARY_TABLE} (domain, value) "
+            f"SELECT DISTINCT '{domain}', {value} FROM {source_table} WHERE {column} IS NOT NULL"
+        )
+
+
+def create_records_view(db: sqlite3.Connection) -> None:
+    prefix = f"{RECORDS_STORE}."
+    typed = typed_record_columns()
+    decoded = ", ".join(f"{record_value_sql(column, prefix)} AS {column}" for column in PROJECT_COLUMNS)
+    # Tambien expone las columnas tipadas para que los filtros usen los indices de RECORDS_STORE.
+    raw = ", ".join(f"{prefix}{name}" for name, _kind, _expression in typed if name not in PROJECT_COLUMNS)
+    db.execute(
+        f"CREATE VIEW IF NOT EXISTS project_records AS "
+        f"SELECT {prefix}id AS id, {decoded}, {prefix}last_updated AS last_updated, {raw} FROM {RECORDS_STORE}"
+    )
+    register_new = " ".join(
+        f"INSERT OR IGNORE INTO {DICTIONARY_TABLE} (domain, value) "
+        f"SELECT '{domain}', {'UPPER(new.' + column + ')' if domain == 'estado' else 'new.' + column} "
+        f"WHERE new.{column} IS NOT NULL;"
+        for column, domain in DICTIONARY_COLUMNS.items()
+    )
+    names = ", ".join(name for name, _kind, _expression in typed)
+    values = ", ".join(expression for _name, _kind, expression in typed_record_columns("new."))
+    assignments = ", ".join(f"{name} = {expression}" for name, _kind, expression in typed_record_columns("new."))
+    # Los escritores que aun insertan o borran sobre project_records siguen funcionando.
+    db.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS project_records_view_insert
+        INSTEAD OF INSERT ON project_records BEGIN
+            {register_new}
+            INSERT INTO {RECORDS_STORE} (id, {names}, last_updated)
+            VALUES (new.id, {values}, COALESCE(new.last_updated, CURRENT_TIMESTAMP));
+        END
+        """
+    )
+    db.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS project_records_view_update
+        INSTEAD OF UPDATE ON project_records BEGIN
+            {register_new}
+            UPDATE {RECORDS_STORE} SET {assignments}, last_updated = new.last_updated WHERE id = old.id;
+        END
+        """
+    )
+    db.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS project_records_view_delete
+        INSTEAD OF DELETE ON project_records BEGIN
+            DELETE FROM {RECORDS_STORE} WHERE id = old.id;
+        END
+        """
+    )
+
+
+def rebuild_search_index(db: sqlite3.Connection) -> int:
+    db.execute("DELETE FROM project_records_search")
+    cursor = db.execute(
+        """
+        INSERT INTO project_records_search (rowid, nombre_completo, hostname)
+        SELECT id, fold_search_text(nombre_completo), fold_search_text(hostname)
+        FROM project_records
+        """
+    )
+    db.execute("INSERT INTO project_records_search (project_records_search) VALUES ('optimize')")
+    return cursor.rowcount
+
+
+def create_search_triggers(db: sqlite3.Connection, table: str) -> None:
+    db.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS project_records_search_insert
+        AFTER INSERT ON {table} BEGIN
+            INSERT INTO project_records_search (rowid, nombre_completo, hostname)
+            VALUES (new.id, fold_search_text(new.nombre_completo), fold_search_text(new.hostname));
+        END
+        """
+    )
+    db.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS project_records_search_update
+        AFTER UPDATE OF id, nombre_completo, hostname ON {table} BEGIN
+            DELETE FROM project_records_search WHERE rowid = old.id;
+            INSERT INTO project_records_search (rowid, nombre_completo, hostname)
+            VALUES (new.id, fold_search_text(new.nombre_completo), fold_search_text(new.hostname));
+        END
+        """
+    )
+    db.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS project_records_search_delete
+        AFTER DELETE ON {table} BEGIN
+            DELETE FROM project_records_search WHERE rowid = old.id;
+        END
+        """
+    )
+
+
+def create_search_table(db: sqlite3.Connection) -> None:
+    # Trigramas sobre el texto sin tildes: permite LIKE '%x%' con indice y que "Perez" encuentre "Pérez".
+    db.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS project_records_search
+        USING fts5(nombre_completo, hostname, tokenize = 'trigram')
+        """
+    )
+
+
+def migrate_search_index(db: sqlite3.Connection) -> None:
+    create_search_table(db)
+    create_search_triggers(db, "project_records")
+    rebuild_search_index(db)
+
+
+SUMMARY_CUBE_TABLE = "project_summary_cube"
+SUMMARY_CUBE_DIMENSIONS = [
+    "ubicacion_id", "nom_sede_id", "categoria_trab_id", "estado_id", "fecha_estado_dia", "fecha_estado_texto", "marca_id",
+]
+
+
+def summary_cube_key_expressions(prefix: str = "") -> List[str]:
+    # La clave primaria no admite NULL: 0 es "sin valor" para ids y dias, '' para el texto de fecha.
+    expressions = []
+    for column in SUMMARY_CUBE_DIMENSIONS:
+        empty = "''" if column.endswith("_texto") else "0"
+        expressions.append(f"COALESCE({prefix}{column}, {empty})")
+    return expressions
+
+
+def summary_cube_rows_sql() -> str:
+    return (
+        f"SELECT {', '.join(summary_cube_key_expressions())}, COUNT(*) FROM {RECORDS_STORE} "
+        f"GROUP BY {', '.join(str(index) for index in range(1, len(SUMMARY_CUBE_DIMENSIONS) + 1))}"
+    )
+
+
+def rebuild_summary_cube(db: sqlite3.Connection) -> int:
+    db.execute(f"DELETE FROM {SUMMARY_CUBE_TABLE}")
+    cursor = db.execute(f"INSERT INTO {SUMMARY_CUBE_TABLE} {summary_cube_rows_sql()}")
+    return cursor.rowcount
+
+
+def diff_summary_cube(db: sqlite3.Connection) -> List[Tuple[str, ...]]:
+    dimensions = ", ".join(SUMMARY_CUBE_DIMENSIONS)
+    expected = summary_cube_rows_sql()
+    live = f"SELECT {dimensions}, total FROM {SUMMARY_CUBE_TABLE}"
+    rows = db.execute(
+        f"SELECT 'faltante', * FROM ({expected} EXCEPT {live}) "
+        f"UNION ALL SELECT 'sobrante', * FROM ({live} EXCEPT {expected})"
+    ).fetchall()
+    return [tuple(row) for row in rows]
+
+
+def create_summary_cube(db: sqlite3.Connection) -> None:
+    dimensions = ", ".join(SUMMARY_CUBE_DIMENSIONS)
+    columns = ",\n".join(
+        f"            {column} {'TEXT' if column.endswith('_texto') else 'INTEGER'} NOT NULL"
+        for column in SUMMARY_CUBE_DIMENSIONS
+    )
+    db.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {SUMMARY_CUBE_TABLE} (
+{columns},
+            total INTEGER NOT NULL,
+            PRIMARY KEY ({dimensions})
+        ) WITHOUT ROWID
+        """
+    )
+    increment = (
+        f"INSERT INTO {SUMMARY_CUBE_TABLE} ({dimensions}, total) "
+        f"VALUES ({', '.join(summary_cube_key_expressions('new.'))}, 1) "
+        f"ON CONFLICT ({dimensions}) DO UPDATE SET total = total + 1;"
+    )
+    old_key = " AND ".join(
+        f"{column} = {expression}"
+        for column, expression in zip(SUMMARY_CUBE_DIMENSIONS, summary_cube_key_expressions("old."))
+    )
+    decrement = (
+        f"UPDATE {SUMMARY_CUBE_TABLE} SET total = total - 1 WHERE {old_key};"
+        f" DELETE FROM {SUMMARY_CUBE_TABLE} WHERE {old_key} AND total <= 0;"
+    )
+    changed = " OR ".join(f"old.{column} IS NOT new.{column}" for column in SUMMARY_CUBE_DIMENSIONS)
+    db.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS project_records_cube_insert
+        AFTER INSERT ON {RECORDS_STORE} BEGIN
+            {increment}
+        END
+        """
+    )
+    db.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS project_records_cube_update
+        AFTER UPDATE OF {dimensions} ON {RECORDS_STORE}
+        WHEN {changed} BEGIN
+            {decrement}
+            {increment}
+        END
+        """
+    )
+    db.execute(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS project_records_cube_delete
+        AFTER DELETE ON {RECORDS_STORE} BEGIN
+            {decrement}
+        END
+        """
+    )
+    rebuild_summary_cube(db)
+
+
+def create_data_version_table(db: sqlite3.Connection) -> None:
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+        """
+    )
+    db.execute("INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 1)")
+
+
+def migrate_data_version(db: sqlite3.Connection) -> None:
+    create_data_version_table(db)
+    create_data_version_triggers(db, "project_records")
+
+
+def create_data_version_triggers(db: sqlite3.Connection, table: str) -> None:
+    # Los triggers corren dentro de la misma transaccion que la escritura.
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        db.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS project_records_version_{event.lower()}
+            AFTER {event} ON {table} BEGIN
+                UPDATE data_version SET version = version + 1 WHERE id = 1;
+            END
+            """
+        )
+
+
+CHANGE_LOG_TABLE = "record_changes"
+
+
+def create_change_log_table(db: sqlite3.Connection) -> None:
+    # Cada escritura guarda las dimensiones del cubo antes y despues; con eso se arman los deltas.
+    columns = ",\n".join(
+        f"            {side}_{column} {'TEXT' if column.endswith('_texto') else 'INTEGER'}"
+        for side in ("old", "new")
+        for column in SUMMARY_CUBE_DIMENSIONS
+    )
+    db.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {CHANGE_LOG_TABLE} (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            op TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            record_id TEXT,
+{columns}
+        )
+        """
+    )
+
+
+def create_change_log_triggers(db: sqlite3.Connection) -> None:
+    old_columns = ", ".join(f"old_{column}" for column in SUMMARY_CUBE_DIMENSIONS)
+    new_columns = ", ".join(f"new_{column}" for column in SUMMARY_CUBE_DIMENSIONS)
+    old_values = ", ".join(f"old.{column}" for column in SUMMARY_CUBE_DIMENSIONS)
+    new_values = ", ".join(f"new.{column}" for column in SUMMARY_CUBE_DIMENSIONS)
+    statements = {
+        "insert": f"({new_columns}, op, row_id, record_id) VALUES ({new_values}, 'I', new.id, new.record_id)",
+        "update": (
+            f"({old_columns}, {new_columns}, op, row_id, record_id) "
+            f"VALUES ({old_values}, {new_values}, 'U', new.id, new.record_id)"
+        ),
+        "delete": f"({old_columns}, op, row_id, record_id) VALUES ({old_values}, 'D', old.id, old.record_id)",
+    }
+    for event, insert in statements.items():
+        db.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS project_records_changes_{event}
+            AFTER {event.upper()} ON {RECORDS_STORE} BEGIN
+                INSERT INTO {CHANGE_LOG_TABLE} {insert};
+            END
+            """
+        )
+
+
+def change_log_head(db: sqlite3.Connection) -> int:
+    row = db.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (CHANGE_LOG_TABLE,)).fetchone()
+    return row[0] if row else 0
+
+
+def change_log_bounds(db: sqlite3.Connection) -> Optional[Tuple[int, int]]:
+    # (floor, head): se pueden servir los cambios de since >= floor hasta head.
+    try:
+        oldest = db.execute(f"SELECT MIN(seq) FROM {CHANGE_LOG_TABLE}").fetchone()[0]
+    except sqlite3.OperationalError:
+        return None
+    head = change_log_head(db)
+    return (oldest - 1 if oldest is not None else head), head
+
+
+def prune_change_log(db: sqlite3.Connection) -> int:
+    keep = app.config["CHANGE_LOG_RETENTION"]
+    return db.execute(f"DELETE FROM {CHANGE_LOG_TABLE} WHERE seq <= ?", (change_log_head(db) - keep,)).rowcount
+
+
+def reset_change_log(db: sqlite3.Connection, floor: int) -> None:
+    # Un dataset recien activado empieza su registro sobre floor: los clientes anteriores se resincronizan.
+    db.execute(f"DELETE FROM {CHANGE_LOG_TABLE}")
+    db.execute("DELETE FROM sqlite_sequence WHERE name = ?", (CHANGE_LOG_TABLE,))
+    db.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)", (CHANGE_LOG_TABLE, floor))
+
+
+def migrate_change_log(db: sqlite3.Connection) -> None:
+    create_change_log_table(db)
+    create_change_log_triggers(db)
+
+
+def migrate_import_jobs(db: sqlite3.Connection) -> None:
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS import_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            filename TEXT NOT NULL,
+            path TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            total_bytes INTEGER NOT NULL DEFAULT 0,
+            bytes_processed INTEGER NOT NULL DEFAULT 0,
+            rows_read INTEGER NOT NULL DEFAULT 0,
+            rows_rejected INTEGER NOT NULL DEFAULT 0,
+            inserted INTEGER NOT NULL DEFAULT 0,
+            updated INTEGER NOT NULL DEFAULT 0,
+            unchanged INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            worker TEXT,
+            heartbeat_at REAL,
+            run_started_at REAL,
+            run_rows_start INTEGER NOT NULL DEFAULT 0,
+            run_bytes_start INTEGER NOT NULL DEFAULT 0,
+            created_by TEXT,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            started_at TEXT,
+            finished_at TEXT
+        )
+        """
+    )
+    db.execute("CREATE INDEX IF NOT EXISTS idx_import_jobs_status ON import_jobs (status, id)")
+
+
+def migrate_import_date_formats(db: sqlite3.Connection) -> None:
+    if "date_formats" not in table_columns(db, "import_jobs"):
+        db.execute("ALTER TABLE import_jobs ADD COLUMN date_formats TEXT")
+
+
+def migrate_import_headers(db: sqlite3.Connection) -> None:
+    if "headers" not in table_columns(db, "import_jobs"):
+        db.execute("ALTER TABLE import_jobs ADD COLUMN headers TEXT")
+
+
+def create_typed_tables(db: sqlite3.Connection) -> None:
+    db.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {DICTIONARY_TABLE} (
+            id INTEGER PRIMARY KEY,
+            domain TEXT NOT NULL,
+            value TEXT NOT NULL,
+            UNIQUE (domain, value)
+        )
+        """
+    )
+    db.executemany(
+        f"INSERT OR IGNORE INTO {DICTIONARY_TABLE} (domain, value) VALUES ('estado', ?)",
+        [(status,) for status in STATUS_CHOICES],
+    )
+    typed = typed_record_columns()
+    columns = ",\n".join(f"            {name} {kind}" for name, kind, _expression in typed)
+    db.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {RECORDS_STORE} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+{columns},
+            last_updated TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def create_typed_indexes(db: sqlite3.Connection) -> None:
+    statements = [
+        f"CREATE INDEX IF NOT EXISTS idx_store_ubicacion_sede_categoria "
+        f"ON {RECORDS_STORE} (ubicacion_id, nom_sede_id, categoria_trab_id, estado_id, fecha_estado_dia, marca_id)",
+        f"CREATE INDEX IF NOT EXISTS idx_store_sede_categoria "
+        f"ON {RECORDS_STORE} (nom_sede_id, categoria_trab_id, estado_id, fecha_estado_dia, marca_id)",
+        f"CREATE INDEX IF NOT EXISTS idx_store_categoria "
+        f"ON {RECORDS_STORE} (categoria_trab_id, estado_id, fecha_estado_dia, marca_id)",
+        f"CREATE INDEX IF NOT EXISTS idx_store_estado ON {RECORDS_STORE} (estado_id, fecha_estado_dia, marca_id)",
+        f"CREATE INDEX IF NOT EXISTS idx_store_fecha_estado ON {RECORDS_STORE} (fecha_estado_dia, marca_id, estado_id)",
+        f"CREATE INDEX IF NOT EXISTS idx_store_last_updated ON {RECORDS_STORE} (last_updated)",
+    ]
+    for statement in statements:
+        db.execute(statement)
+
+
+def migrate_users_version(db: sqlite3.Connection) -> None:
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS users_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+        """
+    )
+    db.execute("INSERT OR IGNORE INTO users_version (id, version) VALUES (1, 1)")
+    # Los workers vacian su cache de usuarios cuando ven cambiar este contador.
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        db.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS users_version_{event.lower()}
+            AFTER {event} ON users BEGIN
+                UPDATE users_version SET version = version + 1 WHERE id = 1;
+            END
+            """
+        )
+
+
+def migrate_import_snapshot(db: sqlite3.Connection) -> None:
+    columns = table_columns(db, "import_jobs")
+    if "mode" not in columns:
+        db.execute("ALTER TABLE import_jobs ADD COLUMN mode TEXT NOT NULL DEFAULT 'merge'")
+    if "snapshot" not in columns:
+        db.execute("ALTER TABLE import_jobs ADD COLUMN snapshot TEXT")
+
+
+def migrate_typed_storage(db: sqlite3.Connection) -> None:
+    create_typed_tables(db)
+    typed = typed_record_columns()
+    # Se copian las filas con el mismo id para que el indice FTS siga apuntando a ellas.
+    register_dictionary_values(db, "project_records")
+    db.execute(
+        f"INSERT INTO {RECORDS_STORE} (id, {', '.join(name for name, _kind, _expression in typed)}, last_updated) "
+        f"SELECT id, {', '.join(expression for _name, _kind, expression in typed)}, last_updated FROM project_records"
+    )
+    # Al borrar la tabla de texto se van con ella sus indices y triggers.
+    db.execute("DROP TABLE project_records")
+    db.execute(f"DROP TABLE IF EXISTS {SUMMARY_CUBE_TABLE}")
+    create_records_view(db)
+    create_typed_indexes(db)
+    create_search_triggers(db, RECORDS_STORE)
+    create_summary_cube(db)
+    create_data_version_triggers(db, RECORDS_STORE)
+    db.execute("UPDATE data_version SET version = version + 1 WHERE id = 1")
+
+
+SCHEMA_MIGRATIONS = [
+    (1, "Tabla de usuarios con rol", migrate_users_table),
+    (2, "Tabla project_records", migrate_project_records_table),
+    (3, "Indices para filtros del dashboard", migrate_dashboard_indexes),
+    (4, "Indice FTS5 trigram para nombre y hostname", migrate_search_index),
+    # Sin efecto: el cubo se arma sobre el almacenamiento tipado y lo crea la version 10. El lugar se
+    # conserva para que las bases que ya anotaron la 5 y las nuevas recorran la misma numeracion.
+    (5, "Cubo de conteos para el resumen", lambda db: None),
+    (6, "Contador de version de datos", migrate_data_version),
+    (7, "Cola de cargas en segundo plano", migrate_import_jobs),
+    (8, "Formatos de fecha detectados por carga", migrate_import_date_formats),
+    (9, "Encabezados reconocidos por carga", migrate_import_headers),
+    (10, "Almacenamiento tipado con diccionarios y dias enteros", migrate_typed_storage),
+    (11, "Cargas que arman un snapshot nuevo", migrate_import_snapshot),
+    (12, "Contador de cambios en usuarios", migrate_users_version),
+    (13, "Registro de cambios para deltas del dashboard", migrate_change_log),
+]
+# Migraciones del dataset posteriores a la 11: tambien corren sobre los snapshots armados antes que ellas.
+# Un snapshot sin tabla schema_version es anterior a que se anotara la version y las recibe todas.
+SNAPSHOT_MIGRATION_VERSIONS = {13}
+SNAPSHOT_MIGRATIONS = [migration for migration in SCHEMA_MIGRATIONS if migration[0] in SNAPSHOT_MIGRATION_VERSIONS]
+
+
+def create_schema_version_table(db: sqlite3.Connection) -> None:
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def record_schema_version(db: sqlite3.Connection) -> None:
+    # Un snapshot nuevo nace con el esquema vigente; se anota para no repetirle migraciones.
+    create_schema_version_table(db)
+    version, description, _step = SCHEMA_MIGRATIONS[-1]
+    db.execute("INSERT OR IGNORE INTO schema_version (version, description) VALUES (?, ?)", (version, description))
+
+
+def current_schema_version(db: sqlite3.Connection) -> int:
+    return db.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+
+def apply_migrations(
+    db: sqlite3.Connection, migrations: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = SCHEMA_MIGRATIONS
+) -> List[int]:
+    create_schema_version_table(db)
+    db.commit()
+    applied = []
+    for version, description, step in migrations:
+        if version <= current_schema_version(db):
+            continue
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            # Otro proceso pudo aplicar la migracion mientras esperabamos el bloqueo.
+            if version <= current_schema_version(db):
+                db.rollback()
+                continue
+            step(db)
+            db.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (version, description),
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        applied.append(version)
+    return applied
+
+
+def ensure_initial_admin() -> None:
+    password = app.config.get("INITIAL_ADMIN_PASSWORD")
+    if not password:
+        app.logger.warning("BANBIF_ADMIN_CODE no esta definido; no se creo el administrador inicial.")
+        return
+    db = get_db()
+    existing = db.execute("SELECT 1 FROM users WHERE role = 'admin' LIMIT 1").fetchone()
+    if existing:
+        return
+    db.execute(
+        "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+        ("admin", hash_password(password), "admin"),
+    )
+    db.commit()
+    app.logger.info("Usuario administrador inicial 'admin' creado.")
+
+def init_db() -> None:
+    # Las migraciones son de la base principal; get_db() podria tener un snapshot como base "main".
+    db = open_connection(app.config["DATABASE"])
+    try:
+        applied = apply_migrations(db)
+    finally:
+        db.close()
+    if applied:
+        app.logger.info("Migraciones aplicadas: %s", ", ".join(str(version) for version in applied))
+    active = active_dataset_path(app.config["DATABASE"])
+    if active is not None:
+        snapshot = open_connection(active)
+        try:
+            applied = apply_migrations(snapshot, SNAPSHOT_MIGRATIONS)
+        finally:
+            snapshot.close()
+        if applied:
+            app.logger.info(
+                "Migraciones aplicadas al snapshot %s: %s",
+                Path(active).name,
+                ", ".join(str(version) for version in applied),
+            )
+    ensure_initial_admin()
+
+
+def create_snapshot_schema(db: sqlite3.Connection) -> None:
+    # Solo el dataset. Los indices y el cubo se arman al final (SNAPSHOT_FINISH_STEPS), no fila por fila.
+    create_typed_tables(db)
+    create_records_view(db)
+    create_search_table(db)
+    create_search_triggers(db, RECORDS_STORE)
+    create_data_version_table(db)
+    create_change_log_table(db)
+    record_schema_version(db)
+
+
+def create_snapshot_version_triggers(db: sqlite3.Connection) -> None:
+    create_data_version_triggers(db, RECORDS_STORE)
+    create_change_log_triggers(db)
+
+
+SNAPSHOT_FINISH_STEPS = (create_typed_indexes, create_summary_cube, create_snapshot_version_triggers)
+
+
+def new_snapshot_path(database: str) -> Path:
+    base = Path(database)
+    return base.with_name(f"{base.stem}-{datetime.now():%Y%m%d-%H%M%S-%f}.db")
+
+
+def list_snapshots(database: str) -> List[Path]:
+    # El nombre empieza con la fecha: ordenar por nombre es ordenar por antiguedad.
+    base = Path(database)
+    return sorted(base.parent.glob(f"{base.stem}-*.db"))
+
+
+def activate_snapshot(database: str, snapshot: Path) -> int:
+    control = sqlite3.connect(database, timeout=app.config["SQLITE_BUSY_TIMEOUT_MS"] / 1000)
+    try:
+        # El bloqueo de escritura de la base principal serializa las activaciones entre procesos.
+        control.execute("BEGIN IMMEDIATE")
+        active = sqlite3.connect(active_dataset_path(database) or database)
+        try:
+            active_version = current_data_version(active)
+            active_head = (change_log_bounds(active) or (0, 0))[1]
+        finally:
+            active.close()
+        target = configure_connection(sqlite3.connect(snapshot))
+        try:
+            # Un snapshot viejo (o restaurado) se pone al dia con el esquema antes de servirlo.
+            apply_migrations(target, SNAPSHOT_MIGRATIONS)
+            # data_version solo crece: las ETag y la cache de un snapshot nunca repiten las de otro.
+            target.execute("UPDATE data_version SET version = MAX(version, ?) + 1 WHERE id = 1", (active_version,))
+            # Lo mismo para la secuencia de cambios: nadie puede pedir deltas de otro snapshot.
+            reset_change_log(target, max(active_head, change_log_head(target)) + 1)
+            target.commit()
+            version = current_data_version(target)
+        finally:
+            target.close()
+        pointer = snapshot_pointer_path(database)
+        staged = pointer.with_name(f"{pointer.name}.tmp")
+        staged.write_text(snapshot.name, encoding="utf-8")
+        os.replace(staged, pointer)
+        control.rollback()
+    finally:
+        control.close()
+    prune_snapshots(database)
+    return version
+
+
+def prune_snapshots(database: str) -> List[Path]:
+    active = active_dataset_path(database)
+    inactive = [path for path in list_snapshots(database) if active is None or path.name != Path(active).name]
+    keep = app.config["SNAPSHOT_RETENTION"]
+    removed = inactive[: max(len(inactive) - keep, 0)]
+    for path in removed:
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{path}{suffix}").unlink(missing_ok=True)
+    return removed
+
+
+PASSWORD_HASH_ALGORITHM = "pbkdf2_sha256"
+LEGACY_PASSWORD_ITERATIONS = 200_000
+
+
+def pbkdf2_hex(password: str, salt: str, iterations: int) -> str:
+    # Corre en el hilo del request y no en un ProcessPoolExecutor: pbkdf2_hmac suelta el GIL mientras
+    # calcula, asi que los otros hilos del worker siguen atendiendo, y un pool de procesos por worker de
+    # gunicorn sumaria un fork y el pickle de cada llamada. HashingSlots limita cuantos hashes corren a la vez.
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt.encode("utf-8"), iterations).hex()
+
+
+def hash_password(password: str) -> str:
+    iterations = app.config["PASSWORD_HASH_ITERATIONS"]
+    salt = secrets.token_hex(16)
+    return f"{PASSWORD_HASH_ALGORITHM}${iterations}${salt}${pbkdf2_hex(password, salt, iterations)}"
+
+
+def parse_password_hash(stored: str) -> Optional[Tuple[int, str, str]]:
+    parts = (stored or "").split("$")
+    # Formato anterior: salt$hash, siempre con 200.000 iteraciones.
+    if len(parts) == 2:
+        return LEGACY_PASSWORD_ITERATIONS, parts[0], parts[1]
+    if len(parts) == 4 and parts[0] == PASSWORD_HASH_ALGORITHM and parts[1].isdigit():
+        return int(parts[1]), parts[2], parts[3]
+    return None
+
+
+def verify_password(stored: str, password: str) -> bool:
+    parsed = parse_password_hash(stored)
+    if parsed is None:
+        return False
+    iterations, salt, hashed_hex = parsed
+    return secrets.compare_digest(hashed_hex, pbkdf2_hex(password, salt, iterations))
+
+
+def password_needs_rehash(stored: str) -> bool:
+    parsed = parse_password_hash(stored)
+    return (
+        parsed is None
+        or not stored.startswith(f"{PASSWORD_HASH_ALGORITHM}$")
+        or parsed[0] != app.config["PASSWORD_HASH_ITERATIONS"]
+    )
+
+
+class HashingBusy(Exception):
+    pass
+
+
+class HashingSlots:
+    """Cupos de PBKDF2 compartidos por todos los workers de gunicorn: un archivo con flock por cupo."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats = {"acquired": 0, "rejected": 0}
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    @contextmanager
+    def hold(self, wait_seconds: float) -> Iterator[None]:
+        # Si todos los cupos estan tomados se rechaza rapido: un worker esperando un hash no atiende el dashboard.
+        directory = Path(app.config["DATABASE"]).parent / "locks"
+        directory.mkdir(exist_ok=True)
+        deadline = time.monotonic() + wait_seconds
+        while True:
+            for index in range(app.config["AUTH_HASH_SLOTS"]):
+                handle = open(directory / f"hash-{index}.lock", "a+b")
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    handle.close()
+                    continue
+                self._count("acquired")
+                try:
+                    yield
+                finally:
+                    fcntl.flock(handle, fcntl.LOCK_UN)
+                    handle.close()
+                return
+            if time.monotonic() >= deadline:
+                self._count("rejected")
+                raise HashingBusy()
+            time.sleep(0.02)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "slots": app.config["AUTH_HASH_SLOTS"]}
+
+
+hashing_slots = HashingSlots()
+
+
+class UserCache:
+    """Filas de users por worker; se vacia cuando cambia users_version, revisado cada AUTH_USER_CACHE_SECONDS."""
+
+    def __init__(self, size: int = 1024) -> None:
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, int], Optional[Dict[str, object]]]" = OrderedDict()
+        self._checked: Dict[str, Tuple[float, int]] = {}
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, db: sqlite3.Connection, database: str, user_id: int) -> Optional[Dict[str, object]]:
+        now = time.monotonic()
+        checked = self._checked.get(database)
+        if checked is None or now - checked[0] >= app.config["AUTH_USER_CACHE_SECONDS"]:
+            version = db.execute("SELECT version FROM users_version WHERE id = 1").fetchone()[0]
+            with self._lock:
+                if checked is not None and checked[1] != version:
+                    self._drop(database)
+                self._checked[database] = (now, version)
+        key = (database, user_id)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._entries[key]
+        row = db.execute("SELECT id, username, role FROM users WHERE id = ?", (user_id,)).fetchone()
+        user = dict(row) if row else None
+        with self._lock:
+            self._stats["misses"] += 1
+            self._entries[key] = user
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return user
+
+    def _drop(self, database: str) -> None:
+        for key in [key for key in self._entries if key[0] == database]:
+            del self._entries[key]
+        self._stats["invalidations"] += 1
+
+    def invalidate(self, database: str) -> None:
+        with self._lock:
+            self._drop(database)
+            self._checked.pop(database, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries)}
+
+
+user_cache = UserCache()
+
+
+def normalize_header(header: str) -> str:
+    if header is None:
+        return ""
+    return strip_accents(header).strip().lower().replace(" ", "_")
+
+
+# (formato strptime, etiqueta, orden de las partes, separador). El orden es la precedencia historica.
+DATE_FORMATS = [
+    ("%Y-%m-%d", "aaaa-mm-dd", "ymd", "-"),
+    ("%Y/%m/%d", "aaaa/mm/dd", "ymd", "/"),
+    ("%Y.%m.%d", "aaaa.mm.dd", "ymd", "."),
+    ("%d/%m/%Y", "dd/mm/aaaa", "dmy", "/"),
+    ("%d-%m-%Y", "dd-mm-aaaa", "dmy", "-"),
+    ("%m/%d/%Y", "mm/dd/aaaa", "mdy", "/"),
+    ("%m-%d-%Y", "mm-dd-aaaa", "mdy", "-"),
+]
+DATE_FIELDS = ("fecha_estado", "fecha_programada", "fecha_ejecucion")
+DATE_SAMPLE_ROWS = 500
+DATE_CACHE_SIZE = 4096
+
+
+def normalize_date(value: str) -> str:
+    if not value:
+        return ""
+    value = value.strip()
+    if not value:
+        return ""
+
+    candidates = [value]
+    for separator in (" ", "T"):
+        if separator in value:
+            head = value.split(separator, 1)[0].strip()
+            if head:
+                candidates.append(head)
+
+    for candidate in list(candidates):
+        if len(candidate) >= 10:
+            slice_ = candidate[:10]
+            if len(slice_) == 10 and slice_[4] in ("-", "/", ".") and slice_ not in candidates:
+                candidates.append(slice_)
+
+    unique_candidates = []
+    for candidate in candidates:
+        candidate = candidate.strip()
+        if candidate and candidate not in unique_candidates:
+            unique_candidates.append(candidate)
+
+    for candidate in unique_candidates:
+        try:
+            dt = datetime.fromisoformat(candidate)
+        except ValueError:
+            pass
+        else:
+            return dt.date().isoformat()
+
+    for candidate in unique_candidates:
+        for pattern, _label, _order, _separator in DATE_FORMATS:
+            try:
+                dt = datetime.strptime(candidate, pattern)
+            except ValueError:
+                continue
+            return dt.strftime("%Y-%m-%d")
+
+    return value
+
+
+def compile_date_format(order: str, separator: str) -> re.Pattern:
+    parts = {"y": r"(?P<y>\d{4})", "m": r"(?P<m>\d{1,2})", "d": r"(?P<d>\d{1,2})"}
+    body = re.escape(separator).join(parts[part] for part in order)
+    # Igual que normalize_date: se ignora la hora que venga despues de un espacio o una T.
+    return re.compile(rf"{body}(?:[ T].*)?")
+
+
+COMPILED_DATE_FORMATS = [
+    (pattern, label, order, compile_date_format(order, separator))
+    for pattern, label, order, separator in DATE_FORMATS
+]
+SWAPPED_DATE_FORMATS = {
+    pattern: other
+    for pattern, _label, order, separator in DATE_FORMATS
+    for other, _other_label, other_order, other_separator in DATE_FORMATS
+    if separator == other_separator and {order, other_order} == {"dmy", "mdy"}
+}
+
+
+def match_date_format(regex: re.Pattern, value: str) -> Optional[str]:
+    match = regex.fullmatch(value)
+    if match is None:
+        return None
+    try:
+        return date(int(match["y"]), int(match["m"]), int(match["d"])).isoformat()
+    except ValueError:
+        return None
+
+
+class DateColumnFormat:
+    """Formato dominante de una columna de fechas, inferido una vez a partir de una muestra."""
+
+    def __init__(self, field: str) -> None:
+        self.field = field
+        self.sampled = 0
+        self.matches: Dict[str, int] = {}
+        self.exclusive: Dict[str, int] = {}
+        self.pattern: Optional[str] = None
+        self.label: Optional[str] = None
+        self.regex: Optional[re.Pattern] = None
+        self.ambiguous = False
+        self.cache: Dict[str, str] = {}
+        self.fast = 0
+        self.cached = 0
+        self.fallback = 0
+
+    def observe(self, value: Optional[str]) -> None:
+        value = (value or "").strip()
+        if not value:
+            return
+        self.sampled += 1
+        matched = [
+            pattern for pattern, _label, _order, regex in COMPILED_DATE_FORMATS
+            if match_date_format(regex, value) is not None
+        ]
+        for pattern in matched:
+            self.matches[pattern] = self.matches.get(pattern, 0) + 1
+        if len(matched) == 1:
+            self.exclusive[matched[0]] = self.exclusive.get(matched[0], 0) + 1
+
+    def infer(self) -> None:
+        if not self.matches:
+            return
+        # max() conserva el primer formato ante empates, asi dd/mm sigue ganando como antes.
+        pattern = max((entry[0] for entry in COMPILED_DATE_FORMATS), key=lambda key: self.matches.get(key, 0))
+        swapped = SWAPPED_DATE_FORMATS.get(pattern)
+        if swapped and self.matches.get(swapped):
+            if self.exclusive.get(swapped):
+                # Hay fechas que solo valen como dd/mm y otras solo como mm/dd: se decide celda a celda.
+                self.ambiguous = True
+                return
+            # Ninguna fecha de la muestra tiene un dia mayor a 12 que desempate.
+            self.ambiguous = not self.exclusive.get(pattern)
+        for candidate, label, _order, regex in COMPILED_DATE_FORMATS:
+            if candidate == pattern:
+                self.pattern, self.label, self.regex = candidate, label, regex
+
+    def normalize(self, value: Optional[str]) -> str:
+        if not value:
+            return ""
+        value = value.strip()
+        cached = self.cache.get(value)
+        if cached is not None:
+            self.cached += 1
+            return cached
+        result = match_date_format(self.regex, value) if self.regex is not None else None
+        if result is None:
+            self.fallback += 1
+            result = normalize_date(value)
+        else:
+            self.fast += 1
+        # Las columnas de fechas tienen pocos valores distintos; al llenarse el cache solo deja de crecer.
+        if len(self.cache) < DATE_CACHE_SIZE:
+            self.cache[value] = result
+        return result
+
+    def report(self) -> Dict[str, object]:
+        return {
+            "format": self.pattern,
+            "label": self.label or ("mixto" if self.ambiguous else None),
+            "ambiguous": self.ambiguous,
+            "sampled": self.sampled,
+            "fast": self.fast,
+            "cached": self.cached,
+            "fallback": self.fallback,
+        }
+
+
+class DateNormalizer:
+    def __init__(self, fields: Iterable[str] = DATE_FIELDS, sample_rows: int = DATE_SAMPLE_ROWS) -> None:
+        self.columns = {field: DateColumnFormat(field) for field in fields}
+        self.sample_rows = sample_rows
+
+    def learn(self, sample: Iterable[Optional[Dict[str, str]]]) -> None:
+        for row in sample:
+            if row is not None:
+                for field, column in self.columns.items():
+                    if field in row:
+                        column.observe(row[field])
+        for column in self.columns.values():
+            column.infer()
+
+    def normalize_row(self, row: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+        if row is not None:
+            for field, column in self.columns.items():
+                if field in row:
+                    row[field] = column.normalize(row[field])
+        return row
+
+    def normalize_rows(self, rows: Iterable[Optional[Dict[str, str]]]) -> Iterator[Optional[Dict[str, str]]]:
+        # Las filas rechazadas (None) pasan tal cual para que quien llama pueda contarlas.
+        rows = iter(rows)
+        sample = list(islice(rows, self.sample_rows))
+        self.learn(sample)
+        yield from map(self.normalize_row, chain(sample, rows))
+
+    def report(self) -> Dict[str, Dict[str, object]]:
+        return {field: column.report() for field, column in self.columns.items()}
+
+
+def coerce_iso_date(value: str) -> str:
+    if not value:
+        return ""
+    normalized = normalize_date(value)
+    if normalized and ISO_DATE_PATTERN.match(normalized):
+        return normalized
+    return ""
+
+
+CSV_FIELD_MAP = {
+    "id": "record_id",
+    "record_id": "record_id",
+    "ubicacion": "ubicacion",
+    "nom_sede": "nom_sede",
+    "categoria_trab": "categoria_trab",
+    "categoria": "categoria_trab",
+    "nombre_completo": "nombre_completo",
+    "nombre": "nombre_completo",
+    "perfil_imagen": "perfil_imagen",
+    "perfil": "perfil_imagen",
+    "marca": "marca",
+    "modelo": "modelo",
+    "serial_num": "serial_num",
+    "serialnumber": "serial_num",
+    "hostname": "hostname",
+    "ip_equipo": "ip_equipo",
+    "email_trabajo": "email_trabajo",
+    "correo": "email_trabajo",
+    "fecha_estado": "fecha_estado",
+    "estado": "estado",
+    "estado_coordinacion": "estado_coordinacion",
+    "estado_coordinacin": "estado_coordinacion",
+    "estado_upgrade": "estado_upgrade",
+    "fecha_programada": "fecha_programada",
+    "fecha_programacion": "fecha_programada",
+    "fecha_ejecucion": "fecha_ejecucion",
+    "fecha_upgrade": "fecha_ejecucion",
+    "notas": "notas",
+}
+
+
+@app.before_request
+def start_background_workers():
+    ensure_import_worker()
+
+
+@app.before_request
+def load_logged_in_user():
+    user_id = session.get("user_id")
+    # Los archivos estaticos no usan al usuario; no hace falta ni la cache.
+    if user_id is None or request.endpoint == "static":
+        g.user = None
+    else:
+        g.user = user_cache.get(get_db(), app.config["DATABASE"], user_id)
+
+
+def login_required(view):
+    from functools import wraps
+
+    @wraps(view)
+    def wrapped_view(**kwargs):
+        if g.user is None:
+            flash("Inicia sesion para continuar", "warning")
+            return redirect(url_for("login"))
+        return view(**kwargs)
+
+    return wrapped_view
+
+
+def user_is_admin() -> bool:
+    return g.user is not None and g.user["role"] == "admin"
+
+
+def admin_required(view):
+    from functools import wraps
+
+    @wraps(view)
+    def wrapped_view(**kwargs):
+        if not user_is_admin():
+            flash("Requiere privilegios administrativos", "warning")
+            return redirect(url_for("dashboard"))
+        return view(**kwargs)
+
+    return wrapped_view
+
+
+PROFILE_HEADER = "X-Banbif-Profile"
+PROFILE_QUERY_ARG = "_profile"
+PROFILE_SUFFIXES = (".json", ".pstats", ".folded")
+PROFILE_TOP_FUNCTIONS = 25
+PROFILE_MAX_DEPTH = 96
+# Sentencias que vale la pena explicar; BEGIN, PRAGMA y las escrituras no tienen un plan util.
+PROFILE_EXPLAIN_PATTERN = re.compile(r"^\s*(SELECT|WITH)\b", re.I)
+# Los parametros de estas sentencias (usuarios buscados, hashes PBKDF2) no se escriben en el perfil.
+PROFILE_REDACTED_PATTERN = re.compile(r"\busers\b", re.I)
+
+
+class ProfiledConnection:
+    """Envuelve una conexion del pool durante un pedido perfilado y anota cada sentencia con su duracion."""
+
+    def __init__(self, db: sqlite3.Connection, statements: List[Dict[str, object]]) -> None:
+        self.raw = db
+        self._statements = statements
+
+    def __getattr__(self, name: str):
+        return getattr(self.raw, name)
+
+    def __enter__(self):
+        self.raw.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self.raw.__exit__(*exc_info)
+
+    def _run(self, method, sql: str, parameters, recorded) -> sqlite3.Cursor:
+        start = time.perf_counter()
+        try:
+            return method(sql, parameters)
+        finally:
+            # Como en las metricas, la duracion llega hasta la primera fila; el resto lo muestra cProfile.
+            self._statements.append({
+                "sql": sql,
+                "params": recorded,
+                "seconds": time.perf_counter() - start,
+                "db": self.raw,
+            })
+
+    def execute(self, sql: str, parameters=()) -> sqlite3.Cursor:
+        return self._run(self.raw.execute, sql, parameters, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters) -> sqlite3.Cursor:
+        return self._run(self.raw.executemany, sql, seq_of_parameters, None)
+
+
+def profiling_request() -> bool:
+    # Un pedido perfilado no usa las caches de respuesta ni de facetas: se mide el trabajo real.
+    return has_request_context() and "profile" in g
+
+
+@app.before_request
+def start_request_profile():
+    # Sin la marca el costo es una consulta al query string y otra a los encabezados.
+    if PROFILE_QUERY_ARG not in request.args and PROFILE_HEADER not in request.headers:
+        return
+    if not user_is_admin():
+        return
+    profiler = cProfile.Profile()
+    statements: List[Dict[str, object]] = []
+    g.db = ProfiledConnection(get_db(), statements)
+    g.read_db = ProfiledConnection(get_read_db(), statements)
+    g.profile = (profiler, statements, time.perf_counter())
+    try:
+        profiler.enable()
+    except ValueError:
+        # Otro perfilador activo en el proceso (Python 3.12+ admite uno solo a la vez).
+        finish_request_profile(None)
+
+
+def finish_request_profile(status: Optional[int]) -> Optional[str]:
+    profiler, statements, started = g.pop("profile")
+    profiler.disable()
+    seconds = time.perf_counter() - started
+    # close_db devuelve al pool la conexion real, no el envoltorio.
+    for name in ("db", "read_db"):
+        db = g.get(name)
+        if isinstance(db, ProfiledConnection):
+            setattr(g, name, db.raw)
+    if status is None:
+        return None
+    try:
+        return save_profile(profiler, statements, status, seconds)
+    except (OSError, sqlite3.Error):
+        app.logger.exception("No se pudo guardar el perfil de %s", request.path)
+        return None
+
+
+@app.after_request
+def save_request_profile(response):
+    # Se registra antes que compress_response, asi que el perfil incluye la compresion.
+    if "profile" in g:
+        name = finish_request_profile(response.status_code)
+        if name is not None:
+            response.headers[PROFILE_HEADER] = name
+    return response
+
+
+@app.teardown_request
+def save_failed_request_profile(exception=None):
+    if "profile" in g:
+        finish_request_profile(500 if exception is not None else None)
+
+
+def format_query_plan(rows: Iterable[sqlite3.Row]) -> List[str]:
+    # Misma sangria que el .eqp del shell de sqlite: cada paso debajo de su padre.
+    depth: Dict[int, int] = {0: -1}
+    lines = []
+    for node, parent, _unused, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append(f"{'  ' * depth[node]}{detail}")
+    return lines
+
+
+def explain_statements(statements: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    plans: Dict[str, List[str]] = {}
+    report = []
+    for statement in statements:
+        sql = statement["sql"]
+        if sql not in plans and PROFILE_EXPLAIN_PATTERN.match(sql):
+            try:
+                plans[sql] = format_query_plan(statement["db"].execute(f"EXPLAIN QUERY PLAN {sql}", statement["params"]))
+            except sqlite3.Error as error:
+                plans[sql] = [f"Sin plan: {error}"]
+        # EXPLAIN usa los parametros reales en memoria; el reporte en disco los omite si son sensibles.
+        redacted = bool(statement["params"]) and bool(PROFILE_REDACTED_PATTERN.search(sql))
+        report.append({
+            "sql": sql,
+            "params": None if redacted else statement["params"],
+            "redacted": redacted,
+            "seconds": round(statement["seconds"], 6),
+            "plan": plans.get(sql, []),
+        })
+    return report
+
+
+def profile_frame(func: Tuple[str, int, str]) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name
+    # Con la carpeta: flask/app.py y el app.py del proyecto no se confunden.
+    path = Path(filename)
+    return f"{path.parent.name}/{path.name}:{line}:{name}".replace(";", ":")
+
+
+def collapsed_stacks(stats: Dict[tuple, tuple]) -> List[str]:
+    # cProfile solo guarda pares llamador -> llamado: cada pila se reconstruye repartiendo el tiempo
+    # de una funcion entre sus llamadores segun lo que aporto cada uno. Es una aproximacion.
+    callees: Dict[tuple, List[Tuple[tuple, float]]] = {}
+    for func, (_cc, _nc, _tt, _ct, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    roots = [func for func, value in stats.items() if not value[4]]
+    # Las ramas de menos de una parte en 20000 del total no cambian el flamegraph y multiplican los caminos.
+    floor = max(1e-6, sum(stats[func][3] for func in roots) / 20_000)
+    totals: Dict[str, float] = {}
+
+    def walk(func: tuple, frames: Tuple[str, ...], on_stack: frozenset, seconds: float) -> None:
+        _cc, _nc, own, cumulative, _callers = stats[func]
+        share = seconds / cumulative if cumulative else 0.0
+        frames = (*frames, profile_frame(func))
+        stack = ";".join(frames)
+        totals[stack] = totals.get(stack, 0.0) + own * share
+        if len(frames) >= PROFILE_MAX_DEPTH:
+            return
+        for callee, edge_seconds in callees.get(func, ()):
+            if callee not in on_stack and edge_seconds * share >= floor:
+                walk(callee, frames, on_stack | {callee}, edge_seconds * share)
+
+    for root in roots:
+        walk(root, (), frozenset((root,)), stats[root][3])
+    # Microsegundos enteros: flamegraph.pl y speedscope esperan "pila cantidad" por linea.
+    return [f"{stack} {round(seconds * 1_000_000)}" for stack, seconds in totals.items() if seconds >= 1e-6]
+
+
+def top_functions(stats: Dict[tuple, tuple]) -> List[Dict[str, object]]:
+    ranked = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP_FUNCTIONS]
+    return [
+        {"function": profile_frame(func), "calls": nc, "own": round(tt, 6), "cumulative": round(ct, 6)}
+        for func, (_cc, nc, tt, ct, _callers) in ranked
+    ]
+
+
+def save_profile(profiler: cProfile.Profile, statements: List[Dict[str, object]], status: int, seconds: float) -> str:
+    directory = Path(app.config["PROFILES_DIR"])
+    directory.mkdir(parents=True, exist_ok=True)
+    # El nombre empieza con la fecha (ordenar por nombre es ordenar por antiguedad) y lleva el pid por los workers.
+    endpoint = (request.endpoint or "sin_ruta").replace(".", "-")
+    name = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{os.getpid()}-{endpoint}"
+    stats = pstats.Stats(profiler).stats
+    profiler.dump_stats(directory / f"{name}.pstats")
+    (directory / f"{name}.folded").write_text("\n".join(collapsed_stacks(stats)) + "\n", encoding="utf-8")
+    report = {
+        "name": name,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "method": request.method,
+        "path": request.path,
+        "query": request.query_string.decode("utf-8", "replace"),
+        "user": g.user["username"],
+        "status": status,
+        "seconds": round(seconds, 6),
+        "statements": explain_statements(statements),
+        "functions": top_functions(stats),
+    }
+    (directory / f"{name}.json").write_text(json.dumps(report, default=str, ensure_ascii=False), encoding="utf-8")
+    prune_profiles(directory)
+    return name
+
+
+def list_profiles(directory: Path) -> List[Path]:
+    return sorted(directory.glob("*.json"))
+
+
+def prune_profiles(directory: Path) -> List[Path]:
+    reports = list_profiles(directory)
+    removed = reports[: max(len(reports) - app.config["PROFILE_RETENTION"], 0)]
+    for path in removed:
+        for suffix in PROFILE_SUFFIXES:
+            path.with_suffix(suffix).unlink(missing_ok=True)
+    return removed
+
+
+def attempt_user_creation(
+    username: str,
+    password: str,
+    confirm: str,
+    role: str,
+) -> Tuple[bool, str]:
+    username = (username or "").strip()
+    role = (role or "standard").strip()
+    if not username:
+        return False, "El usuario es obligatorio"
+    if not password:
+        return False, "La contrasena es obligatoria"
+    if password != confirm:
+        return False, "Las contrasenas no coinciden"
+    if len(password) < 8:
+        return False, "La contrasena debe tener al menos 8 caracteres"
+    if role not in {"standard", "admin"}:
+        return False, "Rol invalido"
+
+    db = get_db()
+    try:
+        # Un administrador creando usuarios puede esperar mas que un login por un cupo de hashing.
+        with hashing_slots.hold(wait_seconds=10.0):
+            password_hash = hash_password(password)
+    except HashingBusy:
+        return False, "El servidor esta ocupado; intenta de nuevo en unos segundos"
+    try:
+        db.execute(
+            "INSERT INTO users (username, password_hash, role) VALUES (?, ?, ?)",
+            (username, password_hash, role),
+        )
+        db.commit()
+    except sqlite3.IntegrityError:
+        return False, "Este usuario ya existe"
+    user_cache.invalidate(app.config["DATABASE"])
+    return True, ""
+
+
+@app.context_processor
+def inject_globals():
+    return {"current_user": g.get("user")}
+
+
+@app.route("/register", methods=["GET", "POST"])
+def register():
+    abort(404)
+@app.route("/admin/usuarios/nuevo", methods=["GET", "POST"])
+@login_required
+@admin_required
+def admin_new_user():
+    selected_role = request.form.get("role", "standard")
+    if request.method == "POST":
+        success, error = attempt_user_creation(
+            username=request.form.get("username", ""),
+            password=request.form.get("password", ""),
+            confirm=request.form.get("confirm", ""),
+            role=selected_role,
+        )
+        if success:
+            flash("Usuario creado correctamente", "success")
+            return redirect(url_for("admin_new_user"))
+        flash(error, "danger")
+    return render_template(
+        "register.html",
+        admin_mode=True,
+        selected_role=selected_role,
+    )
+
+
+@app.route("/login", methods=["GET", "POST"])
+def login():
+    if g.user:
+        return redirect(url_for("dashboard"))
+    if request.method == "POST":
+        username = request.form.get("username", "").strip()
+        password = request.form.get("password", "")
+        error = "Credenciales invalidas"
+        db = get_db()
+        user = db.execute(
+            "SELECT id, password_hash FROM users WHERE username = ?",
+            (username,),
+        ).fetchone()
+        try:
+            valid = user is not None and check_login_password(db, user, password)
+        except HashingBusy:
+            flash("Hay muchos inicios de sesion en curso; intenta de nuevo en unos segundos", "warning")
+            response = app.make_response((render_template("login.html"), 503))
+            response.headers["Retry-After"] = "2"
+            return response
+        if valid:
+            session.clear()
+            session["user_id"] = user["id"]
+            flash("Bienvenido de nuevo", "success")
+            return redirect(url_for("dashboard"))
+        flash(error, "danger")
+    return render_template("login.html")
+
+
+def check_login_password(db: sqlite3.Connection, user: sqlite3.Row, password: str) -> bool:
+    with hashing_slots.hold(app.config["AUTH_HASH_WAIT_SECONDS"]):
+        if not verify_password(user["password_hash"], password):
+            return False
+        # Con la contrasena en claro se aprovecha para llevar el hash a los parametros actuales.
+        if password_needs_rehash(user["password_hash"]):
+            db.execute("UPDATE users SET password_hash = ? WHERE id = ?", (hash_password(password), user["id"]))
+            db.commit()
+            user_cache.invalidate(app.config["DATABASE"])
+    return True
+
+
+@app.route("/logout")
+@login_required
+def logout():
+    session.clear()
+    flash("Sesion finalizada", "info")
+    return redirect(url_for("login"))
+
+
+@app.route("/")
+def index():
+    if g.user:
+        return redirect(url_for("dashboard"))
+    return redirect(url_for("login"))
+
+
+@app.route("/dashboard")
+@login_required
+def dashboard():
+    return render_template("dashboard.html")
+
+
+FACET_FIELDS = ("ubicacion", "nom_sede", "categoria_trab", "estado")
+FACET_SCOPE_FIELDS = ("fecha_inicio", "fecha_fin", "nombre", "hostname")
+FACET_CACHE_SIZE = 64
+
+
+class LruCache:
+    """LRU por worker compartido entre los hilos de gthread; todo acceso pasa por el lock."""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, object]" = OrderedDict()
+
+    def get(self, key: tuple) -> Optional[object]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: tuple, value: object) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_facet_rows_cache = LruCache(FACET_CACHE_SIZE)
+
+
+def load_facet_rows(
+    db: sqlite3.Connection, filters: Dict[str, str], data_version: int
+) -> List[Tuple[str, str, str, str, int]]:
+    # Una sola agrupacion por (ubicacion, sede, categoria, estado) alcanza para todos los
+    # facetas; se memoiza por version de datos en cada worker.
+    cache_key = (data_version, *(filters.get(field) for field in FACET_SCOPE_FIELDS))
+    cached = None if profiling_request() else _facet_rows_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Se agrupa por ids y se decodifican solo las combinaciones resultantes.
+    ids = "ubicacion_id, nom_sede_id, categoria_trab_id, estado_id"
+    decoded = ", ".join(f"COALESCE({dictionary_value_sql(column)}, '')" for column in ids.split(", "))
+    conditions, params = build_conditions({field: filters.get(field) for field in FACET_SCOPE_FIELDS})
+    if filters.get("nombre") or filters.get("hostname"):
+        counts: Dict[Tuple[str, str, str, str], int] = {
+            tuple(row): 0
+            for row in db.execute(f"SELECT DISTINCT {decoded} FROM (SELECT DISTINCT {ids} FROM {SUMMARY_CUBE_TABLE})")
+        }
+        scoped = db.execute(
+            f"SELECT {decoded}, SUM(total) FROM ("
+            f"SELECT {ids}, COUNT(*) AS total FROM {RECORDS_STORE} "
+            f"WHERE {' AND '.join(conditions)} GROUP BY {ids}) GROUP BY 1, 2, 3, 4",
+            params,
+        )
+        for ubicacion, nom_sede, categoria_trab, estado, count in scoped:
+            counts[(ubicacion, nom_sede, categoria_trab, estado)] = count
+        rows = [(*key, count) for key, count in counts.items()]
+    else:
+        in_scope = " AND ".join(conditions) or "1"
+        rows = [
+            tuple(row)
+            for row in db.execute(
+                f"SELECT {decoded}, SUM(total) FROM ("
+                f"SELECT {ids}, SUM(CASE WHEN {in_scope} THEN total ELSE 0 END) AS total "
+                f"FROM {SUMMARY_CUBE_TABLE} GROUP BY {ids}) GROUP BY 1, 2, 3, 4",
+                params,
+            )
+        ]
+
+    _facet_rows_cache.put(cache_key, rows)
+    return rows
+
+
+def build_filters_payload(
+    filters: Dict[str, str],
+    db: Optional[sqlite3.Connection] = None,
+    data_version: Optional[int] = None,
+) -> Dict[str, Dict[str, object]]:
+    db = db or get_db()
+    if data_version is None:
+        data_version = current_data_version(db)
+    selected = {field: filters.get(field) or "" for field in FACET_FIELDS}
+    estado_selected = selected["estado"].upper()
+    options: Dict[str, set] = {field: set() for field in FACET_FIELDS[:3]}
+    counts: Dict[str, Dict[str, int]] = {field: {} for field in FACET_FIELDS}
+
+    for ubicacion, nom_sede, categoria_trab, estado, count in load_facet_rows(db, filters, data_version):
+        values = {"ubicacion": ubicacion, "nom_sede": nom_sede, "categoria_trab": categoria_trab}
+        for field, value in values.items():
+            if value:
+                options[field].add(value)
+        if not count:
+            continue
+        values["estado"] = estado.strip() or "SIN ESTADO"
+        matches = {field: not selected[field] or values[field] == selected[field] for field in FACET_FIELDS[:3]}
+        matches["estado"] = not estado_selected or estado == estado_selected
+        # Cada faceta cuenta bajo los demas filtros activos, no bajo el suyo.
+        for field in FACET_FIELDS:
+            if not values[field] or not all(ok for other, ok in matches.items() if other != field):
+                continue
+            counts[field][values[field]] = counts[field].get(values[field], 0) + count
+
+    payload: Dict[str, Dict[str, object]] = {}
+    for field in FACET_FIELDS[:3]:
+        payload[field] = {
+            "options": sorted(options[field]),
+            "counts": counts[field],
+            "selected": selected[field],
+        }
     payload["estado"] = {
         "options": STATUS_CHOICES,
-        "selected": filters.get("estado") or "",
+        "counts": counts["estado"],
+        "selected": selected["estado"],
     }
     return payload
 
 
-def status_bucket(value: str) -> str:
-    if not value:
-        return "Sin estado"
-    upper_value = value.strip().upper()
-    if upper_value in DONE_STATUS:
-        return "Completado"
-    if upper_value in IN_PROGRESS_STATUS:
-        return "En progreso"
-    if upper_value in PENDING_STATUS:
-        return "Pendiente"
-    return "Otro"
+def status_bucket(value: str) -> str:
+    if not value:
+        return "Sin estado"
+    upper_value = value.strip().upper()
+    if upper_value in DONE_STATUS:
+        return "Completado"
+    if upper_value in IN_PROGRESS_STATUS:
+        return "En progreso"
+    if upper_value in PENDING_STATUS:
+        return "Pendiente"
+    return "Otro"
+
+
+STAGING_TABLE = "temp.import_staging"
+
+def upsert_from_staging_sql() -> str:
+    typed = typed_record_columns()
+    names = ", ".join(name for name, _kind, _expression in typed)
+    values = ", ".join(expression for _name, _kind, expression in typed)
+    assignments = ",\n        ".join(f"{name}=excluded.{name}" for name, _kind, _expression in typed[1:])
+    return f"""
+    INSERT INTO {RECORDS_STORE} ({names})
+    SELECT {values}
+    FROM {STAGING_TABLE} WHERE true ORDER BY seq
+    ON CONFLICT(record_id) DO UPDATE SET
+        {assignments},
+        last_updated=CURRENT_TIMESTAMP
+"""
+
+
+UPSERT_FROM_STAGING_SQL = upsert_from_staging_sql()
+
+# Un CSV no distingue NULL de una celda vacia: una exportacion recargada tal cual no cuenta como cambio.
+STAGING_UNCHANGED_SQL = " AND ".join(
+    f"IFNULL(p.{column}, '') = IFNULL(s.{column}, '')" for column in PROJECT_COLUMNS[1:]
+)
+
+
+UPPERCASE_FIELDS = ("estado", "estado_coordinacion", "estado_upgrade")
+
+
+class CsvRowPlan:
+    """Mapeo de columnas del CSV a PROJECT_COLUMNS, resuelto una sola vez a partir del encabezado."""
+
+    def __init__(self, header: List[str]) -> None:
+        sources: Dict[str, List[str]] = {}
+        self.unknown: List[str] = []
+        # Igual que csv.DictReader: un nombre repetido conserva su primera posicion pero toma el valor
+        # de su ultima aparicion, y entre nombres que apuntan al mismo campo gana el que aparece despues.
+        last_index: Dict[str, int] = {}
+        for index, name in enumerate(header):
+            last_index[name] = index
+        winners: Dict[str, int] = {}
+        for name, index in last_index.items():
+            key = CSV_FIELD_MAP.get(normalize_header(name))
+            if key is not None:
+                winners[key] = index
+        for name in header:
+            key = CSV_FIELD_MAP.get(normalize_header(name))
+            if key is not None:
+                sources.setdefault(key, []).append(name)
+            elif name.strip():
+                self.unknown.append(name)
+        self.header = header
+        self.width = len(header)
+        self.duplicates = {key: names for key, names in sources.items() if len(names) > 1}
+        self.keys = list(winners)
+        self.indexes = list(winners.values())
+        self.upper_keys = [key for key in self.keys if key in UPPERCASE_FIELDS]
+        if len(self.indexes) == 1:
+            only = self.indexes[0]
+            self.getter = lambda row: (row[only],)
+        elif self.indexes:
+            self.getter = itemgetter(*self.indexes)
+        else:
+            self.getter = lambda row: ()
+
+    def map_row(self, row: List[str]) -> Optional[Dict[str, str]]:
+        # Las fechas quedan tal cual; las normaliza DateNormalizer con el formato inferido por columna.
+        if len(row) >= self.width:
+            values = [value.strip() for value in self.getter(row)]
+        else:
+            padded = row + [None] * (self.width - len(row))
+            values = [value.strip() if value is not None else None for value in self.getter(padded)]
+        mapped = dict(zip(self.keys, values))
+        if not mapped.get("record_id"):
+            return None
+        for key in self.upper_keys:
+            value = mapped[key]
+            if value:
+                mapped[key] = value.upper()
+        return mapped
+
+    def report(self) -> Dict[str, object]:
+        return {
+            "mapped": {self.header[index]: key for key, index in zip(self.keys, self.indexes)},
+            "unknown": self.unknown,
+            "duplicates": self.duplicates,
+            "missing_id": "record_id" not in self.keys,
+        }
+
+
+def read_csv_plan(lines: Iterable[str]) -> Tuple[CsvRowPlan, Iterator[Optional[Dict[str, str]]]]:
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    while header == []:
+        header = next(reader, None)
+    plan = CsvRowPlan(header or [])
+    # Las lineas vacias se saltan como lo hacia csv.DictReader; las filas sin id llegan como None.
+    return plan, (plan.map_row(row) for row in reader if row)
+
+
+def iter_batches(rows: Iterable[Dict[str, str]], size: int) -> Iterator[List[Dict[str, str]]]:
+    batch: List[Dict[str, str]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ensure_staging_table(db: sqlite3.Connection) -> None:
+    columns = ", ".join(f"{column} TEXT" for column in PROJECT_COLUMNS)
+    db.execute(f"CREATE TEMP TABLE IF NOT EXISTS import_staging (seq INTEGER PRIMARY KEY, {columns})")
+    db.execute(f"DELETE FROM {STAGING_TABLE}")
+
+
+def record_values(row: Dict[str, str]) -> List[Optional[str]]:
+    return [row.get(column) for column in PROJECT_COLUMNS]
+
+
+def write_record_batch(db: sqlite3.Connection, batch: List[Dict[str, str]]) -> Dict[str, int]:
+    return write_record_values(db, map(record_values, batch))
+
+
+def write_record_values(db: sqlite3.Connection, values: Iterable[List[Optional[str]]]) -> Dict[str, int]:
+    # Cada fila con los valores en el orden de PROJECT_COLUMNS.
+    db.execute(f"DELETE FROM {STAGING_TABLE}")
+    placeholders = ", ".join("?" for _ in PROJECT_COLUMNS)
+    db.executemany(f"INSERT INTO {STAGING_TABLE} ({', '.join(PROJECT_COLUMNS)}) VALUES ({placeholders})", values)
+    # Si un id se repite en el lote gana la ultima fila; las anteriores quedan sobrescritas.
+    superseded = db.execute(
+        f"DELETE FROM {STAGING_TABLE} WHERE seq NOT IN "
+        f"(SELECT MAX(seq) FROM {STAGING_TABLE} GROUP BY record_id)"
+    ).rowcount
+    inserted, updated, unchanged = db.execute(
+        f"""
+        SELECT
+            COALESCE(SUM(p.id IS NULL), 0),
+            COALESCE(SUM(p.id IS NOT NULL AND NOT ({STAGING_UNCHANGED_SQL})), 0),
+            COALESCE(SUM(p.id IS NOT NULL AND ({STAGING_UNCHANGED_SQL})), 0)
+        FROM {STAGING_TABLE} s LEFT JOIN project_records p ON p.record_id = s.record_id
+        """
+    ).fetchone()
+    if unchanged:
+        db.execute(
+            f"DELETE FROM {STAGING_TABLE} WHERE seq IN ("
+            f"SELECT s.seq FROM {STAGING_TABLE} s JOIN project_records p ON p.record_id = s.record_id "
+            f"WHERE {STAGING_UNCHANGED_SQL})"
+        )
+    register_dictionary_values(db, STAGING_TABLE)
+    db.execute(UPSERT_FROM_STAGING_SQL)
+    prune_change_log(db)
+    return {"inserted": inserted, "updated": updated + superseded, "unchanged": unchanged}
+
+
+def ingest_rows(db: sqlite3.Connection, rows: Iterable[Dict[str, str]], batch_size: int) -> Dict[str, object]:
+    start = time.perf_counter()
+    totals = {"inserted": 0, "updated": 0, "unchanged": 0}
+    try:
+        ensure_staging_table(db)
+        for batch in iter_batches(rows, batch_size):
+            for key, value in write_record_batch(db, batch).items():
+                totals[key] += value
+        db.execute(f"DELETE FROM {STAGING_TABLE}")
+    except Exception:
+        db.rollback()
+        raise
+    db.commit()
+    elapsed = time.perf_counter() - start
+    total = sum(totals.values())
+    return {
+        **totals,
+        "total": total,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(total / elapsed) if elapsed else total,
+    }
+
+
+def ingest_csv_stream(db: sqlite3.Connection, binary_stream, batch_size: int) -> Dict[str, object]:
+    # Decodifica y escribe por lotes: la memoria depende del tamano del lote, no del archivo.
+    text_stream = io.TextIOWrapper(binary_stream, encoding="utf-8-sig", newline="")
+    dates = DateNormalizer()
+    try:
+        plan, rows = read_csv_plan(text_stream)
+        mapped_rows = (row for row in dates.normalize_rows(rows) if row is not None)
+        summary = ingest_rows(db, mapped_rows, batch_size)
+        summary["headers"] = plan.report()
+        summary["date_formats"] = dates.report()
+        return summary
+    finally:
+        text_stream.detach()
+
+
+IMPORT_JOB_COUNTERS = ("rows_read", "rows_rejected", "inserted", "updated", "unchanged")
+
+IMPORT_SCHEMA_MAX_WAIT_SECONDS = 60.0
+
+_import_worker_lock = threading.Lock()
+_import_worker_pid: Optional[int] = None
+_import_wakeup = threading.Event()
+# Bases donde ya se vio import_jobs, y la espera actual de las que todavia no la tienen.
+_import_schema_ready: set = set()
+_import_schema_waits: Dict[str, float] = {}
+
+
+class ImportJobLost(Exception):
+    pass
+
+
+def queue_import_job(db: sqlite3.Connection, file, username: str, mode: str = "merge") -> int:
+    imports_dir = Path(app.config["IMPORTS_DIR"])
+    imports_dir.mkdir(parents=True, exist_ok=True)
+    path = imports_dir / f"{secrets.token_hex(8)}.csv"
+    file.save(path)
+    snapshot = str(new_snapshot_path(app.config["DATABASE"])) if mode == "snapshot" else None
+    cursor = db.execute(
+        "INSERT INTO import_jobs (filename, path, total_bytes, created_by, mode, snapshot) VALUES (?, ?, ?, ?, ?, ?)",
+        (file.filename, str(path), path.stat().st_size, username, mode, snapshot),
+    )
+    db.commit()
+    _import_wakeup.set()
+    return cursor.lastrowid
+
+
+def claim_import_job(db: sqlite3.Connection, worker: str) -> Optional[sqlite3.Row]:
+    stale_before = time.time() - app.config["IMPORT_STALE_SECONDS"]
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        # Un solo import a la vez; un job 'running' sin latido se considera abandonado.
+        busy = db.execute(
+            "SELECT 1 FROM import_jobs WHERE status = 'running' AND heartbeat_at >= ?",
+            (stale_before,),
+        ).fetchone()
+        job = None if busy else db.execute(
+            "SELECT id FROM import_jobs WHERE status = 'queued' "
+            "OR (status = 'running' AND heartbeat_at < ?) ORDER BY id LIMIT 1",
+            (stale_before,),
+        ).fetchone()
+        if job is None:
+            db.rollback()
+            return None
+        db.execute(
+            """
+            UPDATE import_jobs SET
+                status = 'running',
+                worker = ?,
+                heartbeat_at = ?,
+                run_started_at = ?,
+                run_rows_start = rows_read,
+                run_bytes_start = bytes_processed,
+                started_at = COALESCE(started_at, CURRENT_TIMESTAMP)
+            WHERE id = ?
+            """,
+            (worker, time.time(), time.time(), job["id"]),
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return db.execute("SELECT * FROM import_jobs WHERE id = ?", (job["id"],)).fetchone()
+
+
+def commit_import_batch(
+    db: sqlite3.Connection,
+    job_id: int,
+    worker: str,
+    batch: List[Dict[str, str]],
+    progress: Dict[str, int],
+    bytes_processed: int,
+) -> None:
+    if batch:
+        for key, value in write_record_batch(db, batch).items():
+            progress[key] += value
+    # El avance se guarda en la misma transaccion que los datos: al reanudar no se repiten filas.
+    assignments = ", ".join(f"{key} = ?" for key in IMPORT_JOB_COUNTERS)
+    cursor = db.execute(
+        f"UPDATE import_jobs SET {assignments}, bytes_processed = ?, heartbeat_at = ? "
+        "WHERE id = ? AND worker = ? AND status = 'running'",
+        (*(progress[key] for key in IMPORT_JOB_COUNTERS), bytes_processed, time.time(), job_id, worker),
+    )
+    if cursor.rowcount != 1:
+        db.rollback()
+        raise ImportJobLost(job_id)
+    db.commit()
+
+
+def process_import_job(db: sqlite3.Connection, job: sqlite3.Row, worker: str) -> Dict[str, Dict[str, object]]:
+    progress = {key: job[key] for key in IMPORT_JOB_COUNTERS}
+    already_read = job["rows_read"]
+    batch_size = app.config["INGEST_BATCH_SIZE"]
+    ensure_staging_table(db)
+    with open(job["path"], "rb") as handle:
+        text_stream = io.TextIOWrapper(handle, encoding="utf-8-sig", newline="")
+        batch: List[Dict[str, str]] = []
+        rows_read = 0
+        plan, rows = read_csv_plan(text_stream)
+        cursor = db.execute(
+            "UPDATE import_jobs SET headers = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            (json.dumps(plan.report()), job["id"], worker),
+        )
+        if cursor.rowcount != 1:
+            db.rollback()
+            raise ImportJobLost(job["id"])
+        db.commit()
+        # La muestra para inferir formatos de fecha siempre sale del inicio del archivo, tambien al reanudar.
+        dates = DateNormalizer()
+        for mapped in dates.normalize_rows(rows):
+            rows_read += 1
+            if rows_read <= already_read:
+                continue
+            progress["rows_read"] = rows_read
+            if mapped is None:
+                progress["rows_rejected"] += 1
+            else:
+                batch.append(mapped)
+            if len(batch) >= batch_size:
+                commit_import_batch(db, job["id"], worker, batch, progress, handle.tell())
+                batch = []
+        commit_import_batch(db, job["id"], worker, batch, progress, handle.tell())
+        text_stream.detach()
+    return dates.report()
+
+
+def touch_import_job(db: sqlite3.Connection, job_id: int, worker: str) -> None:
+    cursor = db.execute(
+        "UPDATE import_jobs SET heartbeat_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+        (time.time(), job_id, worker),
+    )
+    if cursor.rowcount != 1:
+        db.rollback()
+        raise ImportJobLost(job_id)
+
+
+def snapshot_building_path(snapshot: Path) -> Path:
+    return snapshot.with_name(f"{snapshot.name}.tmp")
+
+
+def build_snapshot(job: sqlite3.Row, worker: str) -> Dict[str, Dict[str, object]]:
+    database = app.config["DATABASE"]
+    snapshot = Path(job["snapshot"])
+    building = snapshot_building_path(snapshot)
+    if job["rows_read"] and not building.exists():
+        raise FileNotFoundError(f"No existe el snapshot en construccion {building.name}")
+    build_db = open_connection(database, dataset=str(building))
+    try:
+        create_snapshot_schema(build_db)
+        build_db.commit()
+        date_formats = process_import_job(build_db, job, worker)
+        # Cada paso confirma por separado y renueva el latido para que otro worker no retome el job.
+        for step in SNAPSHOT_FINISH_STEPS:
+            step(build_db)
+            touch_import_job(build_db, job["id"], worker)
+            build_db.commit()
+    finally:
+        build_db.close()
+    os.replace(building, snapshot)
+    activate_snapshot(database, snapshot)
+    return date_formats
+
+
+def discard_snapshot_build(snapshot: Path) -> None:
+    building = snapshot_building_path(snapshot)
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{building}{suffix}").unlink(missing_ok=True)
+
+
+def run_import_job(db: sqlite3.Connection, job: sqlite3.Row, worker: str) -> None:
+    try:
+        if job["mode"] != "snapshot":
+            date_formats = process_import_job(db, job, worker)
+        elif Path(job["snapshot"]).exists():
+            # El snapshot ya se publico pero el proceso anterior no llego a marcar el job como terminado.
+            date_formats = json.loads(job["date_formats"] or "{}")
+        else:
+            date_formats = build_snapshot(job, worker)
+    except ImportJobLost:
+        app.logger.warning("El import %s fue tomado por otro proceso", job["id"])
+        return
+    except (UnicodeDecodeError, csv.Error, OSError, sqlite3.DatabaseError) as exc:
+        db.rollback()
+        if isinstance(exc, UnicodeDecodeError):
+            message = "No se pudo decodificar el archivo. Usa UTF-8."
+        else:
+            message = f"Error procesando el archivo: {exc}"
+        db.execute(
+            "UPDATE import_jobs SET status = 'failed', error = ?, finished_at = CURRENT_TIMESTAMP "
+            "WHERE id = ? AND worker = ?",
+            (message, job["id"], worker),
+        )
+        db.commit()
+        if job["mode"] == "snapshot":
+            discard_snapshot_build(Path(job["snapshot"]))
+        app.logger.warning("Fallo el import %s: %s", job["id"], exc)
+        record_import_metrics(db, job, "failed")
+        return
+    db.execute(
+        "UPDATE import_jobs SET status = 'done', bytes_processed = total_bytes, date_formats = ?, "
+        "finished_at = CURRENT_TIMESTAMP WHERE id = ? AND worker = ?",
+        (json.dumps(date_formats), job["id"], worker),
+    )
+    db.commit()
+    Path(job["path"]).unlink(missing_ok=True)
+    record_import_metrics(db, job, "done")
+
+
+def record_import_metrics(db: sqlite3.Connection, job: sqlite3.Row, status: str) -> None:
+    # Solo cuenta lo procesado en esta corrida: un job retomado ya tenia avance al reclamarlo.
+    if not app.config["METRICS_ENABLED"]:
+        return
+    final = db.execute("SELECT * FROM import_jobs WHERE id = ?", (job["id"],)).fetchone()
+    mode = metric_labels(mode=job["mode"])
+    seconds = max(time.time() - job["run_started_at"], 0.0)
+    rows = final["rows_read"] - job["rows_read"]
+    metrics.inc("banbif_import_jobs_total", metric_labels(mode=job["mode"], status=status))
+    for column in IMPORT_JOB_COUNTERS[1:]:
+        labels = metric_labels(mode=job["mode"], outcome=column.removeprefix("rows_"))
+        metrics.inc("banbif_import_rows_total", labels, final[column] - job[column])
+    metrics.inc("banbif_import_bytes_total", mode, final["bytes_processed"] - job["bytes_processed"])
+    metrics.inc("banbif_import_seconds_total", mode, seconds)
+    if status == "done" and seconds:
+        metrics.set_gauge("banbif_import_rows_per_second", mode, round(rows / seconds, 1))
+    # El worker de imports no atiende peticiones; se guarda ya en lugar de esperar al proximo flush.
+    metrics.flush()
+
+
+def import_worker_pass(worker: str) -> float:
+    # Una vuelta del worker; devuelve cuanto esperar antes de la siguiente (0 si acaba de procesar un job).
+    database = app.config["DATABASE"]
+    with app.app_context():
+        db = get_db()
+        if database not in _import_schema_ready:
+            if not table_columns(db, "import_jobs"):
+                # Sin init-db todavia: se avisa una vez y se espera cada vez mas, sin un traceback por vuelta.
+                wait = _import_schema_waits.get(database)
+                if wait is None:
+                    app.logger.warning(
+                        "La base %s no tiene import_jobs; el worker espera a que se ejecute init-db", database
+                    )
+                    wait = app.config["IMPORT_POLL_SECONDS"]
+                else:
+                    wait = min(wait * 2, IMPORT_SCHEMA_MAX_WAIT_SECONDS)
+                _import_schema_waits[database] = wait
+                return wait
+            _import_schema_ready.add(database)
+            _import_schema_waits.pop(database, None)
+        job = claim_import_job(db, worker)
+        if job is None:
+            return app.config["IMPORT_POLL_SECONDS"]
+        run_import_job(db, job, worker)
+        return 0.0
+
+
+def import_worker_loop() -> None:
+    worker = f"{socket.gethostname()}:{os.getpid()}"
+    while True:
+        try:
+            wait = import_worker_pass(worker)
+        except Exception:
+            app.logger.exception("Error en el worker de imports")
+            wait = app.config["IMPORT_POLL_SECONDS"]
+        if wait:
+            _import_wakeup.wait(wait)
+            _import_wakeup.clear()
+
+
+def ensure_import_worker() -> None:
+    global _import_worker_pid
+    # Cada proceso de gunicorn arranca su propio hilo despues del fork.
+    if not app.config["IMPORT_WORKER_ENABLED"] or _import_worker_pid == os.getpid():
+        return
+    with _import_worker_lock:
+        if _import_worker_pid == os.getpid():
+            return
+        threading.Thread(target=import_worker_loop, name="import-worker", daemon=True).start()
+        _import_worker_pid = os.getpid()
+
+
+def serialize_import_job(job: sqlite3.Row) -> Dict[str, object]:
+    rows_per_second = 0.0
+    eta_seconds = None
+    if job["status"] == "running" and job["run_started_at"]:
+        elapsed = max(time.time() - job["run_started_at"], 1e-6)
+        rows_per_second = (job["rows_read"] - job["run_rows_start"]) / elapsed
+        bytes_per_second = (job["bytes_processed"] - job["run_bytes_start"]) / elapsed
+        if bytes_per_second:
+            eta_seconds = round(max(job["total_bytes"] - job["bytes_processed"], 0) / bytes_per_second, 1)
+    total_bytes = job["total_bytes"] or 0
+    return {
+        "id": job["id"],
+        "filename": job["filename"],
+        "status": job["status"],
+        "mode": job["mode"],
+        "snapshot": Path(job["snapshot"]).name if job["snapshot"] else None,
+        "rows_processed": job["rows_read"],
+        "rows_rejected": job["rows_rejected"],
+        "inserted": job["inserted"],
+        "updated": job["updated"],
+        "unchanged": job["unchanged"],
+        "bytes_processed": job["bytes_processed"],
+        "total_bytes": total_bytes,
+        "progress": round(job["bytes_processed"] / total_bytes, 4) if total_bytes else 1.0,
+        "rows_per_second": round(rows_per_second, 1),
+        "eta_seconds": eta_seconds,
+        "error": job["error"],
+        "date_formats": json.loads(job["date_formats"]) if job["date_formats"] else {},
+        "headers": json.loads(job["headers"]) if job["headers"] else None,
+        "created_at": job["created_at"],
+        "finished_at": job["finished_at"],
+    }
+
+
+@app.route("/upload", methods=["GET", "POST"])
+@login_required
+@admin_required
+def upload():
+    if request.method == "POST":
+        file = request.files.get("file")
+        if not file or not file.filename:
+            flash("Selecciona un archivo CSV", "danger")
+            return render_template("upload.html", job=None)
+        if not file.filename.lower().endswith(".csv"):
+            flash("El archivo debe tener formato .csv", "danger")
+            return render_template("upload.html", job=None)
+
+        mode = "snapshot" if request.form.get("mode") == "snapshot" else "merge"
+        job_id = queue_import_job(get_db(), file, g.user["username"], mode)
+        flash("Carga recibida; se procesa en segundo plano", "info")
+        return redirect(url_for("upload", job=job_id))
+
+    job = None
+    job_id = request.args.get("job", type=int)
+    if job_id:
+        row = get_db().execute("SELECT * FROM import_jobs WHERE id = ?", (job_id,)).fetchone()
+        job = serialize_import_job(row) if row else None
+    return render_template("upload.html", job=job)
+
+
+@app.route("/api/imports/<int:job_id>")
+@login_required
+@admin_required
+def api_import_status(job_id: int):
+    row = get_db().execute("SELECT * FROM import_jobs WHERE id = ?", (job_id,)).fetchone()
+    if row is None:
+        return jsonify({"error": "Carga no encontrada"}), 404
+    return jsonify(serialize_import_job(row))
+
+
+SUMMARY_RECORD_FIELDS = [
+    "record_id",
+    "nombre_completo",
+    "ubicacion",
+    "nom_sede",
+    "hostname",
+    "categoria_trab",
+    "estado",
+    "estado_coordinacion",
+    "estado_upgrade",
+    "fecha_programada",
+    "fecha_ejecucion",
+    "fecha_estado",
+    "marca",
+    "modelo",
+    "notas",
+    "last_updated",
+]
+
+RECENT_UPDATES_LIMIT = 10
+
+# Los estados se guardan en mayusculas al escribir; aqui solo se resuelve el id del diccionario.
+ESTADO_KEY_SQL = f"COALESCE(NULLIF(TRIM({dictionary_value_sql('estado_id')}), ''), 'SIN ESTADO')"
+
+
+def sql_string_list(values) -> str:
+    return ", ".join("'" + value.replace("'", "''") + "'" for value in sorted(values))
+
+
+STATUS_BUCKET_SQL = (
+    "CASE"
+    f" WHEN {{key}} IN ({sql_string_list(DONE_STATUS)}) THEN 'Completado'"
+    f" WHEN {{key}} IN ({sql_string_list(IN_PROGRESS_STATUS)}) THEN 'En progreso'"
+    f" WHEN {{key}} IN ({sql_string_list(PENDING_STATUS)}) THEN 'Pendiente'"
+    " ELSE 'Otro' END"
+)
+
+
+def parse_summary_filters(args) -> Dict[str, str]:
+    return {
+        "ubicacion": args.get("ubicacion", "").strip() or None,
+        "nom_sede": args.get("nom_sede", "").strip() or None,
+        "categoria_trab": args.get("categoria_trab", "").strip() or None,
+        "estado": args.get("estado", "").strip() or None,
+        "fecha_inicio": coerce_iso_date(args.get("fecha_inicio", "").strip()) or None,
+        "fecha_fin": coerce_iso_date(args.get("fecha_fin", "").strip()) or None,
+        "nombre": args.get("nombre", "").strip() or None,
+        "hostname": args.get("hostname", "").strip() or None,
+    }
+
+
+def build_conditions(filters: Dict[str, str]) -> Tuple[List[str], List[object]]:
+    conditions = []
+    params: List[object] = []
+    # Las columnas tipadas existen igual en RECORDS_STORE, en el cubo y en la vista project_records.
+    for key in ("ubicacion", "nom_sede", "categoria_trab", "estado"):
+        value = filters.get(key)
+        if value:
+            conditions.append(f"{key}_id = (SELECT id FROM {DICTIONARY_TABLE} WHERE domain = ? AND value = ?)")
+            params.extend([DICTIONARY_COLUMNS[key], value.upper() if key == "estado" else value])
+    if filters.get("fecha_inicio"):
+        conditions.append("fecha_estado_dia >= ?")
+        params.append(date.fromisoformat(filters["fecha_inicio"]).toordinal())
+    if filters.get("fecha_fin"):
+        conditions.append("fecha_estado_dia <= ? AND fecha_estado_dia > 0")
+        params.append(date.fromisoformat(filters["fecha_fin"]).toordinal())
+    for key, column in (("nombre", "nombre_completo"), ("hostname", "hostname")):
+        if filters.get(key):
+            conditions.append(
+                f"id IN (SELECT rowid FROM project_records_search WHERE {column} LIKE ?)"
+            )
+            params.append(f"%{fold_search_text(filters[key])}%")
+    return conditions, params
+
+
+def build_where_clause(filters: Dict[str, str]) -> Tuple[str, List[object]]:
+    conditions, params = build_conditions(filters)
+    if not conditions:
+        return "", params
+    return " WHERE " + " AND ".join(conditions), params
+
+
+def serialize_record(row: sqlite3.Row) -> Dict[str, str]:
+    record = {field: row[field] for field in SUMMARY_RECORD_FIELDS}
+    record["estado"] = (row["estado"] or "").strip().upper() or "SIN ESTADO"
+    return record
+
+
+RECORD_FORMATS = ("rows", "columnar")
+COLUMNAR_DICTIONARY_FIELDS = tuple(field for field in SUMMARY_RECORD_FIELDS if field in DICTIONARY_COLUMNS)
+
+
+def parse_record_format(args) -> Optional[str]:
+    value = args.get("format", "").strip() or "rows"
+    return value if value in RECORD_FORMATS else None
+
+
+def encode_records(records: List[Dict[str, str]], record_format: str) -> object:
+    # Columnar: cada nombre de columna va una vez y los textos repetidos se envian como indices.
+    if record_format != "columnar":
+        return records
+    dictionaries: Dict[str, Dict[Optional[str], int]] = {field: {} for field in COLUMNAR_DICTIONARY_FIELDS}
+    data = []
+    for field in SUMMARY_RECORD_FIELDS:
+        values = [record[field] for record in records]
+        codes = dictionaries.get(field)
+        if codes is not None:
+            values = [codes.setdefault(value, len(codes)) for value in values]
+        data.append(values)
+    return {
+        "format": "columnar",
+        "length": len(records),
+        "columns": SUMMARY_RECORD_FIELDS,
+        "data": data,
+        "dictionaries": {field: list(codes) for field, codes in dictionaries.items()},
+    }
+
+
+def summary_source(filters: Dict[str, str]) -> Tuple[str, str]:
+    # El cubo no guarda nombre ni hostname; esas busquedas se agregan sobre la tabla base.
+    if filters.get("nombre") or filters.get("hostname"):
+        return RECORDS_STORE, "COUNT(*)"
+    return SUMMARY_CUBE_TABLE, "SUM(total)"
+
+
+def compute_status_counts(
+    db: sqlite3.Connection,
+    where: str,
+    params: List[object],
+    source: Tuple[str, str] = (RECORDS_STORE, "COUNT(*)"),
+) -> Tuple[int, Dict[str, int], Dict[str, int]]:
+    table, count_sql = source
+    bucket_sql = STATUS_BUCKET_SQL.format(key="estado_key")
+    # Se agrupa por id y se decodifica despues; varios ids pueden compartir clave ('' y NULL).
+    rows = db.execute(
+        f"SELECT estado_key, {bucket_sql} AS bucket, SUM(total) FROM ("
+        f"SELECT {ESTADO_KEY_SQL} AS estado_key, {count_sql} AS total "
+        f"FROM {table}{where} GROUP BY estado_id) GROUP BY estado_key",
+        params,
+    ).fetchall()
+    total = 0
+    status_counts: Dict[str, int] = {}
+    bucket_counts: Dict[str, int] = {}
+    for estado_key, bucket, count in rows:
+        total += count
+        status_counts[estado_key] = count
+        bucket_counts[bucket] = bucket_counts.get(bucket, 0) + count
+    return total, status_counts, bucket_counts
+
+
+TIMELINE_GRANULARITIES = ("auto", "day", "week", "month")
+# Rango maximo (en dias) que "auto" muestra por dia y por semana; mas alla agrupa por mes.
+TIMELINE_AUTO_DAY_SPAN = 62
+TIMELINE_AUTO_WEEK_SPAN = 546
+TIMELINE_MAX_BRANDS = 20
+TIMELINE_OTHER_BRANDS = "Otros"
+# El dia 1 es lunes, asi que la semana empieza en el dia que deja (dia - 1) % 7 en cero.
+TIMELINE_BUCKET_SQL = {
+    "day": f"date(dia + {DAY_NUMBER_OFFSET})",
+    "week": f"date(dia - (dia - 1) % 7 + {DAY_NUMBER_OFFSET})",
+    "month": f"date(dia + {DAY_NUMBER_OFFSET}, 'start of month')",
+}
 
 
-@app.route("/upload", methods=["GET", "POST"])
-@login_required
-@admin_required
-def upload():
-    summary = None
-    if request.method == "POST":
-        file = request.files.get("file")
-        if not file or not file.filename:
-            flash("Selecciona un archivo CSV", "danger")
-            return render_template("upload.html", summary=summary)
-        if not file.filename.lower().endswith(".csv"):
-            flash("El archivo debe tener formato .csv", "danger")
-            return render_template("upload.html", summary=summary)
+def parse_timeline_options(args) -> Optional[Tuple[str, int]]:
+    granularity = args.get("granularity", "").strip() or "auto"
+    if granularity not in TIMELINE_GRANULARITIES:
+        return None
+    top_brands = args.get("top_brands", type=int) or 0
+    return granularity, max(0, min(top_brands, TIMELINE_MAX_BRANDS))
 
-        try:
-            stream = io.StringIO(file.stream.read().decode("utf-8-sig"))
-        except UnicodeDecodeError:
-            flash("No se pudo decodificar el archivo. Usa UTF-8.", "danger")
-            return render_template("upload.html", summary=summary)
-
-        reader = csv.DictReader(stream)
-        mapped_rows: List[Dict[str, str]] = []
-        for raw_row in reader:
-            normalized_row: Dict[str, str] = {}
-            for header, value in raw_row.items():
-                key = CSV_FIELD_MAP.get(normalize_header(header))
-                if not key:
-                    continue
-                if isinstance(value, str):
-                    value = value.strip()
-                normalized_row[key] = value
-            if not normalized_row.get("record_id"):
-                continue
-            for field in ("estado", "estado_coordinacion", "estado_upgrade"):
-                if field in normalized_row and isinstance(normalized_row[field], str):
-                    normalized_row[field] = normalized_row[field].upper()
-            for field in ("fecha_estado", "fecha_programada", "fecha_ejecucion"):
-                if field in normalized_row:
-                    normalized_row[field] = normalize_date(normalized_row[field])
-            mapped_rows.append(normalized_row)
-
-        if not mapped_rows:
-            flash("No se encontraron registros validos en el CSV.", "warning")
-            return render_template("upload.html", summary=summary)
 
-        db = get_db()
-        inserted = 0
-        updated = 0
-        for row in mapped_rows:
-            params = [row.get(column) for column in PROJECT_COLUMNS]
-            cursor = db.execute(
-                """
-                INSERT INTO project_records (
-                    record_id, ubicacion, nom_sede, categoria_trab, nombre_completo,
-                    perfil_imagen, marca, modelo, serial_num, hostname, ip_equipo,
-                    email_trabajo, fecha_estado, estado, estado_coordinacion,
-                    estado_upgrade, fecha_programada, fecha_ejecucion, notas
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(record_id) DO UPDATE SET
-                    ubicacion=excluded.ubicacion,
-                    nom_sede=excluded.nom_sede,
-                    categoria_trab=excluded.categoria_trab,
-                    nombre_completo=excluded.nombre_completo,
-                    perfil_imagen=excluded.perfil_imagen,
-                    marca=excluded.marca,
-                    modelo=excluded.modelo,
-                    serial_num=excluded.serial_num,
-                    hostname=excluded.hostname,
-                    ip_equipo=excluded.ip_equipo,
-                    email_trabajo=excluded.email_trabajo,
-                    fecha_estado=excluded.fecha_estado,
-                    estado=excluded.estado,
-                    estado_coordinacion=excluded.estado_coordinacion,
-                    estado_upgrade=excluded.estado_upgrade,
-                    fecha_programada=excluded.fecha_programada,
-                    fecha_ejecucion=excluded.fecha_ejecucion,
-                    notas=excluded.notas,
-                    last_updated=CURRENT_TIMESTAMP
-                """,
-                params,
-            )
-            if cursor.rowcount == 1:
-                inserted += 1
-            else:
-                updated += 1
-        db.commit()
-        summary = {"inserted": inserted, "updated": updated, "total": inserted + updated}
-        flash("Carga procesada correctamente", "success")
-    return render_template("upload.html", summary=summary)
+def resolve_granularity(
+    db: sqlite3.Connection, table: str, where: str, params: List[object], granularity: str
+) -> str:
+    if granularity != "auto":
+        return granularity
+    first, last = db.execute(
+        f"SELECT MIN(fecha_estado_dia), MAX(fecha_estado_dia) FROM {table}{where}", params
+    ).fetchone()
+    span = (last - first) if first is not None else 0
+    if span <= TIMELINE_AUTO_DAY_SPAN:
+        return "day"
+    if span <= TIMELINE_AUTO_WEEK_SPAN:
+        return "week"
+    return "month"
 
 
-@app.route("/api/summary")
-@login_required
-def api_summary():
-    db = get_db()
-    filters = {
-        "ubicacion": request.args.get("ubicacion", "").strip() or None,
-        "nom_sede": request.args.get("nom_sede", "").strip() or None,
-        "categoria_trab": request.args.get("categoria_trab", "").strip() or None,
-        "estado": request.args.get("estado", "").strip() or None,
+def compute_timeline(
+    db: sqlite3.Connection,
+    where: str,
+    params: List[object],
+    source: Tuple[str, str] = (RECORDS_STORE, "COUNT(*)"),
+    granularity: str = "auto",
+    top_brands: int = 0,
+) -> Dict[str, object]:
+    # Se agrupa en SQL por periodo y marca; el tamano depende de la cantidad de periodos, no del rango.
+    table, count_sql = source
+    dated_where = f"{where} AND fecha_estado_dia > 0" if where else " WHERE fecha_estado_dia > 0"
+    granularity = resolve_granularity(db, table, dated_where, params, granularity)
+    date_condition = "(fecha_estado_dia > 0 OR fecha_estado_texto <> '')"
+    where = f"{where} AND {date_condition}" if where else f" WHERE {date_condition}"
+    rows = db.execute(
+        f"SELECT CASE WHEN dia > 0 THEN {TIMELINE_BUCKET_SQL[granularity]} ELSE texto END AS bucket, "
+        f"MAX(dia > 0) AS dated, {dictionary_value_sql('marca_id')}, SUM(total) FROM ("
+        f"SELECT fecha_estado_dia AS dia, fecha_estado_texto AS texto, marca_id, {count_sql} AS total "
+        f"FROM {table}{where} GROUP BY fecha_estado_dia, fecha_estado_texto, marca_id) "
+        "GROUP BY bucket, marca_id ORDER BY dated DESC, bucket",
+        params,
+    ).fetchall()
+    positions: Dict[str, int] = {}
+    totals: List[int] = []
+    cells: Dict[str, Dict[int, int]] = {}
+    for bucket, _dated, marca, count in rows:
+        index = positions.get(bucket)
+        if index is None:
+            index = positions[bucket] = len(totals)
+            totals.append(0)
+        totals[index] += count
+        if marca:
+            brand = cells.setdefault(marca, {})
+            brand[index] = brand.get(index, 0) + count
+    brands = sorted(cells, key=lambda name: (-sum(cells[name].values()), name))
+    folded = bool(top_brands) and len(brands) > top_brands
+    if folded:
+        other: Dict[int, int] = {}
+        for name in brands[top_brands:]:
+            for index, count in cells.pop(name).items():
+                other[index] = other.get(index, 0) + count
+        brands = [*brands[:top_brands], TIMELINE_OTHER_BRANDS]
+        cells[TIMELINE_OTHER_BRANDS] = other
+    return {
+        "granularity": granularity,
+        "buckets": list(positions),
+        "totals": totals,
+        "brands": brands,
+        "series": [[cells[name].get(index, 0) for index in range(len(totals))] for name in brands],
+        "top_brands": top_brands,
+        "folded": folded,
     }
-    raw_fecha_inicio = request.args.get("fecha_inicio", "").strip()
-    raw_fecha_fin = request.args.get("fecha_fin", "").strip()
-    fecha_inicio = coerce_iso_date(raw_fecha_inicio) or None
-    fecha_fin = coerce_iso_date(raw_fecha_fin) or None
-    nombre = request.args.get("nombre", "").strip() or None
-    hostname = request.args.get("hostname", "").strip() or None
 
+
+def fetch_recent_updates(
+    db: sqlite3.Connection, where: str, params: List[object], limit: int
+) -> List[Dict[str, str]]:
     query = (
-        "SELECT record_id, ubicacion, nom_sede, categoria_trab, nombre_completo, perfil_imagen, "
-        "marca, modelo, serial_num, hostname, ip_equipo, email_trabajo, fecha_estado, estado, "
-        "estado_coordinacion, estado_upgrade, fecha_programada, fecha_ejecucion, notas, last_updated "
-        "FROM project_records"
+        f"SELECT {', '.join(SUMMARY_RECORD_FIELDS)} FROM project_records{where} "
+        "ORDER BY last_updated DESC, id DESC LIMIT ?"
     )
-    conditions = []
-    params: List[str] = []
-    for key, value in filters.items():
-        if value:
-            if key == "estado":
-                conditions.append("UPPER(estado) = UPPER(?)")
-            else:
-                conditions.append(f"{key} = ?")
-            params.append(value)
-    if fecha_inicio:
-        conditions.append("fecha_estado >= ?")
-        params.append(fecha_inicio)
-    if fecha_fin:
-        conditions.append("fecha_estado <= ?")
-        params.append(fecha_fin)
-    if nombre:
-        conditions.append("UPPER(nombre_completo) LIKE UPPER(?)")
-        params.append(f"%{nombre}%")
-    if hostname:
-        conditions.append("hostname LIKE ?")
-        params.append(f"%{hostname}%")
-    if conditions:
-        query += " WHERE " + " AND ".join(conditions)
-    query += " ORDER BY last_updated DESC"
-
-    records = db.execute(query, params).fetchall()
-
-    total = len(records)
-    status_counts: Dict[str, int] = {}
-    bucket_counts: Dict[str, int] = {}
-    schedule_map: Dict[str, int] = {}
-    schedule_brands: Dict[str, Dict[str, int]] = {}
-    recent_updates = []
-
-    for row in records:
-        estado = (row["estado"] or "").strip().upper() or "SIN ESTADO"
-        status_counts[estado] = status_counts.get(estado, 0) + 1
-        bucket = status_bucket(estado)
-        bucket_counts[bucket] = bucket_counts.get(bucket, 0) + 1
-
-        if row["fecha_estado"]:
-            schedule_map[row["fecha_estado"]] = schedule_map.get(row["fecha_estado"], 0) + 1
-            schedule_brands.setdefault(row["fecha_estado"], []).append(row["marca"] or "")
-
-        recent_updates.append(
-            {
-                "record_id": row["record_id"],
-                "nombre_completo": row["nombre_completo"],
-                "ubicacion": row["ubicacion"],
-                "nom_sede": row["nom_sede"],
-                "hostname": row["hostname"],
-                "categoria_trab": row["categoria_trab"],
-                "estado": estado,
-                "estado_coordinacion": row["estado_coordinacion"],
-                "estado_upgrade": row["estado_upgrade"],
-                "fecha_programada": row["fecha_programada"],
-                "fecha_ejecucion": row["fecha_ejecucion"],
-                "fecha_estado": row["fecha_estado"],
-                "marca": row["marca"],
-                "modelo": row["modelo"],
-                "notas": row["notas"],
-                "last_updated": row["last_updated"],
-            }
-        )
+    return [serialize_record(row) for row in db.execute(query, [*params, limit])]
 
-    if not nombre:
-        recent_updates = recent_updates[:10]
 
-    schedule_brands_counts = {
-        date: {brand: count for brand, count in Counter(brands).items() if brand}
-        for date, brands in schedule_brands.items()
-    }
+def encode_records_cursor(last_updated: str, row_id: int) -> str:
+    raw = json.dumps([last_updated, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_records_cursor(cursor: str) -> Optional[Tuple[str, int]]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        last_updated, row_id = json.loads(raw.decode("utf-8"))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(last_updated, str) or not isinstance(row_id, int):
+        return None
+    return last_updated, row_id
+
+
+def fetch_records_page(
+    db: sqlite3.Connection,
+    filters: Dict[str, str],
+    page_size: int,
+    after: Optional[Tuple[str, int]] = None,
+) -> Tuple[List[Dict[str, str]], Optional[str]]:
+    where, params = build_where_clause(filters)
+    if after is not None:
+        keyset = "(last_updated, id) < (?, ?)"
+        where = f"{where} AND {keyset}" if where else f" WHERE {keyset}"
+        params = [*params, *after]
+    rows = db.execute(
+        f"SELECT id, {', '.join(SUMMARY_RECORD_FIELDS)} FROM project_records{where} "
+        "ORDER BY last_updated DESC, id DESC LIMIT ?",
+        [*params, page_size + 1],
+    ).fetchall()
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_records_cursor(rows[-1]["last_updated"], rows[-1]["id"])
+    return [serialize_record(row) for row in rows], next_cursor
+
 
-    data = {
+def build_summary_payload(
+    db: sqlite3.Connection,
+    filters: Dict[str, str],
+    data_version: Optional[int] = None,
+    record_format: str = "rows",
+    timeline_options: Tuple[str, int] = ("auto", 0),
+) -> Dict[str, object]:
+    where, params = build_where_clause(filters)
+    source = summary_source(filters)
+    total, status_counts, bucket_counts = compute_status_counts(db, where, params, source)
+    timeline = compute_timeline(db, where, params, source, *timeline_options)
+    recent_updates = fetch_recent_updates(db, where, params, RECENT_UPDATES_LIMIT)
+
+    return {
         "total": total,
         "status_counts": status_counts,
         "status_buckets": bucket_counts,
-        "schedule": schedule_map,
-        "schedule_brands": schedule_brands_counts,
-        "recent_updates": recent_updates,
+        "timeline": timeline,
+        "recent_updates": encode_records(recent_updates, record_format),
         "status_catalog": STATUS_CHOICES,
-        "filters": build_filters_payload(filters),
+        "filters": build_filters_payload(filters, db, data_version),
         "date_filters": {
-            "fecha_inicio": fecha_inicio or "",
-            "fecha_fin": fecha_fin or "",
+            "fecha_inicio": filters.get("fecha_inicio") or "",
+            "fecha_fin": filters.get("fecha_fin") or "",
         },
-        "hostname_filter": hostname or "",
-        "name_filter": nombre or "",
+        "hostname_filter": filters.get("hostname") or "",
+        "name_filter": filters.get("nombre") or "",
         "estado_filter": filters.get("estado") or "",
         "estado_options": STATUS_CHOICES,
+        "change_seq": change_log_head(db),
+    }
+
+
+SUMMARY_CACHE_FORMAT = 4
+_summary_cache_ready = set()
+
+
+def get_cache_db() -> sqlite3.Connection:
+    # Archivo aparte: las escrituras de la cache no compiten con el bloqueo de una carga.
+    if "cache_db" not in g:
+        path = app.config["SUMMARY_CACHE_DATABASE"]
+        cache_db = connection_pool.connection(path)
+        if path not in _summary_cache_ready:
+            cache_db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS summary_cache (
+                    etag TEXT PRIMARY KEY,
+                    data_version INTEGER NOT NULL,
+                    body BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_summary_cache_last_used ON summary_cache (last_used);
+                """
+            )
+            _summary_cache_ready.add(path)
+        g.cache_db = cache_db
+    return g.cache_db
+
+
+def current_data_version(db: sqlite3.Connection) -> int:
+    row = db.execute("SELECT version FROM data_version WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+def summary_etag(
+    filters: Dict[str, str],
+    data_version: int,
+    record_format: str = "rows",
+    timeline_options: Tuple[str, int] = ("auto", 0),
+) -> str:
+    key = json.dumps([SUMMARY_CACHE_FORMAT, data_version, record_format, list(timeline_options), sorted(filters.items())])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+RESPONSE_ENCODINGS = ("br", "gzip")
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/html", "text/csv", "text/plain"}
+
+
+def etag_matches(etag: str) -> bool:
+    # La compresion agrega la codificacion a la ETag; cualquiera de las variantes vale para el 304.
+    candidates = (etag, *(f"{etag}-{encoding}" for encoding in RESPONSE_ENCODINGS))
+    return any(candidate in request.if_none_match for candidate in candidates)
+
+
+def choose_response_encoding() -> Optional[str]:
+    available = [encoding for encoding in RESPONSE_ENCODINGS if encoding != "br" or brotli is not None]
+    return request.accept_encodings.best_match(available)
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=app.config["RESPONSE_BROTLI_QUALITY"])
+    return gzip.compress(body, compresslevel=app.config["RESPONSE_GZIP_LEVEL"], mtime=0)
+
+
+@app.after_request
+def compress_response(response):
+    # Los streams y los archivos estaticos (direct_passthrough) salen tal cual.
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    if response.status_code != 200 or response.content_length is None:
+        return response
+    if response.content_length < app.config["RESPONSE_COMPRESS_MIN_BYTES"]:
+        return response
+    encoding = choose_response_encoding()
+    if encoding is None:
+        return response
+    response.set_data(compress_body(response.get_data(), encoding))
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
+
+SUMMARY_CACHE_EVENTS = ("hits", "not_modified", "misses", "evictions")
+SUMMARY_CACHE_EVENT_LABELS = {event: metric_labels(event=event) for event in SUMMARY_CACHE_EVENTS}
+
+
+def record_cache_event(name: str, amount: int = 1) -> None:
+    # En memoria del worker: el registro de metricas los suma en su base cada METRICS_FLUSH_SECONDS.
+    metrics.inc("banbif_summary_cache_events_total", SUMMARY_CACHE_EVENT_LABELS[name], amount)
+    metrics.maybe_flush()
+
+
+def summary_cache_get(etag: str) -> Optional[bytes]:
+    try:
+        cache_db = get_cache_db()
+        row = cache_db.execute("SELECT body, last_used FROM summary_cache WHERE etag = ?", (etag,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        # El desalojo solo necesita un orden aproximado: un acierto escribe a lo sumo una vez por intervalo.
+        if now - row[1] >= app.config["SUMMARY_CACHE_TOUCH_SECONDS"]:
+            cache_db.execute("UPDATE summary_cache SET last_used = ? WHERE etag = ?", (now, etag))
+            cache_db.commit()
+        return row[0]
+    except sqlite3.OperationalError:
+        return None
+
+
+def summary_cache_put(etag: str, data_version: int, body: bytes) -> None:
+    try:
+        cache_db = get_cache_db()
+        cache_db.execute("DELETE FROM summary_cache WHERE data_version < ?", (data_version,))
+        cache_db.execute(
+            "INSERT OR REPLACE INTO summary_cache (etag, data_version, body, size, last_used) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (etag, data_version, body, len(body), time.time()),
+        )
+        max_entries = app.config["SUMMARY_CACHE_MAX_ENTRIES"]
+        max_bytes = app.config["SUMMARY_CACHE_MAX_BYTES"]
+        entries, total_bytes = cache_db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM summary_cache"
+        ).fetchone()
+        if entries > max_entries or total_bytes > max_bytes:
+            kept = 0
+            kept_bytes = 0
+            evict = []
+            for row_etag, size in cache_db.execute(
+                "SELECT etag, size FROM summary_cache ORDER BY last_used DESC"
+            ).fetchall():
+                if kept < max_entries and kept_bytes + size <= max_bytes:
+                    kept += 1
+                    kept_bytes += size
+                else:
+                    evict.append((row_etag,))
+            cache_db.executemany("DELETE FROM summary_cache WHERE etag = ?", evict)
+            if evict:
+                record_cache_event("evictions", len(evict))
+        cache_db.commit()
+    except sqlite3.OperationalError:
+        app.logger.debug("No se pudo guardar el resumen en cache")
+
+
+def summary_cache_stats() -> Dict[str, object]:
+    cache_db = get_cache_db()
+    totals = metrics.totals("banbif_summary_cache_events_total")
+    stats = {event: int(totals.get(labels, 0)) for event, labels in SUMMARY_CACHE_EVENT_LABELS.items()}
+    entries, total_bytes = cache_db.execute(
+        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM summary_cache"
+    ).fetchone()
+    hits = stats["hits"] + stats["not_modified"]
+    requests = hits + stats["misses"]
+    return {
+        **stats,
+        "hit_rate": round(hits / requests, 4) if requests else 0.0,
+        "entries": entries,
+        "bytes": total_bytes,
+        "max_entries": app.config["SUMMARY_CACHE_MAX_ENTRIES"],
+        "max_bytes": app.config["SUMMARY_CACHE_MAX_BYTES"],
+    }
+
+
+@app.route("/api/summary")
+@login_required
+def api_summary():
+    filters = parse_summary_filters(request.args)
+    record_format = parse_record_format(request.args)
+    if record_format is None:
+        return jsonify({"error": "Formato no soportado"}), 400
+    timeline_options = parse_timeline_options(request.args)
+    if timeline_options is None:
+        return jsonify({"error": "Granularidad no soportada"}), 400
+    with read_snapshot(get_read_db()) as db:
+        data_version = current_data_version(db)
+        etag = summary_etag(filters, data_version, record_format, timeline_options)
+        profiled = profiling_request()
+        if etag_matches(etag) and not profiled:
+            record_cache_event("not_modified")
+            response = app.response_class(status=304)
+        else:
+            body = None if profiled else summary_cache_get(etag)
+            if body is None:
+                record_cache_event("misses")
+                body = jsonify(
+                    build_summary_payload(db, filters, data_version, record_format, timeline_options)
+                ).get_data()
+                summary_cache_put(etag, data_version, body)
+            else:
+                record_cache_event("hits")
+            response = app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@app.route("/api/cache-stats")
+@login_required
+@admin_required
+def api_cache_stats():
+    return jsonify(summary_cache_stats())
+
+
+@app.route("/api/pool-stats")
+@login_required
+@admin_required
+def api_pool_stats():
+    return jsonify(connection_pool.stats())
+
+
+@app.route("/api/auth-stats")
+@login_required
+@admin_required
+def api_auth_stats():
+    return jsonify({"hashing": hashing_slots.stats(), "user_cache": user_cache.stats()})
+
+
+@app.route("/api/records")
+@login_required
+def api_records():
+    filters = parse_summary_filters(request.args)
+    record_format = parse_record_format(request.args)
+    if record_format is None:
+        return jsonify({"error": "Formato no soportado"}), 400
+    page_size = request.args.get("page_size", type=int) or app.config["RECORDS_PAGE_SIZE"]
+    page_size = max(1, min(page_size, app.config["RECORDS_MAX_PAGE_SIZE"]))
+    after = None
+    cursor = request.args.get("cursor", "").strip()
+    if cursor:
+        after = decode_records_cursor(cursor)
+        if after is None:
+            return jsonify({"error": "Cursor invalido"}), 400
+    records, next_cursor = fetch_records_page(get_read_db(), filters, page_size, after)
+    return jsonify({
+        "records": encode_records(records, record_format),
+        "next_cursor": next_cursor,
+        "page_size": page_size,
+    })
+
+
+def load_net_changes(
+    db: sqlite3.Connection, since: int, limit: int
+) -> Optional[Dict[int, List[object]]]:
+    # Se colapsa por fila: cuenta el estado antes del primer cambio y despues del ultimo.
+    rows = db.execute(
+        f"SELECT * FROM {CHANGE_LOG_TABLE} WHERE seq > ? ORDER BY seq LIMIT ?", (since, limit + 1)
+    ).fetchall()
+    if len(rows) > limit:
+        return None
+    net: Dict[int, List[object]] = {}
+    for row in rows:
+        old = None if row["op"] == "I" else tuple(row[f"old_{column}"] for column in SUMMARY_CUBE_DIMENSIONS)
+        new = None if row["op"] == "D" else tuple(row[f"new_{column}"] for column in SUMMARY_CUBE_DIMENSIONS)
+        entry = net.get(row["row_id"])
+        if entry is None:
+            net[row["row_id"]] = [row["record_id"], old, new]
+        else:
+            entry[0] = row["record_id"]
+            entry[2] = new
+    return net
+
+
+def decode_change_dimensions(dimensions: Tuple[object, ...], names: Dict[int, str]) -> Dict[str, object]:
+    ubicacion_id, nom_sede_id, categoria_trab_id, estado_id, dia, texto, marca_id = dimensions
+    dia = dia or 0
+    return {
+        "ubicacion": names.get(ubicacion_id) or "",
+        "nom_sede": names.get(nom_sede_id) or "",
+        "categoria_trab": names.get(categoria_trab_id) or "",
+        "estado": (names.get(estado_id) or "").strip(),
+        "dia": dia,
+        "fecha": date.fromordinal(dia).isoformat() if dia > 0 else texto or "",
+        "marca": names.get(marca_id) or "",
+    }
+
+
+def change_matches(values: Dict[str, object], filters: Dict[str, str], skip: Optional[str] = None) -> bool:
+    # Mismo criterio que build_conditions; skip deja fuera el filtro de la propia faceta.
+    for field in ("ubicacion", "nom_sede", "categoria_trab"):
+        if field != skip and filters.get(field) and values[field] != filters[field]:
+            return False
+    if skip != "estado" and filters.get("estado") and values["estado"] != filters["estado"].upper():
+        return False
+    if filters.get("fecha_inicio") and values["dia"] < date.fromisoformat(filters["fecha_inicio"]).toordinal():
+        return False
+    if filters.get("fecha_fin") and not 0 < values["dia"] <= date.fromisoformat(filters["fecha_fin"]).toordinal():
+        return False
+    return True
+
+
+def add_count(counts: Dict[str, int], key: str, amount: int) -> None:
+    counts[key] = counts.get(key, 0) + amount
+    if not counts[key]:
+        del counts[key]
+
+
+def build_changes_payload(
+    db: sqlite3.Connection, filters: Dict[str, str], net: Dict[int, List[object]]
+) -> Dict[str, object]:
+    id_positions = [index for index, column in enumerate(SUMMARY_CUBE_DIMENSIONS) if column.endswith("_id")]
+    ids = sorted({
+        side[index]
+        for _record_id, old, new in net.values()
+        for side in (old, new)
+        if side
+        for index in id_positions
+        if side[index] is not None
+    })
+    names: Dict[int, str] = {}
+    for chunk_start in range(0, len(ids), 500):
+        chunk = ids[chunk_start:chunk_start + 500]
+        for row_id, value in db.execute(
+            f"SELECT id, value FROM {DICTIONARY_TABLE} WHERE id IN ({', '.join('?' for _ in chunk)})", chunk
+        ):
+            names[row_id] = value
+
+    total = 0
+    status_counts: Dict[str, int] = {}
+    status_buckets: Dict[str, int] = {}
+    schedule: Dict[str, int] = {}
+    schedule_brands: Dict[str, Dict[str, int]] = {}
+    facets: Dict[str, Dict[str, int]] = {field: {} for field in FACET_FIELDS}
+    previously_listed = set()
+    for record_id, old, new in net.values():
+        for dimensions, amount in ((old, -1), (new, 1)):
+            if dimensions is None:
+                continue
+            values = decode_change_dimensions(dimensions, names)
+            values["estado"] = values["estado"] or "SIN ESTADO"
+            for field in FACET_FIELDS:
+                if values[field] and change_matches(values, filters, skip=field):
+                    add_count(facets[field], values[field], amount)
+            if not change_matches(values, filters):
+                continue
+            if amount < 0:
+                previously_listed.add(record_id)
+            total += amount
+            add_count(status_counts, values["estado"], amount)
+            add_count(status_buckets, status_bucket(values["estado"]), amount)
+            if values["fecha"]:
+                add_count(schedule, values["fecha"], amount)
+                if values["marca"]:
+                    brands = schedule_brands.setdefault(values["fecha"], {})
+                    add_count(brands, values["marca"], amount)
+                    if not brands:
+                        del schedule_brands[values["fecha"]]
+
+    records: List[Dict[str, str]] = []
+    row_ids = [row_id for row_id, (_record_id, _old, new) in net.items() if new is not None]
+    conditions, params = build_conditions(filters)
+    for chunk_start in range(0, len(row_ids), 500):
+        chunk = row_ids[chunk_start:chunk_start + 500]
+        where = " AND ".join([f"id IN ({', '.join('?' for _ in chunk)})", *conditions])
+        records.extend(
+            serialize_record(row)
+            for row in db.execute(
+                f"SELECT {', '.join(SUMMARY_RECORD_FIELDS)} FROM project_records WHERE {where}", [*chunk, *params]
+            )
+        )
+    records.sort(key=lambda record: record["last_updated"] or "", reverse=True)
+    listed = {record["record_id"] for record in records}
+    # Si los cambios no caben en una pagina de la tabla se recarga esa pagina; solo van los mas recientes.
+    reload_records = len(records) > app.config["RECORDS_PAGE_SIZE"]
+    return {
+        "changes": len(net),
+        "delta": {
+            "total": total,
+            "status_counts": status_counts,
+            "status_buckets": status_buckets,
+            "schedule": schedule,
+            "schedule_brands": schedule_brands,
+            "facets": facets,
+        },
+        "records": records[:RECENT_UPDATES_LIMIT] if reload_records else records,
+        "removed": [] if reload_records else sorted(previously_listed - listed),
+        "reload_records": reload_records,
     }
 
-    return jsonify(data)
+
+@app.route("/api/changes")
+@login_required
+def api_changes():
+    filters = parse_summary_filters(request.args)
+    record_format = parse_record_format(request.args)
+    if record_format is None:
+        return jsonify({"error": "Formato no soportado"}), 400
+    since = request.args.get("since", type=int)
+    with read_snapshot(get_read_db()) as db:
+        bounds = change_log_bounds(db)
+        if bounds is None:
+            return jsonify({"seq": None, "resync": True, "reason": "sin_registro"})
+        floor, head = bounds
+        if since is None or since < floor or since > head:
+            return jsonify({"seq": head, "resync": True, "reason": "fuera_de_rango"})
+        if since == head:
+            return jsonify({"seq": head, "resync": False, "changes": 0})
+        # El registro guarda ids del cubo; nombre y hostname no estan ahi y se recalculan completos.
+        if filters.get("nombre") or filters.get("hostname"):
+            return jsonify({"seq": head, "resync": True, "reason": "busqueda"})
+        net = load_net_changes(db, since, app.config["CHANGE_LOG_MAX_DELTA"])
+        if net is None:
+            return jsonify({"seq": head, "resync": True, "reason": "demasiados_cambios"})
+        payload = build_changes_payload(db, filters, net)
+    payload["records"] = encode_records(payload["records"], record_format)
+    return jsonify({"seq": head, "resync": False, **payload})
+
+
+def read_stream_state(db: sqlite3.Connection) -> Optional[Tuple[int, int, int]]:
+    # Mientras una carga merge escribe por lotes no se avisa: un solo evento cuando termina.
+    stale_before = time.time() - app.config["IMPORT_STALE_SECONDS"]
+    with read_snapshot(db):
+        importing = db.execute(
+            "SELECT 1 FROM import_jobs WHERE status = 'running' AND mode = 'merge' AND heartbeat_at >= ? LIMIT 1",
+            (stale_before,),
+        ).fetchone()
+        if importing:
+            return None
+        floor, head = change_log_bounds(db) or (0, 0)
+        return current_data_version(db), floor, head
+
+
+class ChangeBroadcaster:
+    """Un hilo por proceso consulta data_version y despierta a todos los streams SSE abiertos."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._condition = threading.Condition()
+        self._watcher_started = False
+        self._subscribers = 0
+        self._event_id = 0
+        self._event: Optional[Dict[str, object]] = None
+        self._rejected = 0
+
+    def _ensure_watcher(self) -> None:
+        if self._pid == os.getpid() and self._watcher_started:
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            if not self._watcher_started:
+                threading.Thread(target=self._watch, name="stream-watcher", daemon=True).start()
+                self._watcher_started = True
+
+    def subscribe(self) -> bool:
+        self._ensure_watcher()
+        with self._condition:
+            if self._subscribers >= app.config["STREAM_MAX_SUBSCRIBERS"]:
+                self._rejected += 1
+                return False
+            self._subscribers += 1
+            return True
+
+    def unsubscribe(self) -> None:
+        with self._condition:
+            self._subscribers -= 1
+
+    def current(self) -> Tuple[int, Optional[Dict[str, object]]]:
+        with self._condition:
+            return self._event_id, self._event
+
+    def wait(self, last_id: int, timeout: float) -> Tuple[int, Optional[Dict[str, object]]]:
+        with self._condition:
+            self._condition.wait_for(lambda: self._event_id != last_id, timeout)
+            return self._event_id, self._event
+
+    def publish(self, event: Dict[str, object]) -> None:
+        with self._condition:
+            self._event_id += 1
+            self._event = event
+            self._condition.notify_all()
+
+    def _watch(self) -> None:
+        last_version = last_seq = None
+        while True:
+            time.sleep(app.config["STREAM_POLL_SECONDS"])
+            if not self._subscribers:
+                continue
+            try:
+                with app.app_context():
+                    state = read_stream_state(get_read_db())
+            except sqlite3.Error:
+                app.logger.exception("No se pudo leer la version de datos para los streams")
+                continue
+            if state is None or state[0] == last_version:
+                continue
+            version, floor, head = state
+            in_log = last_seq is not None and floor <= last_seq <= head
+            self.publish({
+                "version": version,
+                "seq": head,
+                "changes": head - last_seq if in_log else None,
+                "resync": last_seq is not None and not in_log,
+            })
+            last_version, last_seq = version, head
+
+    def stats(self) -> Dict[str, object]:
+        with self._condition:
+            return {
+                "pid": self._pid,
+                "subscribers": self._subscribers,
+                "max_subscribers": app.config["STREAM_MAX_SUBSCRIBERS"],
+                "rejected": self._rejected,
+                "events": self._event_id,
+                "last_event": self._event,
+            }
+
+
+change_broadcaster = ChangeBroadcaster()
+
+
+def stream_data_versions(broadcaster: ChangeBroadcaster) -> Iterator[str]:
+    # Corre fuera del contexto de la peticion: no toma conexiones, solo espera eventos del hilo vigilante.
+    yield f"retry: {app.config['STREAM_RETRY_MS']}\n\n"
+    event_id, event = broadcaster.current()
+    deadline = time.monotonic() + app.config["STREAM_MAX_SECONDS"]
+    while True:
+        if event is not None:
+            yield f"id: {event_id}\nevent: data_version\ndata: {json.dumps(event)}\n\n"
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            # El navegador reconecta solo; asi los hilos no quedan tomados por clientes que ya no estan.
+            return
+        next_id, next_event = broadcaster.wait(event_id, min(app.config["STREAM_HEARTBEAT_SECONDS"], remaining))
+        if next_id == event_id:
+            event = None
+            yield ": ping\n\n"
+        else:
+            event_id, event = next_id, next_event
+
+
+@app.route("/api/stream")
+@login_required
+def api_stream():
+    if not change_broadcaster.subscribe():
+        response = jsonify({"error": "Demasiadas conexiones en vivo; el dashboard seguira consultando cada 30 s."})
+        response.status_code = 503
+        response.headers["Retry-After"] = "60"
+        return response
+    response = app.response_class(stream_data_versions(change_broadcaster), mimetype="text/event-stream")
+    # close() corre aunque el cliente se vaya antes de recibir el primer byte.
+    response.call_on_close(change_broadcaster.unsubscribe)
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@app.route("/api/stream-stats")
+@login_required
+@admin_required
+def api_stream_stats():
+    return jsonify(change_broadcaster.stats())
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    # Prometheus no inicia sesion: con BANBIF_METRICS_TOKEN se usa un bearer token; sin el, solo admins.
+    token = app.config["METRICS_TOKEN"]
+    if token:
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            abort(401)
+    elif not user_is_admin():
+        abort(403)
+    if not app.config["METRICS_ENABLED"]:
+        abort(404)
+    return app.response_class(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.route("/admin/perfiles")
+@login_required
+@admin_required
+def admin_profiles():
+    profiles = []
+    for path in reversed(list_profiles(Path(app.config["PROFILES_DIR"]))):
+        try:
+            profiles.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            # Otro worker lo acaba de borrar por la retencion.
+            continue
+    return render_template(
+        "profiles.html",
+        profiles=profiles,
+        profile_query_arg=PROFILE_QUERY_ARG,
+        profile_header=PROFILE_HEADER,
+        retention=app.config["PROFILE_RETENTION"],
+    )
+
+
+@app.route("/admin/perfiles/<name>")
+@login_required
+@admin_required
+def admin_profile_file(name: str):
+    if Path(name).suffix not in PROFILE_SUFFIXES[1:]:
+        abort(404)
+    return send_from_directory(app.config["PROFILES_DIR"], name, as_attachment=True)
+
+
+# La plantilla de carga: mismo orden de columnas que /api/export, asi una exportacion se puede volver a subir.
+TEMPLATE_HEADER = ["id", *PROJECT_COLUMNS[1:]]
+TEMPLATE_EXAMPLE_ROW = [
+    "001",
+    "SEDE PRINCIPAL",
+    "Centro Corporativo",
+    "UPGRADE + WIN11",
+    "Nombre Ejemplo",
+    "OFICINA PRINCIPAL ADMINISTRATIVO",
+    "HP",
+    "EliteBook 840",
+    "5CD3051HBZ",
+    "BANCAINMOBIOP01",
+    "10.10.2.15",
+    "usuario@banbif.com",
+    "2025-09-29",
+    "REALIZADO",
+    "REALIZADO",
+    "PROGRAMADO",
+    "2025-09-27",
+    "2025-09-29",
+    "Observaciones",
+]
+EXPORT_BATCH_SIZE = 1000
+
+
+def build_template_csv() -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(TEMPLATE_HEADER)
+    writer.writerow(TEMPLATE_EXAMPLE_ROW)
+    return buffer.getvalue().encode("utf-8")
+
+
+TEMPLATE_CSV = build_template_csv()
+TEMPLATE_ETAG = hashlib.sha1(TEMPLATE_CSV).hexdigest()
 
 
 @app.route("/api/download-template")
 @login_required
 @admin_required
 def download_template():
-    template_path = BASE_DIR / "static" / "templates" / "avance_template.csv"
-    template_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(template_path, "w", encoding="utf-8", newline="") as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow([
-            "id",
-            "ubicacion",
-            "nom_sede",
-            "categoria_trab",
-            "nombre_completo",
-            "perfil_imagen",
-            "marca",
-            "modelo",
-            "serial_num",
-            "hostname",
-            "ip_equipo",
-            "email_trabajo",
-            "fecha_estado",
-            "estado",
-            "estado_coordinacion",
-            "estado_upgrade",
-            "fecha_programada",
-            "fecha_ejecucion",
-            "notas",
-        ])
-        writer.writerow([
-            "001",
-            "SEDE PRINCIPAL",
-            "Centro Corporativo",
-            "UPGRADE + WIN11",
-            "Nombre Ejemplo",
-            "OFICINA PRINCIPAL ADMINISTRATIVO",
-            "HP",
-            "EliteBook 840",
-            "5CD3051HBZ",
-            "BANCAINMOBIOP01",
-            "10.10.2.15",
-            "usuario@banbif.com",
-            "2025-09-29",
-            "REALIZADO",
-            "REALIZADO",
-            "PROGRAMADO",
-            "2025-09-27",
-            "2025-09-29",
-            "Observaciones",
-        ])
-    return send_from_directory(template_path.parent, template_path.name, as_attachment=True)
+    if etag_matches(TEMPLATE_ETAG):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(TEMPLATE_CSV, mimetype="text/csv")
+        response.headers["Content-Disposition"] = "attachment; filename=avance_template.csv"
+    response.set_etag(TEMPLATE_ETAG)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def iter_export_csv(db: sqlite3.Connection, filters: Dict[str, str]) -> Iterator[str]:
+    where, params = build_where_clause(filters)
+    # Sin ORDER BY: ordenar obligaria a SQLite a juntar todo el resultado antes de la primera fila.
+    cursor = db.execute(f"SELECT {', '.join(PROJECT_COLUMNS)} FROM project_records{where}", params)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(TEMPLATE_HEADER)
+    try:
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            writer.writerows(rows)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    finally:
+        cursor.close()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@app.route("/api/export")
+@login_required
+@admin_required
+def api_export():
+    filters = parse_summary_filters(request.args)
+    # stream_with_context mantiene g.read_db hasta la ultima fila; close_db la devuelve al pool al terminar.
+    response = app.response_class(
+        stream_with_context(iter_export_csv(get_read_db(), filters)), mimetype="text/csv"
+    )
+    response.headers["Content-Disposition"] = f"attachment; filename=avances_{datetime.now():%Y%m%d-%H%M%S}.csv"
+    response.headers["Cache-Control"] = "no-store"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+IMPORT_CHUNK_BYTES = 8 * 1024 * 1024
+IMPORT_SCAN_BLOCK_BYTES = 16 * 1024 * 1024
+IMPORT_PROGRESS_SECONDS = 2.0
+# Lotes mas grandes que los de /upload: la CLI no comparte la base con un dashboard esperando cada commit.
+IMPORT_CLI_BATCH_SIZE = 10_000
+
+
+def read_csv_header(path: Path) -> Tuple[List[str], int]:
+    # Devuelve el encabezado y el byte donde empiezan los datos; se saltan las lineas vacias como en read_csv_plan.
+    with path.open("rb") as handle:
+        line = b""
+        while not line.strip():
+            line = handle.readline()
+            if not line:
+                return [], handle.tell()
+        while line.count(b'"') % 2:
+            extra = handle.readline()
+            if not extra:
+                break
+            line += extra
+        header = next(csv.reader([line.decode("utf-8-sig")]), [])
+        return header, handle.tell()
+
+
+def split_csv_chunks(path: Path, start: int, chunk_bytes: int) -> List[Tuple[int, int]]:
+    # Corta en saltos de linea fuera de comillas: un campo entre comillas puede traer saltos de linea.
+    # Las comillas escapadas ("") no cambian la paridad, asi que alcanza con contar comillas.
+    size = path.stat().st_size
+    chunks = []
+    chunk_start, target, position, quoted = start, start + chunk_bytes, start, False
+    with path.open("rb") as handle:
+        handle.seek(start)
+        while target < size:
+            block = handle.read(IMPORT_SCAN_BLOCK_BYTES)
+            if not block:
+                break
+            checked, parity = 0, quoted
+            index = block.find(b"\n", max(target - position, 0))
+            while index != -1:
+                parity ^= block.count(b'"', checked, index) & 1
+                checked = index
+                if not parity:
+                    chunks.append((chunk_start, position + index + 1))
+                    chunk_start = position + index + 1
+                    target = chunk_start + chunk_bytes
+                index = block.find(b"\n", max(target - position, index + 1))
+            quoted = parity ^ (block.count(b'"', checked) & 1)
+            position += len(block)
+    if chunk_start < size:
+        chunks.append((chunk_start, size))
+    return chunks
+
+
+def parse_import_chunk(
+    path: str, start: int, end: int, header: List[str], dates: DateNormalizer
+) -> Tuple[List[List[Optional[str]]], int, int, Dict[str, Tuple[int, int, int]]]:
+    # Corre en los procesos del pool: mismo mapeo de columnas y fechas que /upload, con los formatos
+    # ya inferidos por el proceso principal sobre el inicio del archivo.
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        text = handle.read(end - start).decode("utf-8")
+    plan = CsvRowPlan(header)
+    values = []
+    rows_read = rejected = 0
+    for row in csv.reader(io.StringIO(text, newline="")):
+        if not row:
+            continue
+        rows_read += 1
+        mapped = dates.normalize_row(plan.map_row(row))
+        if mapped is None:
+            rejected += 1
+        else:
+            values.append(record_values(mapped))
+    counts = {field: (column.fast, column.cached, column.fallback) for field, column in dates.columns.items()}
+    return values, rows_read, rejected, counts
+
+
+class InlineExecutor:
+    """Misma interfaz que ProcessPoolExecutor.submit pero en el proceso actual: con un solo CPU el pool solo suma copias."""
+
+    def submit(self, func, *args) -> Future:
+        future: Future = Future()
+        future.set_result(func(*args))
+        return future
+
+
+def bulk_import_csv(
+    db: sqlite3.Connection,
+    path: Path,
+    workers: int,
+    batch_size: int,
+    progress: Optional[Callable[[Dict[str, int], int, float], None]] = None,
+) -> Dict[str, object]:
+    header, data_start = read_csv_header(path)
+    plan = CsvRowPlan(header)
+    dates = DateNormalizer()
+    with path.open("rb") as handle:
+        text_stream = io.TextIOWrapper(handle, encoding="utf-8-sig", newline="")
+        _plan, rows = read_csv_plan(text_stream)
+        dates.learn(islice(rows, dates.sample_rows))
+        text_stream.detach()
+    chunks = iter(split_csv_chunks(path, data_start, IMPORT_CHUNK_BYTES))
+    totals = dict.fromkeys(IMPORT_JOB_COUNTERS, 0)
+    # Los contadores de fechas se suman aparte: dates viaja a cada pedazo y no debe llevar lo acumulado.
+    date_counts = {field: [0, 0, 0] for field in dates.columns}
+    start = time.perf_counter()
+    ensure_staging_table(db)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext(InlineExecutor()) as pool:
+            # Dos pedazos en vuelo por proceso: la memoria depende de IMPORT_CHUNK_BYTES, no del archivo.
+            pending = deque(
+                (pool.submit(parse_import_chunk, str(path), *chunk, header, dates), chunk[1])
+                for chunk in islice(chunks, workers * 2)
+            )
+            while pending:
+                future, chunk_end = pending.popleft()
+                values, rows_read, rejected, counts = future.result()
+                chunk = next(chunks, None)
+                if chunk is not None:
+                    pending.append((pool.submit(parse_import_chunk, str(path), *chunk, header, dates), chunk[1]))
+                # Un solo escritor y en el orden del archivo: si un id se repite gana la ultima fila, como en /upload.
+                for batch in iter_batches(values, batch_size):
+                    for key, value in write_record_values(db, batch).items():
+                        totals[key] += value
+                    db.commit()
+                totals["rows_read"] += rows_read
+                totals["rows_rejected"] += rejected
+                for field, chunk_counts in counts.items():
+                    date_counts[field] = [total + value for total, value in zip(date_counts[field], chunk_counts)]
+                if progress is not None:
+                    progress(totals, chunk_end, time.perf_counter() - start)
+        db.execute(f"DELETE FROM {STAGING_TABLE}")
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    elapsed = time.perf_counter() - start
+    for field, (fast, cached, fallback) in date_counts.items():
+        column = dates.columns[field]
+        column.fast, column.cached, column.fallback = fast, cached, fallback
+    return {
+        **totals,
+        "bytes": path.stat().st_size,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(totals["rows_read"] / elapsed) if elapsed else totals["rows_read"],
+        "headers": plan.report(),
+        "date_formats": dates.report(),
+    }
+
+
+def bulk_import_snapshot(
+    path: Path,
+    workers: int,
+    batch_size: int,
+    progress: Optional[Callable[[Dict[str, int], int, float], None]] = None,
+) -> Tuple[Dict[str, object], Path, int]:
+    # Como el modo reemplazo de /upload: base nueva con solo el archivo, indices y cubo al final y activacion.
+    database = app.config["DATABASE"]
+    snapshot = new_snapshot_path(database)
+    building = snapshot_building_path(snapshot)
+    try:
+        build_db = open_connection(database, dataset=str(building))
+        try:
+            create_snapshot_schema(build_db)
+            build_db.commit()
+            summary = bulk_import_csv(build_db, path, workers, batch_size, progress)
+            for step in SNAPSHOT_FINISH_STEPS:
+                step(build_db)
+                build_db.commit()
+        finally:
+            build_db.close()
+    except BaseException:
+        discard_snapshot_build(snapshot)
+        raise
+    os.replace(building, snapshot)
+    version = activate_snapshot(database, snapshot)
+    return summary, snapshot, version
 
 
 @app.cli.command("init-db")
@@ -744,11 +4160,108 @@ def init_db_command():
     print("Base de datos inicializada.")
 
 
-if __name__ == "__main__":
-    with app.app_context():
-        init_db()
-    app.run(debug=True)
+@app.cli.command("rebuild-search-index")
+def rebuild_search_index_command():
+    init_db()
+    db = get_db()
+    total = rebuild_search_index(db)
+    db.commit()
+    print(f"Indice de busqueda reconstruido: {total} registros.")
+
+
+@app.cli.command("check-summary-cube")
+@click.option("--repair", is_flag=True, help="Reconstruye el cubo si no coincide.")
+def check_summary_cube_command(repair):
+    init_db()
+    db = get_db()
+    differences = diff_summary_cube(db)
+    for difference in differences[:50]:
+        print(" | ".join(str(value) for value in difference))
+    if not differences:
+        print("El cubo de resumen coincide con project_records.")
+        return
+    if repair:
+        total = rebuild_summary_cube(db)
+        db.commit()
+        print(f"Cubo reconstruido: {total} combinaciones.")
+        return
+    raise SystemExit(f"{len(differences)} diferencias entre el cubo y project_records.")
+
 
+@app.cli.command("snapshots")
+def snapshots_command():
+    init_db()
+    database = app.config["DATABASE"]
+    active = active_dataset_path(database)
+    if active is None:
+        print("* (base principal)")
+    for path in list_snapshots(database):
+        marker = "*" if active is not None and path.name == Path(active).name else " "
+        print(f"{marker} {path.name}  {path.stat().st_size / 1024 / 1024:.1f} MB")
+
+
+@app.cli.command("activate-snapshot")
+@click.argument("name")
+def activate_snapshot_command(name):
+    init_db()
+    database = app.config["DATABASE"]
+    snapshot = Path(database).with_name(name)
+    if snapshot not in list_snapshots(database):
+        raise SystemExit(f"No existe el snapshot {name}.")
+    version = activate_snapshot(database, snapshot)
+    print(f"Snapshot {name} activo (data_version {version}).")
+
+
+@app.cli.command("import-csv")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--workers", type=click.IntRange(min=1), default=os.cpu_count() or 1, show_default=True,
+              help="Procesos que leen y normalizan el CSV (con 1 se hace en el mismo proceso); la escritura va "
+                   "siempre en un solo proceso.")
+@click.option("--batch-size", type=click.IntRange(min=1), default=IMPORT_CLI_BATCH_SIZE, show_default=True,
+              help="Filas por transaccion.")
+@click.option("--replace/--merge", default=False,
+              help="--replace arma una base nueva solo con el archivo y la activa; --merge actualiza la actual.")
+def import_csv_command(path, workers, batch_size, replace):
+    init_db()
+    total_bytes = path.stat().st_size
+    last_report = 0.0
+
+    def report_progress(totals: Dict[str, int], position: int, elapsed: float) -> None:
+        nonlocal last_report
+        if elapsed - last_report < IMPORT_PROGRESS_SECONDS:
+            return
+        last_report = elapsed
+        print(
+            f"  {totals['rows_read']} filas  {position / 1024 / 1024:.0f}/{total_bytes / 1024 / 1024:.0f} MB  "
+            f"{totals['rows_read'] / elapsed:.0f} filas/s"
+        )
 
+    print(f"Importando {path} ({total_bytes / 1024 / 1024:.1f} MB) con {workers} procesos, lotes de {batch_size} filas.")
+    if replace:
+        summary, snapshot, version = bulk_import_snapshot(path, workers, batch_size, report_progress)
+    else:
+        summary = bulk_import_csv(get_db(), path, workers, batch_size, report_progress)
+    headers = summary["headers"]
+    if headers["missing_id"]:
+        print("El archivo no tiene columna id; todas las filas se rechazaron.")
+    if headers["unknown"]:
+        print(f"Columnas ignoradas: {', '.join(headers['unknown'])}")
+    for field, info in summary["date_formats"].items():
+        if info["label"]:
+            print(f"{field}: {info['label']}{' (dd/mm o mm/dd ambiguo)' if info['ambiguous'] else ''}")
+    print(
+        f"Filas leidas: {summary['rows_read']}  nuevas: {summary['inserted']}  actualizadas: {summary['updated']}  "
+        f"sin cambios: {summary['unchanged']}  rechazadas: {summary['rows_rejected']}"
+    )
+    print(
+        f"{summary['seconds']} s  {summary['rows_per_second']} filas/s  "
+        f"{summary['bytes'] / 1024 / 1024 / summary['seconds'] if summary['seconds'] else 0:.1f} MB/s"
+    )
+    if replace:
+        print(f"Snapshot {snapshot.name} activo (data_version {version}).")
 
 
+if __name__ == "__main__":
+    with app.app_context():
+        init_db()
+    app.run(debug=True)
@@ -0,0 +1,179 @@
+"""Ejecuta una carga de CSV mientras N procesos lectores consultan /api/summary.
+
+Cada lector es un proceso aparte, como un worker de gunicorn, con su propio cliente de
+prueba sobre la misma base. Termina con error si algun lector recibe "database is locked"
+o una respuesta distinta de 200 mientras el import escribe. La latencia de los lectores se
+reporta antes, durante y despues de la carga; con --mode snapshot la carga arma una base
+nueva y la activa al final.
+
+Uso: python benchmarks/bench_concurrency.py --readers 4 --size-mb 20 --rows 50000 --mode snapshot
+"""
+import argparse
+import json
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import populate, write_synthetic_csv
+
+from app import app, get_db, hash_password, init_db  # noqa: E402
+
+READER_FILTERS = [
+    {},
+    {"ubicacion": "OFICINAS LIMA"},
+    {"estado": "realizado"},
+    {"fecha_inicio": "2025-09-01", "fecha_fin": "2025-10-15"},
+    {"nombre": "quispe"},
+]
+
+
+def configure(workdir: Path, import_worker: bool) -> None:
+    app.config.update(
+        DATABASE=str(workdir / "bench.db"),
+        SUMMARY_CACHE_DATABASE=str(workdir / "summary_cache.db"),
+        IMPORTS_DIR=str(workdir / "imports"),
+        IMPORT_WORKER_ENABLED=import_worker,
+        IMPORT_POLL_SECONDS=0.2,
+        PROPAGATE_EXCEPTIONS=True,
+    )
+
+
+def logged_client(user_id: int):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = user_id
+    return client
+
+
+def percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_reader(workdir: Path, index: int) -> None:
+    configure(workdir, import_worker=False)
+    client = logged_client(1)
+    stop_file = workdir / "stop"
+    (workdir / f"ready-{index}").touch()
+    latencies = []
+    errors = []
+    lock_errors = 0
+    request_number = 0
+    while not stop_file.exists():
+        filters = READER_FILTERS[request_number % len(READER_FILTERS)]
+        request_number += 1
+        started_at = time.time()
+        start = time.perf_counter()
+        try:
+            response = client.get("/api/summary", query_string=filters)
+        except sqlite3.OperationalError as exc:
+            if "locked" in str(exc):
+                lock_errors += 1
+            else:
+                errors.append(str(exc))
+            continue
+        latencies.append((started_at, time.perf_counter() - start))
+        if response.status_code != 200:
+            errors.append(f"HTTP {response.status_code}")
+    print(json.dumps({
+        "requests": request_number,
+        "lock_errors": lock_errors,
+        "errors": errors[:5],
+        "error_count": len(errors),
+        "latencies": latencies,
+    }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--size-mb", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=50_000, help="Filas iniciales antes de la carga")
+    parser.add_argument("--mode", choices=("merge", "snapshot"), default="merge")
+    parser.add_argument("--idle-seconds", type=float, default=3.0, help="Medicion sin carga antes y despues")
+    parser.add_argument("--reader", nargs=2, metavar=("DIR", "INDEX"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.reader:
+        run_reader(Path(args.reader[0]), int(args.reader[1]))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        configure(workdir, import_worker=True)
+        with app.app_context():
+            init_db()
+            populate(args.rows)
+            db = get_db()
+            db.execute(
+                "INSERT INTO users (id, username, password_hash, role) VALUES (1, 'bench', ?, 'admin')",
+                (hash_password("bench-password"),),
+            )
+            db.commit()
+        csv_path = workdir / "carga.csv"
+        write_synthetic_csv(csv_path, args.size_mb)
+
+        readers = [
+            subprocess.Popen(
+                [sys.executable, __file__, "--reader", str(workdir), str(index)],
+                stdout=subprocess.PIPE,
+                text=True,
+            )
+            for index in range(args.readers)
+        ]
+        while not all((workdir / f"ready-{index}").exists() for index in range(args.readers)):
+            time.sleep(0.05)
+        time.sleep(args.idle_seconds)
+
+        client = logged_client(1)
+        upload_started = time.time()
+        start = time.perf_counter()
+        with csv_path.open("rb") as handle:
+            response = client.post("/upload", data={"file": (handle, "carga.csv"), "mode": args.mode})
+        job_id = int(response.headers["Location"].rsplit("job=", 1)[1])
+        while True:
+            job = client.get(f"/api/imports/{job_id}").get_json()
+            if job["status"] in ("done", "failed"):
+                break
+            time.sleep(0.2)
+        elapsed = time.perf_counter() - start
+        upload_finished = time.time()
+        time.sleep(args.idle_seconds)
+        (workdir / "stop").touch()
+        results = [json.loads(reader.communicate()[0].strip().splitlines()[-1]) for reader in readers]
+
+    samples = [sample for result in results for sample in result["latencies"]]
+    lock_errors = sum(result["lock_errors"] for result in results)
+    error_count = sum(result["error_count"] for result in results)
+    print(
+        f"Import ({args.mode}): {job['status']}  filas={job['rows_processed']}  {elapsed:.1f} s  "
+        f"{job['rows_processed'] / elapsed:.0f} filas/s"
+    )
+    print(f"Lectores: {args.readers}  consultas={sum(result['requests'] for result in results)}")
+    phases = {
+        "antes": [latency for started, latency in samples if started < upload_started],
+        "durante": [latency for started, latency in samples if upload_started <= started < upload_finished],
+        "despues": [latency for started, latency in samples if started >= upload_finished],
+    }
+    for phase, latencies in phases.items():
+        print(
+            f"  {phase:<8} consultas={len(latencies):>5}  p50={percentile(latencies, 0.5) * 1000:7.1f} ms  "
+            f"p95={percentile(latencies, 0.95) * 1000:7.1f} ms  max={max(latencies, default=0) * 1000:7.1f} ms"
+        )
+    print(f"Errores de bloqueo: {lock_errors}  otros errores: {error_count}")
+    for result in results:
+        for error in result["errors"]:
+            print(f"  {error}")
+    if job["status"] != "done":
+        raise SystemExit(f"El import termino con estado {job['status']}: {job.get('error')}")
+    if lock_errors or error_count:
+        raise SystemExit("Los lectores fallaron mientras se ejecutaba la carga.")
+
+
+if __name__ == "__main__":
+    main()
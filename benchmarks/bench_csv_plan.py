@@ -0,0 +1,91 @@
+"""Mide filas por segundo al convertir un CSV: csv.DictReader fila a fila contra CsvRowPlan.
+
+El camino original resuelve normalize_header en cada celda y prueba formatos de fecha por
+celda; el nuevo compila el mapeo una vez desde el encabezado y usa csv.reader posicional.
+Verifica que ambos produzcan las mismas filas y mide tambien la ingesta completa.
+
+Uso: python benchmarks/bench_csv_plan.py --size-mb 20 --repeat 3
+"""
+import argparse
+import csv
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from bench_dates import legacy_normalize_date
+from common import time_call, write_synthetic_csv
+
+from app import (  # noqa: E402
+    CSV_FIELD_MAP,
+    DateNormalizer,
+    app,
+    get_db,
+    ingest_csv_stream,
+    init_db,
+    normalize_header,
+    read_csv_plan,
+)
+
+
+def legacy_map_csv_row(raw_row: Dict[str, str]) -> Optional[Dict[str, str]]:
+    normalized_row: Dict[str, str] = {}
+    for header, value in raw_row.items():
+        key = CSV_FIELD_MAP.get(normalize_header(header))
+        if not key:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        normalized_row[key] = value
+    if not normalized_row.get("record_id"):
+        return None
+    for field in ("estado", "estado_coordinacion", "estado_upgrade"):
+        if field in normalized_row and isinstance(normalized_row[field], str):
+            normalized_row[field] = normalized_row[field].upper()
+    for field in ("fecha_estado", "fecha_programada", "fecha_ejecucion"):
+        if field in normalized_row:
+            normalized_row[field] = legacy_normalize_date(normalized_row[field])
+    return normalized_row
+
+
+def legacy_rows(csv_path: Path) -> List[Dict[str, str]]:
+    with csv_path.open(encoding="utf-8-sig", newline="") as handle:
+        return [row for row in map(legacy_map_csv_row, csv.DictReader(handle)) if row is not None]
+
+
+def planned_rows(csv_path: Path) -> List[Dict[str, str]]:
+    with csv_path.open(encoding="utf-8-sig", newline="") as handle:
+        _plan, rows = read_csv_plan(handle)
+        return [row for row in DateNormalizer().normalize_rows(rows) if row is not None]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "synthetic.csv"
+        rows = write_synthetic_csv(csv_path, args.size_mb)
+        if legacy_rows(csv_path) != planned_rows(csv_path):
+            raise SystemExit("Las filas convertidas difieren entre ambas implementaciones")
+        legacy_time = time_call(lambda: legacy_rows(csv_path), args.repeat)
+        plan_time = time_call(lambda: planned_rows(csv_path), args.repeat)
+        print(f"Filas: {rows} ({args.size_mb} MB)")
+        print(f"{'DictReader':<12} {rows / legacy_time:>10.0f} filas/s")
+        print(f"{'CsvRowPlan':<12} {rows / plan_time:>10.0f} filas/s  x{legacy_time / plan_time:5.1f}")
+
+        app.config["DATABASE"] = str(Path(tmp) / "bench.db")
+        with app.app_context():
+            init_db()
+            start = time.perf_counter()
+            with csv_path.open("rb") as handle:
+                summary = ingest_csv_stream(get_db(), handle, args.batch_size)
+            elapsed = time.perf_counter() - start
+        print(f"{'Ingesta':<12} {summary['total'] / elapsed:>10.0f} filas/s (conversion + escritura en SQLite)")
+
+
+if __name__ == "__main__":
+    main()
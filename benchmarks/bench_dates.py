@@ -0,0 +1,120 @@
+"""Compara la normalizacion de fechas por columna contra el normalize_date celda a celda original.
+
+Genera columnas sinteticas con los formatos que llegan en los CSV de coordinacion,
+verifica que ambas implementaciones den el mismo resultado y mide el costo por celda.
+
+Uso: python benchmarks/bench_dates.py --rows 200000 --repeat 3
+"""
+import argparse
+import random
+from typing import Dict, List
+
+from common import time_call
+
+from app import DateNormalizer  # noqa: E402
+
+
+def legacy_normalize_date(value: str) -> str:
+    if not value:
+        return ""
+    value = value.strip()
+    if not value:
+        return ""
+    from datetime import datetime
+
+    candidates = [value]
+    for separator in (" ", "T"):
+        if separator in value:
+            head = value.split(separator, 1)[0].strip()
+            if head:
+                candidates.append(head)
+
+    for candidate in list(candidates):
+        if len(candidate) >= 10:
+            slice_ = candidate[:10]
+            if len(slice_) == 10 and slice_[4] in ("-", "/", ".") and slice_ not in candidates:
+                candidates.append(slice_)
+
+    unique_candidates = []
+    for candidate in candidates:
+        candidate = candidate.strip()
+        if candidate and candidate not in unique_candidates:
+            unique_candidates.append(candidate)
+
+    for candidate in unique_candidates:
+        try:
+            dt = datetime.fromisoformat(candidate)
+        except ValueError:
+            pass
+        else:
+            return dt.date().isoformat()
+
+    patterns = [
+        "%Y-%m-%d",
+        "%Y/%m/%d",
+        "%Y.%m.%d",
+        "%d/%m/%Y",
+        "%d-%m-%Y",
+        "%m/%d/%Y",
+        "%m-%d-%Y",
+    ]
+    for candidate in unique_candidates:
+        for pattern in patterns:
+            try:
+                dt = datetime.strptime(candidate, pattern)
+            except ValueError:
+                continue
+            return dt.strftime("%Y-%m-%d")
+
+    return value
+
+
+def synthetic_column(kind: str, rows: int, rng: random.Random) -> List[str]:
+    values = []
+    for _ in range(rows):
+        day, month = rng.randint(1, 28), rng.randint(8, 12)
+        if rng.random() < 0.05:
+            values.append("")
+        elif rng.random() < 0.01:
+            values.append("pendiente")
+        elif kind == "dd/mm/aaaa":
+            values.append(f"{day:02d}/{month:02d}/2025")
+        elif kind == "aaaa-mm-dd hh:mm":
+            values.append(f"2025-{month:02d}-{day:02d} {rng.randint(8, 18):02d}:{rng.choice((0, 30)):02d}")
+        else:
+            values.append(f"2025-{month:02d}-{day:02d}")
+    return values
+
+
+def normalize_column(values: List[str]) -> List[str]:
+    dates = DateNormalizer(fields=("valor",))
+    return [row["valor"] for row in dates.normalize_rows({"valor": value} for value in values)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(1401)
+    print(f"Celdas por columna: {args.rows}")
+    for kind in ("dd/mm/aaaa", "aaaa-mm-dd", "aaaa-mm-dd hh:mm"):
+        values = synthetic_column(kind, args.rows, rng)
+        if normalize_column(values) != [legacy_normalize_date(value) for value in values]:
+            raise SystemExit(f"[{kind}] los resultados difieren entre ambas implementaciones")
+        dates = DateNormalizer(fields=("valor",))
+        for _ in dates.normalize_rows({"valor": value} for value in values):
+            pass
+        report: Dict[str, object] = dates.report()["valor"]
+        legacy_time = time_call(lambda: [legacy_normalize_date(value) for value in values], args.repeat)
+        column_time = time_call(lambda: normalize_column(values), args.repeat)
+        print(
+            f"{kind:<18} legacy={legacy_time / args.rows * 1e9:7.0f} ns/celda  "
+            f"columna={column_time / args.rows * 1e9:7.0f} ns/celda  x{legacy_time / column_time:5.1f}  "
+            f"formato={report['label']} fallback={report['fallback']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Mide /api/export: tiempo, tamano y memoria pico de exportar la flota completa y una filtrada.
+
+Compara el stream por lotes de fetchmany contra armar el CSV entero con fetchall, que es lo que
+haria una exportacion ingenua. La memoria se mide con tracemalloc (solo lo asignado por Python;
+la cache de paginas de SQLite queda aparte y no depende del tamano del resultado).
+
+Uso: python benchmarks/bench_export.py --rows 200000
+"""
+import argparse
+import csv
+import io
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from common import populate
+
+from app import (  # noqa: E402
+    PROJECT_COLUMNS,
+    TEMPLATE_HEADER,
+    app,
+    build_where_clause,
+    get_db,
+    get_read_db,
+    init_db,
+    parse_summary_filters,
+)
+
+CASES = {"completo": {}, "ubicacion": {"ubicacion": "OFICINAS LIMA"}}
+
+
+def export_fetchall(filters) -> bytes:
+    with app.app_context():
+        where, params = build_where_clause(parse_summary_filters(filters))
+        rows = get_read_db().execute(f"SELECT {', '.join(PROJECT_COLUMNS)} FROM project_records{where}", params).fetchall()
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(TEMPLATE_HEADER)
+        writer.writerows(rows)
+        return buffer.getvalue().encode("utf-8")
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = func()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return size, seconds, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app.config.update(
+            DATABASE=str(Path(tmp) / "bench.db"),
+            SUMMARY_CACHE_DATABASE=str(Path(tmp) / "summary_cache.db"),
+            METRICS_DATABASE=str(Path(tmp) / "metrics.db"),
+            IMPORT_WORKER_ENABLED=False,
+        )
+        with app.app_context():
+            init_db()
+            populate(args.rows)
+            db = get_db()
+            db.execute("INSERT INTO users (id, username, password_hash, role) VALUES (1, 'bench', '', 'admin')")
+            db.commit()
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["user_id"] = 1
+
+        def stream(filters) -> int:
+            response = client.get("/api/export", query_string=filters, buffered=False)
+            size = sum(len(chunk) for chunk in response.response)
+            response.close()
+            return size
+
+        print(f"Filas: {args.rows}")
+        for name, filters in CASES.items():
+            for label, func in (("stream", lambda: stream(filters)), ("fetchall", lambda: len(export_fetchall(filters)))):
+                size, seconds, peak = measure(func)
+                print(
+                    f"{name:<10} {label:<9} {size / 1024 / 1024:8.1f} MB  {seconds * 1000:8.1f} ms  "
+                    f"pico={peak / 1024 / 1024:8.1f} MB"
+                )
+
+
+if __name__ == "__main__":
+    main()
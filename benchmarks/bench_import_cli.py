@@ -0,0 +1,73 @@
+"""Mide `flask import-csv` (bulk_import_csv) con 1, 2, 4 y 8 procesos contra la carga de /upload.
+
+Genera una flota de --rows filas con fleet.py y la importa en una base vacia con cada cantidad
+de procesos (--replace arma un snapshot como el modo reemplazo). Reporta filas/s, MB/s y la
+aceleracion contra /upload (ingest_csv_stream) y contra un proceso, que parsea en el mismo proceso
+que escribe. La escritura es siempre de un solo proceso, asi que la aceleracion tiene como techo
+el tiempo del escritor.
+
+Uso: python benchmarks/bench_import_cli.py --rows 200000 --workers 1,2,4,8
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from fleet import write_fleet_csv
+
+from app import app, bulk_import_csv, bulk_import_snapshot, get_db, ingest_csv_stream, init_db  # noqa: E402
+
+
+def use_database(directory: Path) -> None:
+    directory.mkdir()
+    app.config.update(
+        DATABASE=str(directory / "bench.db"),
+        SUMMARY_CACHE_DATABASE=str(directory / "summary_cache.db"),
+        METRICS_DATABASE=str(directory / "metrics.db"),
+        IMPORT_WORKER_ENABLED=False,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--workers", default="1,2,4,8", help="Cantidades de procesos separadas por coma")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--replace", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = write_fleet_csv(Path(tmp) / "flota.csv", args.rows)
+        megabytes = csv_path.stat().st_size / 1024 / 1024
+        print(f"Filas: {args.rows}  CSV: {megabytes:.1f} MB  CPUs: {os.cpu_count()}  lote: {args.batch_size}")
+
+        use_database(Path(tmp) / "upload")
+        with app.app_context():
+            init_db()
+            start = time.perf_counter()
+            with csv_path.open("rb") as handle:
+                ingest_csv_stream(get_db(), handle, args.batch_size)
+            baseline = time.perf_counter() - start
+        print(f"/upload      {baseline:7.2f} s  {args.rows / baseline:9.0f} filas/s  {megabytes / baseline:6.1f} MB/s")
+
+        single = None
+        for workers in (int(value) for value in args.workers.split(",")):
+            use_database(Path(tmp) / f"cli-{workers}")
+            with app.app_context():
+                init_db()
+                start = time.perf_counter()
+                if args.replace:
+                    bulk_import_snapshot(csv_path, workers, args.batch_size)
+                else:
+                    bulk_import_csv(get_db(), csv_path, workers, args.batch_size)
+                seconds = time.perf_counter() - start
+            single = single or seconds
+            print(
+                f"{workers} procesos  {seconds:7.2f} s  {args.rows / seconds:9.0f} filas/s  "
+                f"{megabytes / seconds:6.1f} MB/s  x{baseline / seconds:4.2f} vs /upload  x{single / seconds:4.2f} vs 1 proceso"
+            )
+
+
+if __name__ == "__main__":
+    main()
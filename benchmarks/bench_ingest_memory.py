@@ -0,0 +1,81 @@
+"""Verifica que la ingesta de CSV use memoria acotada sin importar el tamano del archivo.
+
+Genera archivos sinteticos de cada tamano, los procesa en un proceso hijo con
+ingest_csv_stream y compara el pico de RSS. Termina con error si el pico del archivo
+mas grande supera al del mas chico en mas de --tolerance-mb. El mmap y la cache de paginas de SQLite tambien
+cuentan en el RSS; para medir solo la ingesta usa BANBIF_SQLITE_MMAP_MB=0 y una
+BANBIF_SQLITE_CACHE_MB chica.
+
+Uso: python benchmarks/bench_ingest_memory.py --sizes-mb 10 500
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import write_synthetic_csv
+
+from app import app, get_db, ingest_csv_stream, init_db  # noqa: E402
+
+
+def run_child(csv_path: str, batch_size: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        app.config["DATABASE"] = str(Path(tmp) / "bench.db")
+        with app.app_context():
+            init_db()
+            baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            start = time.perf_counter()
+            with open(csv_path, "rb") as handle:
+                summary = ingest_csv_stream(get_db(), handle, batch_size)
+            elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "rows": summary["total"],
+        "seconds": elapsed,
+        "baseline_kb": baseline_kb,
+        "peak_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[10, 500])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--tolerance-mb", type=float, default=32.0)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.batch_size)
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size_mb in sorted(args.sizes_mb):
+            csv_path = Path(tmp) / f"synthetic_{size_mb}mb.csv"
+            write_synthetic_csv(csv_path, size_mb)
+            output = subprocess.run(
+                [sys.executable, __file__, "--child", str(csv_path), "--batch-size", str(args.batch_size)],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            csv_path.unlink()
+            results.append((size_mb, result))
+            print(
+                f"{size_mb:>6} MB  filas={result['rows']:>9}  {result['rows'] / result['seconds']:>9.0f} filas/s  "
+                f"rss_base={result['baseline_kb'] / 1024:7.1f} MB  rss_pico={result['peak_kb'] / 1024:7.1f} MB"
+            )
+
+    growth_mb = (results[-1][1]["peak_kb"] - results[0][1]["peak_kb"]) / 1024
+    print(f"Diferencia de pico entre {results[0][0]} MB y {results[-1][0]} MB: {growth_mb:.1f} MB")
+    if growth_mb > args.tolerance_mb:
+        raise SystemExit(f"El pico de memoria crece con el archivo (tolerancia {args.tolerance_mb} MB).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Simula el pico de inicios de sesion del turno de la manana contra W workers.
+
+Los workers son procesos que toman peticiones de una cola compartida, como los workers sync
+de gunicorn: una rafaga de --logins inicios de sesion llega junto con consultas periodicas a
+/api/summary. Se reporta cuanto esperan las consultas del dashboard (cola + respuesta) y
+cuantos logins se aceptan o se rechazan con 503. Con --slots igual a --workers el hashing no
+tiene limite, como antes de los cupos compartidos.
+
+Uso: python benchmarks/bench_login.py --workers 4 --logins 60 --slots 2
+"""
+import argparse
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+from common import populate
+
+from app import app, get_db, hash_password, init_db  # noqa: E402
+
+PASSWORD = "turno-manana-2025"
+
+
+def percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def worker(requests, results) -> None:
+    dashboard = app.test_client()
+    with dashboard.session_transaction() as session:
+        session["user_id"] = 1
+    while True:
+        item = requests.get()
+        if item is None:
+            return
+        kind, argument, queued_at = item
+        if kind == "login":
+            response = app.test_client().post("/login", data={"username": argument, "password": PASSWORD})
+        else:
+            response = dashboard.get("/api/summary", query_string={"nombre": argument})
+        results.put((kind, response.status_code, time.perf_counter() - queued_at))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--logins", type=int, default=60)
+    parser.add_argument("--slots", type=int, default=2)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--summary-interval", type=float, default=0.05, help="Segundos entre consultas al resumen")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("fork")
+    with tempfile.TemporaryDirectory() as tmp:
+        app.config.update(
+            DATABASE=str(Path(tmp) / "bench.db"),
+            SUMMARY_CACHE_DATABASE=str(Path(tmp) / "summary_cache.db"),
+            IMPORT_WORKER_ENABLED=False,
+            AUTH_HASH_SLOTS=args.slots,
+        )
+        with app.app_context():
+            init_db()
+            populate(args.rows)
+            db = get_db()
+            password_hash = hash_password(PASSWORD)
+            db.executemany(
+                "INSERT INTO users (username, password_hash, role) VALUES (?, ?, 'standard')",
+                [(f"usuario{index}", password_hash) for index in range(args.logins)],
+            )
+            db.commit()
+
+        requests = context.Queue()
+        results = context.Queue()
+        processes = [context.Process(target=worker, args=(requests, results)) for _ in range(args.workers)]
+        for process in processes:
+            process.start()
+
+        start = time.perf_counter()
+        for index in range(args.logins):
+            requests.put(("login", f"usuario{index}", time.perf_counter()))
+        # El dashboard sigue consultando mientras dura la rafaga; cada nombre distinto evita la cache de respuestas.
+        summaries = 0
+        collected = []
+        while len([item for item in collected if item[0] == "login"]) < args.logins:
+            requests.put(("summary", f"q{summaries}", time.perf_counter()))
+            summaries += 1
+            time.sleep(args.summary_interval)
+            while not results.empty():
+                collected.append(results.get())
+        for _ in processes:
+            requests.put(None)
+        while len(collected) < args.logins + summaries:
+            collected.append(results.get())
+        elapsed = time.perf_counter() - start
+        for process in processes:
+            process.join()
+
+    logins = [item for item in collected if item[0] == "login"]
+    summary_latencies = [latency for kind, _status, latency in collected if kind == "summary"]
+    accepted = [latency for _kind, status, latency in logins if status == 302]
+    rejected = [latency for _kind, status, latency in logins if status == 503]
+    print(f"Workers: {args.workers}  cupos de hashing: {args.slots}  rafaga: {args.logins} logins en {elapsed:.1f} s")
+    print(
+        f"Logins aceptados={len(accepted)}  p50={percentile(accepted, 0.5) * 1000:.0f} ms  "
+        f"p95={percentile(accepted, 0.95) * 1000:.0f} ms  rechazados (503)={len(rejected)}  "
+        f"p50={percentile(rejected, 0.5) * 1000:.0f} ms"
+    )
+    print(
+        f"Dashboard consultas={len(summary_latencies)}  p50={percentile(summary_latencies, 0.5) * 1000:.0f} ms  "
+        f"p95={percentile(summary_latencies, 0.95) * 1000:.0f} ms  max={max(summary_latencies, default=0) * 1000:.0f} ms"
+    )
+    failed = [status for kind, status, _latency in collected if kind == "summary" and status != 200]
+    if failed:
+        raise SystemExit(f"{len(failed)} consultas del dashboard fallaron durante la rafaga.")
+
+
+if __name__ == "__main__":
+    main()
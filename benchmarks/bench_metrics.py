@@ -0,0 +1,89 @@
+"""Mide el costo de la instrumentacion de /metrics en las rutas y consultas mas usadas.
+
+Corre lo mismo con METRICS_ENABLED apagado y encendido, cada uno sobre su propia copia de la
+base para que el pool abra conexiones nuevas: /api/summary sin caches, una pagina de
+/api/records y un recorrido completo de project_records (el peor caso: se cuenta cada fila).
+Al final muestra un extracto de /metrics.
+
+Uso: python benchmarks/bench_metrics.py --rows 50000 --repeat 20 --rounds 3
+"""
+import argparse
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from common import populate, time_call
+
+from app import _facet_rows_cache, app, get_db, get_read_db, init_db  # noqa: E402
+
+SUMMARY_FILTERS = {"ubicacion": "OFICINAS LIMA", "estado": "realizado"}
+
+
+def run_cases(client, repeat: int):
+    def summary() -> None:
+        _facet_rows_cache.clear()
+        client.get("/api/summary", query_string=SUMMARY_FILTERS)
+
+    def scan() -> None:
+        with app.app_context():
+            for _row in get_read_db().execute("SELECT record_id, estado FROM project_records"):
+                pass
+
+    return {
+        "/api/summary": time_call(summary, repeat),
+        "/api/records": time_call(lambda: client.get("/api/records", query_string={"page_size": 200}), repeat),
+        "recorrido": time_call(scan, max(1, repeat // 5)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp) / "base.db"
+        app.config.update(
+            DATABASE=str(base),
+            SUMMARY_CACHE_DATABASE=str(Path(tmp) / "summary_cache.db"),
+            SUMMARY_CACHE_MAX_ENTRIES=0,
+            METRICS_DATABASE=str(Path(tmp) / "metrics.db"),
+            IMPORT_WORKER_ENABLED=False,
+            METRICS_ENABLED=False,
+        )
+        with app.app_context():
+            init_db()
+            populate(args.rows)
+            db = get_db()
+            db.execute("INSERT INTO users (id, username, password_hash, role) VALUES (1, 'bench', '', 'admin')")
+            db.commit()
+        for enabled in (False, True):
+            with sqlite3.connect(base) as source, sqlite3.connect(Path(tmp) / f"metrics-{int(enabled)}.db") as target:
+                source.backup(target)
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["user_id"] = 1
+        # Se alternan los modos por rondas y se queda el mejor tiempo: el ruido de la maquina afecta a ambos.
+        results = {False: {}, True: {}}
+        for _round in range(args.rounds):
+            for enabled in (False, True):
+                app.config.update(DATABASE=str(Path(tmp) / f"metrics-{int(enabled)}.db"), METRICS_ENABLED=enabled)
+                for name, seconds in run_cases(client, args.repeat).items():
+                    results[enabled][name] = min(seconds, results[enabled].get(name, seconds))
+        metrics_text = client.get("/metrics").get_data(as_text=True)
+
+    print(f"Filas: {args.rows}")
+    for name, off in results[False].items():
+        on = results[True][name]
+        print(f"{name:<14} sin metricas={off * 1000:8.2f} ms  con metricas={on * 1000:8.2f} ms  {(on / off - 1) * 100:+6.1f} %")
+    lines = [line for line in metrics_text.splitlines() if not line.startswith("#")]
+    print(f"/metrics: {len(lines)} series, {len(metrics_text.encode('utf-8')) / 1024:.1f} KB")
+    for line in lines:
+        if line.startswith(("banbif_http_requests_total", "banbif_sql_rows_total")):
+            print(f"  {line}")
+
+
+if __name__ == "__main__":
+    main()
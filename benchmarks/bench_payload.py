@@ -0,0 +1,84 @@
+"""Compara el formato de filas contra el columnar y la compresion gzip/brotli en las listas de registros.
+
+Para cada pagina de /api/records y para el resumen filtrado por nombre reporta los bytes que
+viajan con cada formato y codificacion, el tiempo de armar y serializar el JSON (en el resumen
+incluye las consultas) y el de comprimirlo. brotli es opcional: sin el paquete se omite.
+
+Uso: python benchmarks/bench_payload.py --rows 50000 --page-size 500
+"""
+import argparse
+import gzip
+import json
+import tempfile
+from pathlib import Path
+
+from common import populate, time_call
+
+from app import (  # noqa: E402
+    RECORD_FORMATS,
+    app,
+    brotli,
+    build_summary_payload,
+    encode_records,
+    fetch_records_page,
+    get_db,
+    init_db,
+    parse_summary_filters,
+)
+
+
+def compressors():
+    yield "identity", lambda body: body
+    yield "gzip", lambda body: gzip.compress(body, compresslevel=app.config["RESPONSE_GZIP_LEVEL"], mtime=0)
+    if brotli is not None:
+        yield "br", lambda body: brotli.compress(body, quality=app.config["RESPONSE_BROTLI_QUALITY"])
+
+
+def report(name: str, build, repeat: int) -> None:
+    print(name)
+    for record_format in RECORD_FORMATS:
+        payload = build(record_format)
+        body = json.dumps(payload).encode("utf-8")
+        serialize = time_call(lambda: json.dumps(build(record_format)).encode("utf-8"), repeat)
+        for encoding, compress in compressors():
+            compressed = compress(body)
+            seconds = time_call(lambda: compress(body), repeat)
+            print(
+                f"  {record_format:<9} {encoding:<9} {len(compressed) / 1024:9.1f} KB  "
+                f"armar+json={serialize * 1000:7.2f} ms  comprimir={seconds * 1000:6.2f} ms"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app.config.update(
+            DATABASE=str(Path(tmp) / "bench.db"),
+            SUMMARY_CACHE_DATABASE=str(Path(tmp) / "summary_cache.db"),
+            IMPORT_WORKER_ENABLED=False,
+        )
+        with app.app_context():
+            init_db()
+            populate(args.rows)
+            db = get_db()
+            records, _cursor = fetch_records_page(db, parse_summary_filters({}), args.page_size)
+            report(
+                f"/api/records ({len(records)} filas)",
+                lambda record_format: {"records": encode_records(records, record_format)},
+                args.repeat,
+            )
+            filters = parse_summary_filters({"nombre": "quispe"})
+            report(
+                "/api/summary?nombre=quispe",
+                lambda record_format: build_summary_payload(db, filters, record_format=record_format),
+                args.repeat,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Compara los filtros de nombre/hostname con LIKE sobre project_records contra el indice FTS5 trigram.
+
+Uso: python benchmarks/bench_search.py --rows 100000 1000000 --repeat 5
+"""
+import argparse
+import tempfile
+from pathlib import Path
+
+from common import populate, time_call
+
+from app import app, fold_search_text, get_db, init_db  # noqa: E402
+
+SEARCH_CASES = [
+    ("nombre", "nombre_completo", "quispe"),
+    ("nombre", "nombre_completo", "perez nunez"),
+    ("nombre", "nombre_completo", "ez"),
+    ("hostname", "hostname", "op12"),
+]
+
+
+def legacy_count(column: str, term: str) -> int:
+    if column == "nombre_completo":
+        condition = "UPPER(nombre_completo) LIKE UPPER(?)"
+    else:
+        condition = "hostname LIKE ?"
+    return get_db().execute(f"SELECT COUNT(*) FROM project_records WHERE {condition}", (f"%{term}%",)).fetchone()[0]
+
+
+def fts_count(column: str, term: str) -> int:
+    return get_db().execute(
+        "SELECT COUNT(*) FROM project_records WHERE id IN "
+        f"(SELECT rowid FROM project_records_search WHERE {column} LIKE ?)",
+        (f"%{fold_search_text(term)}%",),
+    ).fetchone()[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            app.config["DATABASE"] = str(Path(tmp) / "bench.db")
+            with app.app_context():
+                init_db()
+                populate(rows)
+                print(f"Filas: {rows}")
+                for label, column, term in SEARCH_CASES:
+                    legacy_time = time_call(lambda: legacy_count(column, term), args.repeat)
+                    fts_time = time_call(lambda: fts_count(column, term), args.repeat)
+                    print(
+                        f"  {label:<9} {term!r:<14} coincidencias legacy={legacy_count(column, term):>8} "
+                        f"fts={fts_count(column, term):>8}  legacy={legacy_time * 1000:8.1f} ms  "
+                        f"fts={fts_time * 1000:8.1f} ms"
+                    )
+
+
+if __name__ == "__main__":
+    main()
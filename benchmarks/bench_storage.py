@@ -0,0 +1,74 @@
+"""Mide el tamano del archivo SQLite y la latencia de /api/summary con N filas sinteticas.
+
+Tras poblar la base se ejecuta VACUUM para que el tamano refleje solo los datos y los
+indices. La latencia se mide sobre build_summary_payload sin la cache de respuestas ni la
+memoizacion de facetas, que ocultarian el costo de las consultas.
+
+Uso: python benchmarks/bench_storage.py --rows 1000000 --repeat 5
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from common import populate, time_call
+
+from app import _facet_rows_cache, app, build_summary_payload, get_db, init_db, parse_summary_filters  # noqa: E402
+
+FILTER_CASES = {
+    "sin_filtros": {},
+    "ubicacion": {"ubicacion": "OFICINAS LIMA"},
+    "estado": {"estado": "realizado"},
+    "rango_fechas": {"fecha_inicio": "2025-09-01", "fecha_fin": "2025-10-15"},
+    "sede_y_fechas": {"nom_sede": "Surco", "fecha_inicio": "2025-10-01"},
+    "nombre": {"nombre": "quispe"},
+    "hostname": {"hostname": "MINORISTAOP12"},
+}
+
+
+def object_sizes(path: Path):
+    db = sqlite3.connect(path)
+    try:
+        rows = db.execute(
+            "SELECT name, SUM(pgsize) FROM dbstat GROUP BY name ORDER BY 2 DESC"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    finally:
+        db.close()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="Objetos mas grandes a listar (requiere dbstat)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        app.config["DATABASE"] = str(path)
+        with app.app_context():
+            init_db()
+            populate(args.rows)
+            get_db().execute("VACUUM")
+            # En WAL el VACUUM queda en el -wal hasta el checkpoint.
+            get_db().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            print(f"Filas: {args.rows}  archivo: {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+            for name, size in object_sizes(path)[: args.top]:
+                print(f"  {name:<48} {size / 1024 / 1024:8.1f} MB")
+
+            def summary(filters):
+                _facet_rows_cache.clear()
+                return build_summary_payload(get_db(), filters)
+
+            for name, raw in FILTER_CASES.items():
+                filters = parse_summary_filters(raw)
+                elapsed = time_call(lambda: summary(filters), args.repeat)
+                print(f"{name:<14} {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""Mide el costo por conexion del stream SSE (/api/stream) con cientos de suscriptores.
+
+Levanta gunicorn con un worker gthread, como en entrypoint.sh, abre --subscribers conexiones
+con sockets crudos y mide en el proceso worker la memoria (RSS) y el CPU por conexion en
+reposo. Luego escribe registros y mide cuanto tarda el aviso en llegar a todos. Termina con
+error si alguna conexion es rechazada, no recibe el aviso o no se libera al cerrarse.
+
+Uso: python benchmarks/bench_stream.py --subscribers 300 --idle-seconds 10
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import selectors
+import signal
+import socket
+import tempfile
+import time
+from pathlib import Path
+
+from common import populate
+from gunicorn.app.base import BaseApplication
+
+from app import app, get_db, hash_password, ingest_rows, init_db  # noqa: E402
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+class BenchServer(BaseApplication):
+    def __init__(self, options) -> None:
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return app
+
+
+def percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def worker_pid(arbiter_pid: int) -> int:
+    children = Path(f"/proc/{arbiter_pid}/task/{arbiter_pid}/children")
+    while True:
+        pids = children.read_text().split()
+        if pids:
+            return int(pids[0])
+        time.sleep(0.05)
+
+
+def rss_kb(pid: int) -> int:
+    for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1])
+    return 0
+
+
+def cpu_seconds(pid: int) -> float:
+    fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+def session_cookie() -> str:
+    serializer = app.session_interface.get_signing_serializer(app)
+    return f"{app.config.get('SESSION_COOKIE_NAME', 'session')}={serializer.dumps({'user_id': 1})}"
+
+
+def http_get(port: int, path: str, cookie: str) -> bytes:
+    with socket.create_connection(("127.0.0.1", port)) as conn:
+        conn.sendall(f"GET {path} HTTP/1.1\r\nHost: bench\r\nCookie: {cookie}\r\nConnection: close\r\n\r\n".encode())
+        chunks = []
+        while True:
+            chunk = conn.recv(65536)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+
+class Subscriber:
+    def __init__(self, port: int, cookie: str) -> None:
+        self.sock = socket.create_connection(("127.0.0.1", port))
+        self.sock.sendall(
+            f"GET /api/stream HTTP/1.1\r\nHost: bench\r\nCookie: {cookie}\r\nAccept: text/event-stream\r\n\r\n".encode()
+        )
+        self.sock.setblocking(False)
+        self.buffer = b""
+        self.status = None
+        self.ready = False
+        self.seq = None
+        self.received_at = None
+
+    def feed(self, target_seq) -> None:
+        chunk = self.sock.recv(65536)
+        if not chunk:
+            self.status = self.status or "cerrado"
+            return
+        self.buffer += chunk
+        if self.status is None and b"\r\n" in self.buffer:
+            self.status = self.buffer.split(b"\r\n", 1)[0].split(b" ")[1].decode()
+        if b"retry:" in self.buffer:
+            self.ready = True
+        for line in self.buffer.split(b"\n"):
+            if line.startswith(b"data: "):
+                self.seq = json.loads(line[6:])["seq"]
+                if target_seq is not None and self.seq >= target_seq and self.received_at is None:
+                    self.received_at = time.perf_counter()
+        self.buffer = self.buffer[self.buffer.rfind(b"\n") + 1:]
+
+
+def pump(selector, subscribers, until, timeout: float, target_seq=None) -> bool:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if until(subscribers):
+            return True
+        for key, _mask in selector.select(0.1):
+            key.data.feed(target_seq)
+    return until(subscribers)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--subscribers", type=int, default=300)
+    parser.add_argument("--idle-seconds", type=float, default=10.0)
+    parser.add_argument("--heartbeat", type=float, default=5.0, help="Segundos entre pings del stream")
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--changed-rows", type=int, default=200)
+    parser.add_argument("--port", type=int, default=5099)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app.config.update(
+            DATABASE=str(Path(tmp) / "bench.db"),
+            SUMMARY_CACHE_DATABASE=str(Path(tmp) / "summary_cache.db"),
+            IMPORT_WORKER_ENABLED=False,
+            STREAM_MAX_SUBSCRIBERS=args.subscribers,
+            STREAM_HEARTBEAT_SECONDS=args.heartbeat,
+            SECRET_KEY="bench-stream",
+        )
+        with app.app_context():
+            init_db()
+            populate(args.rows)
+            db = get_db()
+            db.execute(
+                "INSERT INTO users (id, username, password_hash, role) VALUES (1, 'bench', ?, 'admin')",
+                (hash_password("bench-password"),),
+            )
+            db.commit()
+
+        options = {
+            "bind": f"127.0.0.1:{args.port}",
+            "workers": 1,
+            "worker_class": "gthread",
+            "threads": args.subscribers + 16,
+            "loglevel": "warning",
+        }
+        server = multiprocessing.get_context("fork").Process(target=lambda: BenchServer(options).run())
+        server.start()
+        cookie = session_cookie()
+        selector = selectors.DefaultSelector()
+        subscribers = []
+        try:
+            pid = worker_pid(server.pid)
+            while True:
+                try:
+                    http_get(args.port, "/health", cookie)
+                    break
+                except ConnectionRefusedError:
+                    time.sleep(0.1)
+            # Calentamiento: resumen, hilo vigilante y una conexion de stream ida y vuelta.
+            http_get(args.port, "/api/summary", cookie)
+            warmup = Subscriber(args.port, cookie)
+            time.sleep(args.heartbeat + 1)
+            warmup.sock.close()
+            time.sleep(args.heartbeat + 1)
+
+            rss_base = rss_kb(pid)
+            cpu_start = cpu_seconds(pid)
+            time.sleep(args.idle_seconds)
+            idle_base = cpu_seconds(pid) - cpu_start
+
+            start = time.perf_counter()
+            for _ in range(args.subscribers):
+                subscriber = Subscriber(args.port, cookie)
+                selector.register(subscriber.sock, selectors.EVENT_READ, subscriber)
+                subscribers.append(subscriber)
+            connected = pump(
+                selector, subscribers, lambda subs: all(sub.ready or sub.status not in (None, "200") for sub in subs), 60
+            )
+            connect_seconds = time.perf_counter() - start
+            rejected = [sub.status for sub in subscribers if sub.status != "200"]
+            # El vigilante publica el estado inicial en su primera consulta.
+            pump(selector, subscribers, lambda subs: all(sub.seq is not None for sub in subs), args.heartbeat + 5)
+
+            rss_open = rss_kb(pid)
+            cpu_start = cpu_seconds(pid)
+            idle_end = time.perf_counter() + args.idle_seconds
+            while time.perf_counter() < idle_end:
+                pump(selector, subscribers, lambda subs: False, idle_end - time.perf_counter())
+            idle_open = cpu_seconds(pid) - cpu_start
+
+            rows = [
+                {"record_id": f"{index:07d}", "estado": "REALIZADO", "ubicacion": "OFICINAS LIMA"}
+                for index in range(args.changed_rows)
+            ]
+            cpu_start = cpu_seconds(pid)
+            with app.app_context():
+                ingest_rows(get_db(), rows, 1000)
+                target_seq = get_db().execute("SELECT seq FROM sqlite_sequence WHERE name = 'record_changes'").fetchone()[0]
+            committed_at = time.perf_counter()
+            delivered = pump(
+                selector, subscribers, lambda subs: all(sub.received_at for sub in subs), 30, target_seq=target_seq
+            )
+            broadcast_cpu = cpu_seconds(pid) - cpu_start
+            latencies = [sub.received_at - committed_at for sub in subscribers if sub.received_at]
+
+            for subscriber in subscribers:
+                selector.unregister(subscriber.sock)
+                subscriber.sock.close()
+            # Un cliente que se fue se detecta al escribir: el primer ping recibe el RST y el segundo falla.
+            time.sleep(2 * args.heartbeat + 2)
+            body = http_get(args.port, "/api/stream-stats", cookie)
+            stats = json.loads(body.split(b"\r\n\r\n", 1)[1])
+        finally:
+            os.kill(server.pid, signal.SIGTERM)
+            server.join()
+
+    count = len(subscribers)
+    print(f"Suscriptores: {count}  conectados en {connect_seconds:.2f} s  rechazados={len(rejected)}")
+    print(
+        f"Memoria del worker: base={rss_base / 1024:.1f} MB  con streams={rss_open / 1024:.1f} MB  "
+        f"por conexion={(rss_open - rss_base) / count:.1f} KB"
+    )
+    print(
+        f"CPU en reposo ({args.idle_seconds:.0f} s, ping cada {args.heartbeat:.0f} s): base={idle_base * 1000:.0f} ms  "
+        f"con streams={idle_open * 1000:.0f} ms  por conexion={(idle_open - idle_base) / count / args.idle_seconds * 1000:.3f} ms/s"
+    )
+    print(
+        f"Aviso de {args.changed_rows} filas: recibidos={len(latencies)}/{count}  p50={percentile(latencies, 0.5) * 1000:.0f} ms  "
+        f"p95={percentile(latencies, 0.95) * 1000:.0f} ms  max={max(latencies, default=0) * 1000:.0f} ms  "
+        f"CPU={broadcast_cpu * 1000:.0f} ms"
+    )
+    print(f"Suscriptores abiertos tras cerrar los sockets: {stats['subscribers']}")
+    if not connected or rejected:
+        raise SystemExit(f"Conexiones rechazadas o sin respuesta: {rejected[:5]}")
+    if not delivered:
+        raise SystemExit("El aviso no llego a todos los suscriptores.")
+    if stats["subscribers"]:
+        raise SystemExit("Quedaron suscriptores registrados despues de cerrar las conexiones.")
+
+
+if __name__ == "__main__":
+    main()
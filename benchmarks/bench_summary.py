@@ -0,0 +1,157 @@
+"""Compara el calculo de /api/summary en SQL contra el recorrido fila a fila original.
+
+Uso: python benchmarks/bench_summary.py --rows 50000 --repeat 5
+"""
+import argparse
+import json
+import re
+import tempfile
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+from common import populate, time_call
+
+from app import (  # noqa: E402
+    RECENT_UPDATES_LIMIT,
+    app,
+    build_summary_payload,
+    build_where_clause,
+    get_db,
+    init_db,
+    parse_summary_filters,
+    status_bucket,
+)
+
+FILTER_CASES = {
+    "sin_filtros": {},
+    "ubicacion": {"ubicacion": "OFICINAS LIMA"},
+    "estado": {"estado": "realizado"},
+    "rango_fechas": {"fecha_inicio": "2025-09-01", "fecha_fin": "2025-10-15"},
+    "nombre": {"nombre": "quispe"},
+}
+ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+TIMELINE_OPTIONS = ("day", 0)
+
+
+def legacy_summary(filters: Dict[str, str]) -> Dict[str, object]:
+    db = get_db()
+    where, params = build_where_clause(filters)
+    records = db.execute(
+        "SELECT record_id, ubicacion, nom_sede, categoria_trab, nombre_completo, perfil_imagen, "
+        "marca, modelo, serial_num, hostname, ip_equipo, email_trabajo, fecha_estado, estado, "
+        "estado_coordinacion, estado_upgrade, fecha_programada, fecha_ejecucion, notas, last_updated "
+        f"FROM project_records{where} ORDER BY last_updated DESC",
+        params,
+    ).fetchall()
+    status_counts: Dict[str, int] = {}
+    bucket_counts: Dict[str, int] = {}
+    schedule_map: Dict[str, int] = {}
+    schedule_brands: Dict[str, List[str]] = {}
+    recent_updates = []
+    for row in records:
+        estado = (row["estado"] or "").strip().upper() or "SIN ESTADO"
+        status_counts[estado] = status_counts.get(estado, 0) + 1
+        bucket = status_bucket(estado)
+        bucket_counts[bucket] = bucket_counts.get(bucket, 0) + 1
+        if row["fecha_estado"]:
+            schedule_map[row["fecha_estado"]] = schedule_map.get(row["fecha_estado"], 0) + 1
+            schedule_brands.setdefault(row["fecha_estado"], []).append(row["marca"] or "")
+        recent_updates.append(
+            {
+                "record_id": row["record_id"],
+                "nombre_completo": row["nombre_completo"],
+                "ubicacion": row["ubicacion"],
+                "nom_sede": row["nom_sede"],
+                "hostname": row["hostname"],
+                "categoria_trab": row["categoria_trab"],
+                "estado": estado,
+                "estado_coordinacion": row["estado_coordinacion"],
+                "estado_upgrade": row["estado_upgrade"],
+                "fecha_programada": row["fecha_programada"],
+                "fecha_ejecucion": row["fecha_ejecucion"],
+                "fecha_estado": row["fecha_estado"],
+                "marca": row["marca"],
+                "modelo": row["modelo"],
+                "notas": row["notas"],
+                "last_updated": row["last_updated"],
+            }
+        )
+    if not filters.get("nombre"):
+        recent_updates = recent_updates[:10]
+    return {
+        "total": len(records),
+        "status_counts": status_counts,
+        "status_buckets": bucket_counts,
+        "timeline": legacy_timeline(schedule_map, schedule_brands),
+        "recent_updates": recent_updates,
+        "filter_options": legacy_filter_options(),
+    }
+
+
+def legacy_timeline(schedule_map: Dict[str, int], schedule_brands: Dict[str, List[str]]) -> Dict[str, object]:
+    # Lleva los mapas por fecha al formato de /api/summary: fechas ISO en orden y luego el texto libre.
+    buckets = sorted(schedule_map, key=lambda fecha: (not ISO_DATE.match(fecha), fecha))
+    counts = {fecha: Counter(brand for brand in brands if brand) for fecha, brands in schedule_brands.items()}
+    totals = Counter()
+    for brands in counts.values():
+        totals.update(brands)
+    names = sorted(totals, key=lambda name: (-totals[name], name))
+    return {
+        "granularity": "day",
+        "buckets": buckets,
+        "totals": [schedule_map[fecha] for fecha in buckets],
+        "brands": names,
+        "series": [[counts[fecha][name] for fecha in buckets] for name in names],
+        "top_brands": 0,
+        "folded": False,
+    }
+
+
+def legacy_filter_options() -> Dict[str, List[str]]:
+    db = get_db()
+    options = {}
+    for field in ("ubicacion", "nom_sede", "categoria_trab"):
+        rows = db.execute(
+            f"SELECT DISTINCT {field} FROM project_records WHERE {field} IS NOT NULL AND {field} <> '' ORDER BY {field}"
+        ).fetchall()
+        options[field] = [row[0] for row in rows]
+    return options
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app.config["DATABASE"] = str(Path(tmp) / "bench.db")
+        with app.app_context():
+            init_db()
+            populate(args.rows)
+            print(f"Filas: {args.rows}")
+            for name, raw in FILTER_CASES.items():
+                filters = parse_summary_filters(raw)
+                current = build_summary_payload(get_db(), filters, timeline_options=TIMELINE_OPTIONS)
+                legacy = legacy_summary(filters)
+                # /api/summary ya no devuelve todas las filas con el filtro de nombre; la tabla usa /api/records.
+                legacy["recent_updates"] = legacy["recent_updates"][:RECENT_UPDATES_LIMIT]
+                current["filter_options"] = {
+                    field: current["filters"][field]["options"] for field in legacy["filter_options"]
+                }
+                for key, value in legacy.items():
+                    if json.dumps(value, sort_keys=True) != json.dumps(current[key], sort_keys=True):
+                        raise SystemExit(f"[{name}] la clave '{key}' difiere entre ambas implementaciones")
+                legacy_time = time_call(lambda: legacy_summary(filters), args.repeat)
+                sql_time = time_call(
+                    lambda: build_summary_payload(get_db(), filters, timeline_options=TIMELINE_OPTIONS), args.repeat
+                )
+                print(
+                    f"{name:<14} legacy={legacy_time * 1000:8.1f} ms  "
+                    f"sql={sql_time * 1000:8.1f} ms  x{legacy_time / sql_time:5.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
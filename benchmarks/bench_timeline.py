@@ -0,0 +1,69 @@
+"""Mide el grafico de actualizaciones por fecha a medida que crece el rango de fechas.
+
+Para cada rango reparte las fechas de estado de las filas en --spans dias y --brands marcas,
+y compara la agrupacion por dia sin plegar marcas contra la automatica con las primeras
+--top-brands marcas y el resto en "Otros". Reporta los bytes del bloque timeline, la cantidad
+de barras que dibuja el navegador (periodos x series) y el tiempo de armar el resumen.
+
+Uso: python benchmarks/bench_timeline.py --rows 50000 --spans 30,180,365,730,1825 --brands 15
+"""
+import argparse
+import json
+import tempfile
+from pathlib import Path
+
+from common import populate, time_call
+
+from app import app, build_summary_payload, get_db, init_db, parse_summary_filters  # noqa: E402
+
+
+def spread_dates(span: int, brands: int) -> None:
+    db = get_db()
+    db.execute(
+        "UPDATE project_records SET "
+        "fecha_estado = date('2021-01-01', '+' || (CAST(record_id AS INTEGER) * 7919 % ?) || ' days'), "
+        "marca = 'MARCA ' || (CAST(record_id AS INTEGER) % ?)",
+        (span, brands),
+    )
+    db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--spans", default="30,180,365,730,1825", help="Dias de rango separados por coma")
+    parser.add_argument("--brands", type=int, default=15)
+    parser.add_argument("--top-brands", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cases = {"dia": ("day", 0), "auto": ("auto", args.top_brands)}
+    with tempfile.TemporaryDirectory() as tmp:
+        app.config.update(
+            DATABASE=str(Path(tmp) / "bench.db"),
+            SUMMARY_CACHE_DATABASE=str(Path(tmp) / "summary_cache.db"),
+            IMPORT_WORKER_ENABLED=False,
+        )
+        with app.app_context():
+            init_db()
+            populate(args.rows)
+            filters = parse_summary_filters({})
+            print(f"Filas: {args.rows}  marcas: {args.brands}")
+            for span in (int(value) for value in args.spans.split(",")):
+                spread_dates(span, args.brands)
+                for name, options in cases.items():
+                    timeline = build_summary_payload(get_db(), filters, timeline_options=options)["timeline"]
+                    size = len(json.dumps(timeline).encode("utf-8"))
+                    bars = len(timeline["buckets"]) * max(1, len(timeline["series"]))
+                    seconds = time_call(
+                        lambda: build_summary_payload(get_db(), filters, timeline_options=options), args.repeat
+                    )
+                    print(
+                        f"{span:>5} dias  {name:<5} {timeline['granularity']:<6} periodos={len(timeline['buckets']):>5}  "
+                        f"series={len(timeline['series']):>3}  barras={bars:>6}  {size / 1024:7.1f} KB  "
+                        f"resumen={seconds * 1000:7.1f} ms"
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import csv
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import PROJECT_COLUMNS, get_db, strip_accents  # noqa: E402
+
+BASE_TIMESTAMP = datetime(2025, 9, 1)
+INSERT_BATCH = 50_000
+CSV_HEADER = [
+    "id", "ubicacion", "nom_sede", "categoria_trab", "nombre_completo", "marca", "modelo",
+    "hostname", "email_trabajo", "fecha_estado", "estado", "fecha_programada", "notas",
+]
+DATE_FIELDS = ("fecha_estado", "fecha_programada", "fecha_ejecucion")
+SEDES_POR_UBICACION: Dict[str, Tuple[float, List[Tuple[str, float]]]] = {
+    "OFICINAS LIMA": (0.58, [
+        ("Surco", 0.22), ("Agencia San Isidro", 0.18), ("Agencia Miraflores", 0.14), ("Agencia La Molina", 0.10),
+        ("Agencia San Borja", 0.09), ("Agencia Los Olivos", 0.08), ("Agencia Jesús María", 0.07),
+        ("Agencia Chorrillos", 0.06), ("Agencia Callao", 0.06),
+    ]),
+    "OFICINAS PROVINCIA": (0.27, [
+        ("Agencia Arequipa", 0.24), ("Agencia Trujillo", 0.20), ("Agencia Piura", 0.15), ("Agencia Chiclayo", 0.13),
+        ("Agencia Cusco", 0.11), ("Agencia Huancayo", 0.09), ("Agencia Iquitos", 0.08),
+    ]),
+    "SEDE PRINCIPAL": (0.15, [("Centro Corporativo", 0.75), ("Torre Rivera Navarrete", 0.25)]),
+}
+CATEGORIAS = [("REPOTENCIACION + WIN11", 0.46), ("UPGRADE + WIN11", 0.38), ("REASIGNACION + WIN11", 0.16)]
+PERFILES = [
+    ("RED DE OFICINA ADMINISTRATIVO", 0.45), ("RED DE OFICINA COMERCIAL", 0.35), ("SEDE CENTRAL", 0.15), ("", 0.05),
+]
+MODELOS = {
+    "HP": [("EliteBook 840", 0.5), ("ProDesk 400", 0.3), ("EliteDesk 800", 0.2)],
+    "LENOVO": [("M89S", 0.35), ("ThinkCentre M70q", 0.4), ("ThinkPad T14", 0.25)],
+    "DELL": [("OptiPlex 7090", 0.6), ("Latitude 5420", 0.4)],
+    "": [("", 1.0)],
+}
+MARCAS = [("HP", 0.41), ("LENOVO", 0.36), ("DELL", 0.18), ("", 0.05)]
+# Peso de cada estado al inicio y al final de la campana; se interpola segun la fecha de estado.
+ESTADOS_CAMPANA = {
+    "PROGRAMADO": (0.35, 0.05),
+    "REPROGRAMADO": (0.08, 0.04),
+    "EN PROCESO": (0.15, 0.06),
+    "REALIZADO": (0.05, 0.65),
+    "USER NO ASISTIO": (0.04, 0.03),
+    "USER SIN RESPUESTA": (0.05, 0.03),
+    "NO APLICA UPGRADE": (0.03, 0.04),
+    "INCIDENCIA UPGRADE": (0.04, 0.03),
+    "PENDIENTE": (0.21, 0.07),
+}
+NOMBRES = [
+    "MARÍA", "JOSÉ", "JUAN", "ROSA", "LUIS", "ANA", "CARLOS", "JESÚS", "VÍCTOR", "MÓNICA", "IÑIGO", "ROCÍO",
+    "RAÚL", "SOFÍA", "ÁNGEL", "MIGUEL", "LUCÍA", "CÉSAR", "INÉS", "ELENA",
+]
+APELLIDOS = [
+    "QUISPE", "DELGADO", "LAURA", "YARASCA", "ÁLVAREZ", "PÉREZ", "NÚÑEZ", "MENDOZA", "MUÑOZ", "GÓMEZ",
+    "RAMÍREZ", "FLORES", "HUAMÁN", "CHÁVEZ", "CASTAÑEDA", "TORRES", "ROJAS", "CÁRDENAS", "ESPINOZA", "IBÁÑEZ",
+]
+NOTAS = [
+    ("", 0.55), ("OK PROGRAMADO", 0.12), ("Pendiente validacion de backup", 0.1), ("Usuario de vacaciones", 0.06),
+    ("Equipo en garantía", 0.05), ("Reprogramado por cierre de mes", 0.07), ("Sin acceso a la agencia", 0.05),
+]
+CAMPAIGN_START = date(2025, 6, 2)
+CAMPAIGN_DAYS = 240
+
+
+def weighted(rng: random.Random, choices: List[Tuple[str, float]], skew: bool = True) -> str:
+    # Sin sesgo todos los valores salen con la misma probabilidad.
+    if not skew:
+        return rng.choice(choices)[0]
+    return rng.choices([value for value, _ in choices], weights=[weight for _, weight in choices])[0]
+
+
+def campaign_day(rng: random.Random, skew: bool = True) -> date:
+    # Con sesgo las actualizaciones se aceleran hacia el final de la campana.
+    return CAMPAIGN_START + timedelta(days=int(CAMPAIGN_DAYS * rng.random() ** (0.7 if skew else 1.0)))
+
+
+def messy_date(rng: random.Random, value: date) -> str:
+    roll = rng.random()
+    if roll < 0.58:
+        return value.isoformat()
+    if roll < 0.83:
+        return value.strftime("%d/%m/%Y")
+    if roll < 0.91:
+        return f"{value.isoformat()} {rng.randint(8, 19):02d}:{rng.choice((0, 15, 30, 45)):02d}"
+    if roll < 0.94:
+        return f"{value.isoformat()}T{rng.randint(8, 19):02d}:00:00"
+    if roll < 0.985:
+        return ""
+    return rng.choice(("pendiente", "por confirmar", "POR DEFINIR"))
+
+
+def messy_status(rng: random.Random, estado: str) -> str:
+    roll = rng.random()
+    if roll < 0.85:
+        return estado
+    if roll < 0.93:
+        return estado.lower()
+    if roll < 0.97:
+        return f" {estado.title()} "
+    return ""
+
+
+def full_name(rng: random.Random) -> str:
+    first, second = rng.sample(APELLIDOS, 2)
+    names = " ".join(rng.sample(NOMBRES, rng.choice((1, 1, 2))))
+    if rng.random() < 0.7:
+        return f"{first} {second} {names}"
+    # Parte de las coordinaciones escribe "Nombre Apellido" en tipo titulo.
+    return f"{names.title()} {first.title()}"
+
+
+def synthetic_rows(rows: int, seed: int = 1401, skew: bool = False, messy: bool = False) -> Iterator[List[str]]:
+    """Filas en el orden de PROJECT_COLUMNS; con la misma semilla y opciones salen identicas.
+
+    skew usa las proporciones de produccion (sedes, marcas, estados que avanzan con la campana);
+    messy mezcla formatos de fecha y escribe estados con mayusculas y espacios irregulares.
+    """
+    rng = random.Random(seed)
+    ubicaciones = [(name, weight) for name, (weight, _sedes) in SEDES_POR_UBICACION.items()]
+    status_names = list(ESTADOS_CAMPANA)
+    date_text = (lambda value: messy_date(rng, value)) if messy else date.isoformat
+    for index in range(rows):
+        ubicacion = weighted(rng, ubicaciones, skew)
+        sede = weighted(rng, SEDES_POR_UBICACION[ubicacion][1], skew)
+        marca = weighted(rng, MARCAS, skew)
+        estado_dia = campaign_day(rng, skew)
+        progress = (estado_dia - CAMPAIGN_START).days / CAMPAIGN_DAYS
+        estado = rng.choices(
+            status_names,
+            weights=[start + (end - start) * progress for start, end in ESTADOS_CAMPANA.values()] if skew else None,
+        )[0]
+        programada = estado_dia - timedelta(days=rng.randint(0, 14))
+        ejecucion = date_text(estado_dia) if estado == "REALIZADO" else ""
+        name = full_name(rng)
+        user = strip_accents(name.split()[-1]).lower()
+        yield [
+            f"{index:07d}",
+            ubicacion,
+            sede,
+            weighted(rng, CATEGORIAS, skew),
+            name,
+            weighted(rng, PERFILES, skew),
+            marca,
+            weighted(rng, MODELOS[marca], skew),
+            f"5CD{rng.randrange(16 ** 7):07X}",
+            f"MINORISTAOP{index % 20011}",
+            f"10.{rng.randint(10, 40)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+            f"{user}{index}@banbif.com",
+            date_text(estado_dia),
+            messy_status(rng, estado) if messy else estado,
+            estado if rng.random() < 0.9 else "",
+            rng.choice(("PENDIENTE", "EN PROCESO", "REALIZADO")) if estado != "REALIZADO" else "REALIZADO",
+            date_text(programada),
+            ejecucion,
+            weighted(rng, NOTAS, skew),
+        ]
+
+
+def populate(rows: int, seed: int = 1401, skew: bool = False, messy: bool = False) -> None:
+    # Inserta directo en project_records, sin pasar por la normalizacion de la carga.
+    db = get_db()
+    placeholders = ", ".join("?" for _ in range(len(PROJECT_COLUMNS) + 1))
+    insert = f"INSERT INTO project_records ({', '.join(PROJECT_COLUMNS)}, last_updated) VALUES ({placeholders})"
+    date_positions = [PROJECT_COLUMNS.index(field) for field in DATE_FIELDS]
+    batch = []
+    for index, values in enumerate(synthetic_rows(rows, seed, skew, messy)):
+        for position in date_positions:
+            values[position] = values[position] or None
+        last_updated = (BASE_TIMESTAMP + timedelta(seconds=index)).strftime("%Y-%m-%d %H:%M:%S")
+        batch.append(values + [last_updated])
+        if len(batch) >= INSERT_BATCH:
+            db.executemany(insert, batch)
+            batch = []
+    if batch:
+        db.executemany(insert, batch)
+    db.commit()
+
+
+def time_call(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def write_synthetic_csv(path: Path, size_mb: int) -> int:
+    # Las columnas de CSV_HEADER con fecha_estado en dd/mm/aaaa, hasta llegar a size_mb.
+    target = size_mb * 1024 * 1024
+    positions = [PROJECT_COLUMNS.index("record_id" if name == "id" else name) for name in CSV_HEADER]
+    fecha_estado = PROJECT_COLUMNS.index("fecha_estado")
+    rows = 0
+    with path.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(CSV_HEADER)
+        for values in synthetic_rows(sys.maxsize, seed=size_mb):
+            if handle.tell() >= target:
+                break
+            values[fecha_estado] = date.fromisoformat(values[fecha_estado]).strftime("%d/%m/%Y")
+            writer.writerow([values[position] for position in positions])
+            rows += 1
+    return rows
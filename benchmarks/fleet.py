@@ -0,0 +1,99 @@
+"""Genera flotas sinteticas (CSV y base SQLite) con la forma de los CSV de coordinacion.
+
+Las filas salen de common.synthetic_rows con sesgo y desorden: las distribuciones siguen lo
+que se ve en produccion (la mayoria de equipos en Lima, pocas agencias concentran las filas,
+los estados avanzan con la campana y HP/LENOVO dominan las marcas). Se mezclan formatos de fecha (ISO, dd/mm/aaaa, con hora, vacios y texto libre),
+estados con mayusculas y espacios irregulares y nombres con tildes y enes. Con la misma
+semilla y tamano el CSV sale identico.
+
+Uso: python benchmarks/fleet.py --sizes 10k,100k,1m --out-dir data/fleet --format both
+"""
+import argparse
+import csv
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from common import synthetic_rows
+
+from app import app, get_db, ingest_csv_stream, init_db  # noqa: E402
+
+FLEET_HEADER = [
+    "id", "ubicacion", "nom_sede", "categoria_trab", "nombre_completo", "perfil_imagen", "marca", "modelo",
+    "serial_num", "hostname", "ip_equipo", "email_trabajo", "fecha_estado", "estado", "estado_coordinacion",
+    "estado_upgrade", "fecha_programada", "fecha_ejecucion", "notas",
+]
+
+
+def fleet_rows(rows: int, seed: int = 1401) -> Iterator[List[str]]:
+    return synthetic_rows(rows, seed, skew=True, messy=True)
+
+
+def write_fleet_csv(path: Path, rows: int, seed: int = 1401) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(FLEET_HEADER)
+        writer.writerows(fleet_rows(rows, seed))
+    return path
+
+
+def build_fleet_database(db_path: Path, csv_path: Path) -> Dict[str, object]:
+    # La base se arma con la misma carga que usa /upload, asi refleja el esquema y los indices reales.
+    db_path.unlink(missing_ok=True)
+    previous = {key: app.config[key] for key in ("DATABASE", "SUMMARY_CACHE_DATABASE", "IMPORT_WORKER_ENABLED")}
+    app.config.update(
+        DATABASE=str(db_path),
+        SUMMARY_CACHE_DATABASE=str(db_path.with_name(f"{db_path.stem}_cache.db")),
+        IMPORT_WORKER_ENABLED=False,
+    )
+    try:
+        with app.app_context():
+            init_db()
+            with csv_path.open("rb") as handle:
+                return ingest_csv_stream(get_db(), handle, app.config["INGEST_BATCH_SIZE"])
+    finally:
+        app.config.update(previous)
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * multiplier)
+
+
+def size_label(rows: int) -> str:
+    if rows >= 1_000_000 and rows % 1_000_000 == 0:
+        return f"{rows // 1_000_000}m"
+    if rows >= 1_000 and rows % 1_000 == 0:
+        return f"{rows // 1_000}k"
+    return str(rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10k,100k,1m", help="Filas por flota separadas por coma (10k, 1m, ...)")
+    parser.add_argument("--out-dir", default="data/fleet")
+    parser.add_argument("--format", choices=("csv", "db", "both"), default="both")
+    parser.add_argument("--seed", type=int, default=1401)
+    args = parser.parse_args()
+
+    out_dir = Path(args.out_dir)
+    for rows in (parse_size(value) for value in args.sizes.split(",")):
+        label = size_label(rows)
+        with tempfile.TemporaryDirectory() as tmp:
+            keep_csv = args.format in ("csv", "both")
+            csv_path = (out_dir if keep_csv else Path(tmp)) / f"fleet_{label}.csv"
+            write_fleet_csv(csv_path, rows, args.seed)
+            line = f"fleet_{label}: {rows} filas"
+            if keep_csv:
+                line += f"  {csv_path} ({csv_path.stat().st_size / 1024 / 1024:.1f} MB)"
+            if args.format in ("db", "both"):
+                db_path = out_dir / f"fleet_{label}.db"
+                summary = build_fleet_database(db_path, csv_path)
+                line += f"  {db_path} ({summary['inserted']} filas, {summary['rows_per_second']} filas/s)"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
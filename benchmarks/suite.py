@@ -0,0 +1,253 @@
+"""Suite de regresion para las rutas calientes: fechas, /upload, /api/summary y facetas.
+
+Arma una flota sintetica de --rows filas (o copia la base de --database, por ejemplo una de
+fleet.py), toma --samples muestras de cada caso y escribe en --output un JSON con p50, p95 y
+p99 en milisegundos. Con --baseline compara la metrica elegida contra una corrida anterior y
+termina con error si algun caso empeora mas que --threshold (0.25 = 25 %). --save-baseline
+guarda la corrida como la nueva referencia.
+
+Las consultas se miden en frio: sin la cache de respuestas y sin la de facetas del worker.
+
+Uso: python benchmarks/suite.py --rows 100000 --baseline benchmarks/results/baseline.json --threshold 0.25
+"""
+import argparse
+import io
+import json
+import platform
+import sqlite3
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from fleet import build_fleet_database, fleet_rows, write_fleet_csv
+
+from app import (  # noqa: E402
+    DateNormalizer,
+    _facet_rows_cache,
+    app,
+    build_filters_payload,
+    claim_import_job,
+    get_db,
+    hash_password,
+    normalize_date,
+    parse_summary_filters,
+    run_import_job,
+)
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+SUMMARY_CASES = {
+    "sin_filtros": {},
+    "ubicacion": {"ubicacion": "OFICINAS LIMA"},
+    "sede_categoria": {"nom_sede": "Surco", "categoria_trab": "UPGRADE + WIN11"},
+    "estado": {"estado": "realizado"},
+    "rango_fechas": {"fecha_inicio": "2025-09-01", "fecha_fin": "2025-10-15"},
+    "combinado": {"ubicacion": "OFICINAS PROVINCIA", "estado": "pendiente", "fecha_inicio": "2025-08-01"},
+    "nombre": {"nombre": "quispe"},
+    "hostname": {"hostname": "MINORISTAOP12"},
+}
+FILTERS_CASES = ("sin_filtros", "rango_fechas", "nombre")
+DATE_BATCH = 1000
+DATE_COLUMNS = {"fecha_estado": 12, "fecha_programada": 16}
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def measure(func: Callable[[], object], samples: int, setup: Callable[[], object] = lambda: None) -> Dict[str, object]:
+    func()
+    timings = []
+    for _ in range(samples):
+        setup()
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "samples": samples,
+        "p50": round(percentile(timings, 0.50), 3),
+        "p95": round(percentile(timings, 0.95), 3),
+        "p99": round(percentile(timings, 0.99), 3),
+        "mean": round(sum(timings) / samples, 3),
+    }
+
+
+def clear_caches() -> None:
+    _facet_rows_cache.clear()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def bench_dates(samples: int) -> Dict[str, Dict[str, object]]:
+    # Cada muestra normaliza DATE_BATCH celdas de la flota, con sus formatos mezclados.
+    rows = list(fleet_rows(DATE_BATCH, seed=7))
+    results = {}
+    for field, position in DATE_COLUMNS.items():
+        values = [row[position] for row in rows]
+        results[f"normalize_date/{field}"] = measure(lambda: [normalize_date(value) for value in values], samples)
+        results[f"DateNormalizer/{field}"] = measure(
+            lambda: list(DateNormalizer(fields=(field,)).normalize_rows({field: value} for value in values)), samples
+        )
+    return results
+
+
+def bench_upload(client, csv_body: bytes, samples: int) -> Dict[str, object]:
+    # Ida y vuelta completa: la peticion guarda el archivo y el job se procesa en este mismo proceso.
+    def upload() -> None:
+        response = client.post("/upload", data={"file": (io.BytesIO(csv_body), "flota.csv"), "mode": "merge"})
+        if response.status_code != 302:
+            raise SystemExit(f"/upload respondio {response.status_code}")
+        with app.app_context():
+            db = get_db()
+            job = claim_import_job(db, "suite")
+            run_import_job(db, job, "suite")
+            status = db.execute("SELECT status, error FROM import_jobs WHERE id = ?", (job["id"],)).fetchone()
+            if status["status"] != "done":
+                raise SystemExit(f"El import fallo: {status['error']}")
+
+    return measure(upload, samples)
+
+
+def bench_summary(client, samples: int) -> Dict[str, Dict[str, object]]:
+    results = {}
+    for name, filters in SUMMARY_CASES.items():
+        def summary(filters=filters) -> None:
+            response = client.get("/api/summary", query_string=filters)
+            if response.status_code != 200:
+                raise SystemExit(f"/api/summary respondio {response.status_code}")
+
+        results[f"api_summary/{name}"] = measure(summary, samples, setup=clear_caches)
+    return results
+
+
+def bench_filters(samples: int) -> Dict[str, Dict[str, object]]:
+    results = {}
+    with app.app_context():
+        db = get_db()
+        for name in FILTERS_CASES:
+            filters = parse_summary_filters(SUMMARY_CASES[name])
+            results[f"build_filters_payload/{name}"] = measure(
+                lambda: build_filters_payload(filters, db), samples, setup=clear_caches
+            )
+    return results
+
+
+def compare(results: Dict[str, Dict[str, object]], baseline: Dict[str, object], metric: str, threshold: float) -> List[str]:
+    reference = baseline["results"]
+    regressions = []
+    print(f"Comparacion de {metric} contra la referencia ({baseline['meta'].get('commit') or 'sin commit'}):")
+    for name, current in results.items():
+        previous = reference.get(name)
+        if previous is None:
+            print(f"  {name:<36} {current[metric]:10.2f} ms  (sin referencia)")
+            continue
+        change = current[metric] / previous[metric] - 1 if previous[metric] else 0.0
+        flag = "REGRESION" if change > threshold else ""
+        print(f"  {name:<36} {current[metric]:10.2f} ms  ref={previous[metric]:10.2f} ms  {change * 100:+7.1f} %  {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--database", help="Base ya generada (se copia; la original no se modifica)")
+    parser.add_argument("--samples", type=int, default=30)
+    parser.add_argument("--upload-rows", type=int, default=10_000)
+    parser.add_argument("--upload-samples", type=int, default=5)
+    parser.add_argument("--output", default=str(RESULTS_DIR / "latest.json"))
+    parser.add_argument("--baseline", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--metric", choices=("p50", "p95", "p99"), default="p95")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Empeoramiento tolerado (0.25 = 25 %%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Guarda la corrida en --baseline")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        db_path = workdir / "suite.db"
+        if args.database:
+            # backup() incluye lo que todavia este en el WAL de la base original.
+            with sqlite3.connect(args.database) as source, sqlite3.connect(db_path) as target:
+                source.backup(target)
+        else:
+            build_fleet_database(db_path, write_fleet_csv(workdir / "flota.csv", args.rows))
+        app.config.update(
+            DATABASE=str(db_path),
+            SUMMARY_CACHE_DATABASE=str(workdir / "summary_cache.db"),
+            SUMMARY_CACHE_MAX_ENTRIES=0,
+            IMPORTS_DIR=str(workdir / "imports"),
+            IMPORT_WORKER_ENABLED=False,
+        )
+        with app.app_context():
+            db = get_db()
+            rows = db.execute("SELECT COUNT(*) FROM project_records").fetchone()[0]
+            cursor = db.execute(
+                "INSERT INTO users (username, password_hash, role) VALUES ('suite', ?, 'admin')",
+                (hash_password("suite-password"),),
+            )
+            db.commit()
+            user_id = cursor.lastrowid
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["user_id"] = user_id
+
+        # Misma flota con otra semilla: la carga actualiza registros existentes, como una re-importacion.
+        upload_body = write_fleet_csv(workdir / "carga.csv", args.upload_rows, seed=2025).read_bytes()
+
+        print(f"Filas: {rows}  muestras: {args.samples}  carga: {args.upload_rows} filas x {args.upload_samples}")
+        results: Dict[str, Dict[str, object]] = {}
+        results.update(bench_dates(args.samples))
+        results.update(bench_summary(client, args.samples))
+        results.update(bench_filters(args.samples))
+        results[f"upload/merge_{args.upload_rows}"] = bench_upload(client, upload_body, args.upload_samples)
+
+    for name, result in results.items():
+        print(f"  {name:<36} p50={result['p50']:9.2f} ms  p95={result['p95']:9.2f} ms  p99={result['p99']:9.2f} ms")
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "rows": rows,
+            "samples": args.samples,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.platform(),
+        },
+        "results": results,
+    }
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"Resultados: {output}")
+
+    if not args.baseline:
+        return
+    baseline_path = Path(args.baseline)
+    if args.save_baseline or not baseline_path.exists():
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Referencia guardada en {baseline_path}")
+        return
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    if baseline["meta"].get("rows") != rows:
+        print(f"Aviso: la referencia se tomo con {baseline['meta'].get('rows')} filas y esta corrida con {rows}.")
+    regressions = compare(results, baseline, args.metric, args.threshold)
+    if regressions:
+        raise SystemExit(f"{len(regressions)} casos empeoraron mas de {args.threshold * 100:.0f} %: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
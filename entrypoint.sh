@@ -4,4 +4,7 @@ set -e
 mkdir -p data
 flask --app app init-db
 
-exec gunicorn --bind 0.0.0.0:5000 --workers "${GUNICORN_WORKERS:-4}" app:app
+# gthread: cada stream SSE (/api/stream) ocupa un hilo, no un worker completo. BANBIF_STREAM_MAX_SUBSCRIBERS
+# debe quedar por debajo de GUNICORN_THREADS para que sigan libres hilos para las demas peticiones.
+exec gunicorn --bind 0.0.0.0:5000 --workers "${GUNICORN_WORKERS:-4}" \
+    --worker-class gthread --threads "${GUNICORN_THREADS:-64}" app:app
@@ -31,13 +31,59 @@ let currentFilters = {
 };
 let nombreDebounce = null;
 let hostnameDebounce = null;
+let recordsCursor = null;
+let recordsLoading = false;
+let recordsRequestId = 0;
+const summaryCache = new Map();
+const SUMMARY_CACHE_LIMIT = 20;
+const CHANGES_POLL_MS = 30000;
+const STREAM_RECONNECT_MS = 60000;
+const TIMELINE_TOP_BRANDS = 6;
+const TIMELINE_LABELS_LIMIT = 40;
+let timelineGranularity = 'auto';
+let summaryState = null;
+let changesPolling = false;
+let changesStream = null;
+let streamSeq = null;
 
 document.addEventListener('DOMContentLoaded', () => {
     setupFilters();
+    setupRecordsScroll();
     fetchSummary();
+    connectChangesStream();
+    // Con el stream abierto el servidor avisa cada carga; el sondeo queda como respaldo.
+    setInterval(() => {
+        if (!changesStream || changesStream.readyState !== EventSource.OPEN) pollChanges();
+    }, CHANGES_POLL_MS);
+    document.addEventListener('visibilitychange', pollChanges);
 });
 
+function connectChangesStream() {
+    if (!('EventSource' in window) || changesStream) return;
+    const stream = new EventSource('/api/stream');
+    changesStream = stream;
+    stream.addEventListener('data_version', (event) => {
+        const info = JSON.parse(event.data);
+        streamSeq = info.seq;
+        if (summaryState && info.seq !== summaryState.seq) pollChanges();
+    });
+    stream.addEventListener('error', () => {
+        // EventSource reintenta solo los cortes; un 503 u otro error lo cierra y se reintenta mas tarde.
+        if (stream.readyState !== EventSource.CLOSED) return;
+        changesStream = null;
+        setTimeout(connectChangesStream, STREAM_RECONNECT_MS);
+    });
+}
+
 function setupFilters() {
+    const granularitySelect = document.getElementById('timeline-granularity');
+    if (granularitySelect) {
+        granularitySelect.addEventListener('change', () => {
+            timelineGranularity = granularitySelect.value || 'auto';
+            fetchSummary();
+        });
+    }
+
     selectFilters.forEach((field) => {
         const select = document.getElementById(`filter-${field}`);
         if (!select) return;
@@ -142,31 +188,287 @@ function setupFilters() {
     }
 }
 
+function buildFilterParams() {
+    const params = new URLSearchParams();
+    [...selectFilters, ...estadoFilters, ...dateFilters, 'nombre', 'hostname'].forEach((field) => {
+        const value = currentFilters[field];
+        if (value) params.append(field, value);
+    });
+    return params;
+}
+
+function buildSummaryParams() {
+    const params = buildFilterParams();
+    params.append('granularity', timelineGranularity);
+    params.append('top_brands', TIMELINE_TOP_BRANDS);
+    return params;
+}
+
+function updateExportLink() {
+    const link = document.getElementById('export-csv');
+    if (!link) return;
+    const query = buildFilterParams().toString();
+    link.href = query ? `/api/export?${query}` : '/api/export';
+}
+
 async function fetchSummary() {
+    fetchRecords(true);
+    updateExportLink();
     try {
-        const params = new URLSearchParams();
-        [...selectFilters, ...estadoFilters, ...dateFilters, 'nombre', 'hostname'].forEach((field) => {
-            const value = currentFilters[field];
-            if (value) params.append(field, value);
+        const query = buildSummaryParams().toString();
+        const params = buildSummaryParams();
+        params.append('format', 'columnar');
+        const cached = summaryCache.get(query);
+        const headers = cached ? { 'If-None-Match': cached.etag } : {};
+        const response = await fetch(`/api/summary?${params.toString()}`, {
+            headers,
+            cache: 'no-store',
         });
-        const query = params.toString();
-        const response = await fetch(query ? `/api/summary?${query}` : '/api/summary');
-        if (!response.ok) {
+        let data;
+        if (response.status === 304 && cached) {
+            data = cached.data;
+        } else if (response.ok) {
+            data = await response.json();
+            data.recent_updates = decodeRecords(data.recent_updates);
+            rememberSummary(query, response.headers.get('ETag'), data);
+        } else {
             throw new Error('No se pudo obtener el resumen');
         }
+        summaryState = { query, data, seq: data.change_seq };
+        renderSummary(data);
+    } catch (err) {
+        console.error(err);
+    }
+}
+
+function renderSummary(data) {
+    renderSelectFilters(data.filters || {});
+    renderDateFilters(data.date_filters || {});
+    renderNameFilter(data.name_filter || '');
+    renderHostnameFilter(data.hostname_filter || '');
+    renderEstadoFilter(data.estado_filter || '', data.estado_options || [], data.filters?.estado?.counts || {});
+    renderMetrics(data);
+    renderCharts(data);
+    renderSchedule(data.timeline);
+    renderAlerts(data);
+}
+
+async function pollChanges() {
+    // Solo pide lo que cambio desde el ultimo resumen; si el servidor no puede armar el delta, se recarga todo.
+    const state = summaryState;
+    if (!state || changesPolling || document.hidden) return;
+    const params = buildSummaryParams();
+    if (params.toString() !== state.query) return;
+    params.append('since', state.seq);
+    params.append('format', 'columnar');
+    changesPolling = true;
+    let failed = false;
+    try {
+        const response = await fetch(`/api/changes?${params.toString()}`, { cache: 'no-store' });
+        if (!response.ok) {
+            throw new Error('No se pudo obtener los cambios');
+        }
+        const changes = await response.json();
+        if (state !== summaryState) return;
+        if (changes.resync) {
+            fetchSummary();
+            return;
+        }
+        state.seq = changes.seq;
+        if (!changes.changes) return;
+        if (timelineHasUnknownBrand(state.data.timeline, changes.delta?.schedule_brands)) {
+            fetchSummary();
+            return;
+        }
+        changes.records = decodeRecords(changes.records);
+        // La copia en cache queda con su ETag anterior; se descarta para no mezclar versiones.
+        summaryCache.delete(state.query);
+        applyChanges(state.data, changes);
+        renderSummary(state.data);
+        if (changes.reload_records) {
+            fetchRecords(true);
+        } else {
+            mergeTableRows(changes.records || [], changes.removed || []);
+        }
+    } catch (err) {
+        failed = true;
+        console.error(err);
+    } finally {
+        changesPolling = false;
+        // Un aviso que llego con la consulta en curso no se pierde.
+        if (!failed && state === summaryState && streamSeq !== null && streamSeq > state.seq) {
+            setTimeout(pollChanges, 0);
+        }
+    }
+}
+
+function mergeCounts(counts, delta) {
+    Object.entries(delta || {}).forEach(([key, amount]) => {
+        const value = (counts[key] || 0) + amount;
+        if (value > 0) {
+            counts[key] = value;
+        } else {
+            delete counts[key];
+        }
+    });
+}
+
+function applyChanges(data, changes) {
+    const delta = changes.delta || {};
+    data.total = (data.total || 0) + (delta.total || 0);
+    ['status_counts', 'status_buckets'].forEach((key) => {
+        data[key] = data[key] || {};
+    });
+    mergeCounts(data.status_counts, delta.status_counts);
+    mergeCounts(data.status_buckets, delta.status_buckets);
+    if (data.timeline) mergeTimeline(data.timeline, delta.schedule || {}, delta.schedule_brands || {});
+    Object.entries(delta.facets || {}).forEach(([field, counts]) => {
+        const facet = data.filters?.[field];
+        if (!facet) return;
+        facet.counts = facet.counts || {};
+        mergeCounts(facet.counts, counts);
+        if (field === 'estado') return;
+        const options = new Set(facet.options || []);
+        Object.keys(counts).forEach((value) => {
+            if (facet.counts[value]) options.add(value);
+        });
+        facet.options = [...options].sort();
+    });
+    const records = changes.records || [];
+    const changed = new Set([...records.map((row) => row.record_id), ...(changes.removed || [])]);
+    data.recent_updates = [
+        ...records,
+        ...(data.recent_updates || []).filter((row) => !changed.has(row.record_id)),
+    ].slice(0, 10);
+}
+
+function timelineBucket(fecha, granularity) {
+    // Igual que el servidor: la semana empieza el lunes y el mes en el dia 1; el texto libre queda tal cual.
+    const parts = parseIsoDateParts(fecha);
+    if (!parts || granularity === 'day') return fecha;
+    if (granularity === 'month') return `${fecha.slice(0, 7)}-01`;
+    const day = new Date(Date.UTC(parts.year, parts.month - 1, parts.day));
+    day.setUTCDate(day.getUTCDate() - ((day.getUTCDay() + 6) % 7));
+    return day.toISOString().slice(0, 10);
+}
+
+function compareTimelineBuckets(a, b) {
+    const datedA = parseIsoDateParts(a) !== null;
+    const datedB = parseIsoDateParts(b) !== null;
+    if (datedA !== datedB) return datedA ? -1 : 1;
+    return a < b ? -1 : a > b ? 1 : 0;
+}
+
+function timelineIndex(timeline, bucket) {
+    let idx = timeline.buckets.indexOf(bucket);
+    if (idx >= 0) return idx;
+    idx = timeline.buckets.findIndex((existing) => compareTimelineBuckets(bucket, existing) < 0);
+    if (idx < 0) idx = timeline.buckets.length;
+    timeline.buckets.splice(idx, 0, bucket);
+    timeline.totals.splice(idx, 0, 0);
+    timeline.series.forEach((counts) => counts.splice(idx, 0, 0));
+    return idx;
+}
+
+function timelineHasUnknownBrand(timeline, scheduleBrands) {
+    // Con top_brands el servidor decide que marcas van solas y cuales suman en "Otros" segun el total;
+    // una marca que no esta en la serie no se puede ubicar con el delta, se pide el resumen completo.
+    if (!timeline || !timeline.top_brands) return false;
+    const known = new Set(timeline.brands);
+    return Object.values(scheduleBrands || {}).some((brands) => Object.keys(brands).some((brand) => !known.has(brand)));
+}
+
+function timelineBrandIndex(timeline, brand) {
+    const idx = timeline.brands.indexOf(brand);
+    if (idx >= 0) return idx;
+    // Solo sin top_brands: ahi cada marca es su propia serie.
+    timeline.brands.push(brand);
+    timeline.series.push(timeline.totals.map(() => 0));
+    return timeline.brands.length - 1;
+}
+
+function mergeTimeline(timeline, schedule, scheduleBrands) {
+    Object.entries(schedule).forEach(([fecha, amount]) => {
+        const idx = timelineIndex(timeline, timelineBucket(fecha, timeline.granularity));
+        timeline.totals[idx] += amount;
+    });
+    Object.entries(scheduleBrands).forEach(([fecha, brands]) => {
+        const idx = timelineIndex(timeline, timelineBucket(fecha, timeline.granularity));
+        Object.entries(brands).forEach(([brand, amount]) => {
+            const counts = timeline.series[timelineBrandIndex(timeline, brand)];
+            counts[idx] = Math.max(0, counts[idx] + amount);
+        });
+    });
+    for (let idx = timeline.buckets.length - 1; idx >= 0; idx -= 1) {
+        if (timeline.totals[idx] > 0) continue;
+        timeline.buckets.splice(idx, 1);
+        timeline.totals.splice(idx, 1);
+        timeline.series.forEach((counts) => counts.splice(idx, 1));
+    }
+}
+
+function mergeTableRows(records, removed) {
+    const tbody = document.querySelector('#recent-table tbody');
+    if (!tbody) return;
+    const changed = new Set([...records.map((row) => String(row.record_id)), ...removed.map(String)]);
+    tbody.querySelectorAll('tr[data-record-id]').forEach((tr) => {
+        if (changed.has(tr.dataset.recordId)) tr.remove();
+    });
+    if (!tbody.querySelector('tr[data-record-id]')) {
+        renderTable(records);
+    } else if (records.length) {
+        tbody.prepend(buildTableRows(records));
+    }
+}
+
+function rememberSummary(query, etag, data) {
+    if (!etag) return;
+    summaryCache.delete(query);
+    summaryCache.set(query, { etag, data });
+    if (summaryCache.size > SUMMARY_CACHE_LIMIT) {
+        summaryCache.delete(summaryCache.keys().next().value);
+    }
+}
+
+function setupRecordsScroll() {
+    const sentinel = document.getElementById('recent-table-sentinel');
+    if (!sentinel || !('IntersectionObserver' in window)) return;
+    const observer = new IntersectionObserver((entries) => {
+        if (entries.some((entry) => entry.isIntersecting)) {
+            fetchRecords(false);
+        }
+    }, { rootMargin: '200px' });
+    observer.observe(sentinel);
+}
+
+async function fetchRecords(reset) {
+    if (reset) {
+        recordsRequestId += 1;
+        recordsCursor = null;
+        recordsLoading = false;
+    } else if (!recordsCursor || recordsLoading) {
+        return;
+    }
+    const requestId = recordsRequestId;
+    const params = buildFilterParams();
+    if (recordsCursor) params.append('cursor', recordsCursor);
+    params.append('format', 'columnar');
+    recordsLoading = true;
+    try {
+        const response = await fetch(`/api/records?${params.toString()}`);
+        if (!response.ok) {
+            throw new Error('No se pudo obtener los registros');
+        }
         const data = await response.json();
-        renderSelectFilters(data.filters || {});
-        renderDateFilters(data.date_filters || {});
-        renderNameFilter(data.name_filter || '');
-        renderHostnameFilter(data.hostname_filter || '');
-        renderEstadoFilter(data.estado_filter || '', data.estado_options || []);
-        renderMetrics(data);
-        renderCharts(data);
-        renderSchedule(data.schedule, data.schedule_brands || {});
-        renderAlerts(data);
-        renderTable(data.recent_updates);
+        if (requestId !== recordsRequestId) return;
+        recordsCursor = data.next_cursor || null;
+        renderTable(data.records || [], !reset);
     } catch (err) {
         console.error(err);
+    } finally {
+        if (requestId === recordsRequestId) {
+            recordsLoading = false;
+        }
     }
 }
 
@@ -176,10 +478,11 @@ function renderSelectFilters(filters) {
         if (!select) return;
         const info = filters[field] || { options: [], selected: '' };
         const selectedValue = info.selected ?? currentFilters[field] ?? '';
+        const counts = info.counts || {};
         const options = ['<option value="">Todas</option>'];
         (info.options || []).forEach((option) => {
             const encoded = escapeHtml(option);
-            options.push(`<option value="${encoded}">${encoded}</option>`);
+            options.push(`<option value="${encoded}">${facetLabel(encoded, counts[option])}</option>`);
         });
         select.innerHTML = options.join('');
         select.value = selectedValue || '';
@@ -211,7 +514,11 @@ function renderNameFilter(value) {
 }
 
 
-function renderEstadoFilter(selected, options) {
+function facetLabel(label, count) {
+    return `${label} (${count || 0})`;
+}
+
+function renderEstadoFilter(selected, options, counts = {}) {
     const estadoSelect = document.getElementById('filter-estado');
     if (!estadoSelect) return;
 
@@ -219,7 +526,7 @@ function renderEstadoFilter(selected, options) {
     (options || []).forEach((estado) => {
         const safeValue = escapeHtml(estado);
         const isSelected = selected && selected.toUpperCase() === estado.toUpperCase();
-        opts.push(`<option value="${safeValue}" ${isSelected ? 'selected' : ''}>${safeValue}</option>`);
+        opts.push(`<option value="${safeValue}" ${isSelected ? 'selected' : ''}>${facetLabel(safeValue, counts[estado])}</option>`);
     });
     estadoSelect.innerHTML = opts.join('');
     estadoSelect.value = selected || '';
@@ -327,7 +634,16 @@ function brandSegmentColor(baseColor, segmentIndex, totalSegments) {
     return `hsl(${hue}, ${saturation}%, ${value}%)`;
 }
 
-function renderSchedule(scheduleCounts, scheduleBrands) {
+function timelineLabel(bucket, granularity) {
+    const parts = parseIsoDateParts(bucket);
+    if (!parts) return bucket;
+    const month = String(parts.month).padStart(2, '0');
+    if (granularity === 'month') return `${month}/${parts.year}`;
+    if (granularity === 'week') return `Sem. ${formatDateLabel(bucket)}`;
+    return formatDateLabel(bucket);
+}
+
+function renderSchedule(timeline) {
     const ctx = document.getElementById('timelineChart');
     if (!ctx) return;
 
@@ -335,30 +651,13 @@ function renderSchedule(scheduleCounts, scheduleBrands) {
         charts.timeline.destroy();
     }
 
-    const entries = Object.entries(scheduleCounts || {}).sort((a, b) => compareIsoDates(a[0], b[0]));
-    const labels = entries.map(([date]) => formatDateLabel(date));
-    const totals = entries.map(([, value]) => value);
-    const rawBrandCounts = entries.map(([date]) => scheduleBrands[date] || {});
-    const brandCountsPerDate = rawBrandCounts.map((counts) => {
-        const normalized = {};
-        Object.entries(counts).forEach(([brand, value]) => {
-            const label = (brand && brand.trim()) || 'Sin marca';
-            const numericValue = Number(value) || 0;
-            if (numericValue > 0) {
-                normalized[label] = (normalized[label] || 0) + numericValue;
-            }
-        });
-        return normalized;
-    });
-    const baseColors = entries.map((_, idx) => timelineColor(idx));
-
-    const brandSet = new Set();
-    brandCountsPerDate.forEach((counts) => {
-        Object.keys(counts).forEach((label) => {
-            brandSet.add(label);
-        });
-    });
-    const brandList = Array.from(brandSet);
+    // El servidor ya envia los periodos ordenados y una serie por marca alineada con ellos.
+    const data = timeline || { granularity: 'day', buckets: [], totals: [], brands: [], series: [] };
+    const labels = data.buckets.map((bucket) => timelineLabel(bucket, data.granularity));
+    const totals = data.totals;
+    const brandList = data.brands;
+    const baseColors = labels.map((_, idx) => timelineColor(idx));
+    const showLabels = labels.length <= TIMELINE_LABELS_LIMIT;
 
     let datasets = [];
 
@@ -372,7 +671,7 @@ function renderSchedule(scheduleCounts, scheduleBrands) {
                 borderRadius: 8,
                 borderSkipped: false,
                 datalabels: {
-                    display: true,
+                    display: showLabels,
                     anchor: 'end',
                     align: 'top',
                     color: '#1f2937',
@@ -385,7 +684,7 @@ function renderSchedule(scheduleCounts, scheduleBrands) {
             const colors = baseColors.map((color) => brandSegmentColor(color, brandIdx, brandList.length));
             return {
                 label: brandLabel,
-                data: brandCountsPerDate.map((counts) => counts[brandLabel] || 0),
+                data: data.series[brandIdx],
                 backgroundColor: colors,
                 hoverBackgroundColor: colors,
                 borderColor: '#ffffff',
@@ -394,7 +693,7 @@ function renderSchedule(scheduleCounts, scheduleBrands) {
                 borderRadius: 0,
                 stack: 'timeline',
                 datalabels: {
-                    display: true,
+                    display: showLabels,
                     anchor: 'center',
                     align: 'center',
                     color: '#ffffff',
@@ -485,11 +784,31 @@ function renderAlerts(data) {
     });
 }
 
-function renderTable(rows) {
+function decodeRecords(payload) {
+    // Formato columnar: nombres de columna una sola vez y textos repetidos como indices de su diccionario.
+    if (!payload || Array.isArray(payload) || payload.format !== 'columnar') return payload || [];
+    const { columns, data, dictionaries = {}, length } = payload;
+    const rows = Array.from({ length }, () => ({}));
+    columns.forEach((column, index) => {
+        const values = data[index];
+        const dictionary = dictionaries[column];
+        for (let row = 0; row < length; row += 1) {
+            rows[row][column] = dictionary ? dictionary[values[row]] : values[row];
+        }
+    });
+    return rows;
+}
+
+function renderTable(rows, append = false) {
     const tbody = document.querySelector('#recent-table tbody');
     if (!tbody) return;
+    rows = decodeRecords(rows);
 
-    tbody.innerHTML = '';
+    if (append) {
+        if (!rows || rows.length === 0) return;
+    } else {
+        tbody.innerHTML = '';
+    }
     if (!rows || rows.length === 0) {
         const tr = document.createElement('tr');
         const td = document.createElement('td');
@@ -501,8 +820,14 @@ function renderTable(rows) {
         return;
     }
 
+    tbody.appendChild(buildTableRows(rows));
+}
+
+function buildTableRows(rows) {
+    const fragment = document.createDocumentFragment();
     rows.forEach((row) => {
         const tr = document.createElement('tr');
+        tr.dataset.recordId = row.record_id ?? '';
         tr.innerHTML = `
             <td>${escapeHtml(row.record_id) || '-'}</td>
             <td>${escapeHtml(row.nombre_completo) || '-'}</td>
@@ -514,8 +839,9 @@ function renderTable(rows) {
             <td>${formatDateLabel(row.fecha_estado) || '-'}</td>
             <td>${escapeHtml(row.notas) || '-'}</td>
         `;
-        tbody.appendChild(tr);
+        fragment.appendChild(tr);
     });
+    return fragment;
 }
 
 
@@ -536,17 +862,6 @@ function parseIsoDateParts(value) {
     return { year: Number(match[1]), month: Number(match[2]), day: Number(match[3]) };
 }
 
-function compareIsoDates(a, b) {
-    const da = parseIsoDateParts(a);
-    const db = parseIsoDateParts(b);
-    if (da && db) {
-        if (da.year !== db.year) return da.year - db.year;
-        if (da.month !== db.month) return da.month - db.month;
-        return da.day - db.day;
-    }
-    return a.localeCompare(b);
-}
-
 function formatDateLabel(value) {
     if (!value) return '';
     const match = /^(\d{4})-(\d{2})-(\d{2})$/.exec(value.trim());
@@ -0,0 +1,87 @@
+const POLL_INTERVAL_MS = 1000;
+
+document.addEventListener('DOMContentLoaded', () => {
+    const container = document.getElementById('import-job');
+    if (!container) return;
+    if (isFinished(container.dataset.status)) return;
+    pollImportJob(container);
+});
+
+function isFinished(status) {
+    return status === 'done' || status === 'failed';
+}
+
+async function pollImportJob(container) {
+    try {
+        const response = await fetch(container.dataset.jobUrl, { cache: 'no-store' });
+        if (!response.ok) {
+            throw new Error('No se pudo obtener el avance de la carga');
+        }
+        const job = await response.json();
+        renderImportJob(container, job);
+        if (isFinished(job.status)) return;
+    } catch (err) {
+        console.error(err);
+    }
+    setTimeout(() => pollImportJob(container), POLL_INTERVAL_MS);
+}
+
+function renderImportJob(container, job) {
+    const setText = (name, value) => {
+        const element = container.querySelector(`[data-job="${name}"]`);
+        if (element) element.textContent = value;
+    };
+    ['status', 'inserted', 'updated', 'unchanged', 'rows_rejected', 'rows_processed', 'rows_per_second'].forEach((name) => {
+        setText(name, job[name] ?? 0);
+    });
+    setText('eta', formatEta(job.eta_seconds));
+    const bar = container.querySelector('[data-job="progress"]');
+    if (bar) bar.style.width = `${((job.progress || 0) * 100).toFixed(1)}%`;
+    const error = container.querySelector('[data-job="error"]');
+    if (error) {
+        error.textContent = job.error || '';
+        error.classList.toggle('d-none', !job.error);
+    }
+    renderHeaderWarnings(container.querySelector('[data-job="headers"]'), job.headers);
+    renderDateFormats(container.querySelector('[data-job="date_formats"]'), job.date_formats || {});
+    container.dataset.status = job.status;
+}
+
+function renderHeaderWarnings(box, headers) {
+    if (!box || !headers) return;
+    const messages = [];
+    if (headers.missing_id) messages.push('El archivo no tiene columna id; todas las filas se rechazan.');
+    if (headers.unknown.length) messages.push(`Columnas ignoradas: ${headers.unknown.join(', ')}`);
+    Object.entries(headers.duplicates).forEach(([field, names]) => {
+        messages.push(`Columnas repetidas para ${field}: ${names.join(', ')} (se usa la ultima)`);
+    });
+    box.replaceChildren(...messages.map((message) => {
+        const line = document.createElement('div');
+        line.textContent = message;
+        return line;
+    }));
+    box.classList.toggle('d-none', messages.length === 0);
+}
+
+function renderDateFormats(list, formats) {
+    if (!list) return;
+    list.replaceChildren();
+    Object.entries(formats).forEach(([field, info]) => {
+        if (!info.label) return;
+        const item = document.createElement('li');
+        item.textContent = `${field}: ${info.label}`;
+        if (info.ambiguous) {
+            const warning = document.createElement('span');
+            warning.className = 'text-warning';
+            warning.textContent = ' (dd/mm o mm/dd ambiguo)';
+            item.appendChild(warning);
+        }
+        list.appendChild(item);
+    });
+}
+
+function formatEta(seconds) {
+    if (seconds === null || seconds === undefined) return '-';
+    if (seconds < 60) return `${Math.ceil(seconds)} s`;
+    return `${Math.floor(seconds / 60)} min ${Math.ceil(seconds % 60)} s`;
+}
@@ -0,0 +1,89 @@
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import app as app_module  # noqa: E402
+
+ADMIN_PASSWORD = "AdminPass123"
+VIEWER_PASSWORD = "ViewerPass123"
+
+
+@pytest.fixture
+def app(tmp_path):
+    """La app sobre una base nueva en tmp_path, sin el hilo de cargas y con hashes baratos."""
+    flask_app = app_module.app
+    previous = dict(flask_app.config)
+    flask_app.config.update(
+        TESTING=True,
+        DATABASE=str(tmp_path / "test.db"),
+        SUMMARY_CACHE_DATABASE=str(tmp_path / "summary_cache.db"),
+        METRICS_DATABASE=str(tmp_path / "metrics.db"),
+        IMPORTS_DIR=str(tmp_path / "imports"),
+        PROFILES_DIR=str(tmp_path / "profiles"),
+        IMPORT_WORKER_ENABLED=False,
+        INITIAL_ADMIN_PASSWORD=ADMIN_PASSWORD,
+        PASSWORD_HASH_ITERATIONS=1000,
+    )
+    app_module._facet_rows_cache.clear()
+    with flask_app.app_context():
+        app_module.init_db()
+    try:
+        yield flask_app
+    finally:
+        # Lo pendiente de esta prueba va a su propia base de metricas, no a la de la siguiente.
+        app_module.metrics.flush()
+        flask_app.config.clear()
+        flask_app.config.update(previous)
+
+
+def login(client, username: str, password: str):
+    response = client.post("/login", data={"username": username, "password": password})
+    assert response.status_code == 302, response.status_code
+    return client
+
+
+@pytest.fixture
+def admin_client(app):
+    return login(app.test_client(), "admin", ADMIN_PASSWORD)
+
+
+@pytest.fixture
+def viewer_client(app):
+    with app.app_context():
+        db = app_module.get_db()
+        db.execute(
+            "INSERT INTO users (username, password_hash, role) VALUES (?, ?, 'standard')",
+            ("visor", app_module.hash_password(VIEWER_PASSWORD)),
+        )
+        db.commit()
+    return login(app.test_client(), "visor", VIEWER_PASSWORD)
+
+
+@pytest.fixture
+def upload_csv(app, admin_client):
+    """Sube un CSV por /upload y lo procesa en este hilo, como lo haria el worker de cargas."""
+
+    def upload(body: bytes, mode: str = "merge"):
+        response = admin_client.post(
+            "/upload",
+            data={"file": (io.BytesIO(body), "carga.csv"), "mode": mode},
+            content_type="multipart/form-data",
+        )
+        assert response.status_code == 302, response.status_code
+        job_id = int(response.headers["Location"].split("job=")[1])
+        with app.app_context():
+            db = app_module.get_db()
+            job = app_module.claim_import_job(db, "pruebas")
+            assert job is not None and job["id"] == job_id
+            app_module.run_import_job(db, job, "pruebas")
+        return admin_client.get(f"/api/imports/{job_id}").get_json()
+
+    return upload
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: pruebas de varios segundos (omitir con -m 'not slow')")
@@ -0,0 +1,70 @@
+"""Login con cupos de hashing: rechazo rapido cuando no hay cupo y rehash al cambiar las iteraciones.
+
+Uso: python -m pytest tests/test_auth.py
+"""
+import threading
+import time
+
+from conftest import ADMIN_PASSWORD, login
+
+import app as app_module
+
+
+def stored_hash(app, username: str) -> str:
+    with app.app_context():
+        row = app_module.get_db().execute(
+            "SELECT password_hash FROM users WHERE username = ?", (username,)
+        ).fetchone()
+    return row["password_hash"]
+
+
+def test_login_is_rejected_fast_when_every_slot_is_taken(app):
+    app.config.update(AUTH_HASH_SLOTS=1, AUTH_HASH_WAIT_SECONDS=0.05)
+    client = app.test_client()
+    rejected_before = app_module.hashing_slots.stats()["rejected"]
+    # flock es por archivo abierto: el cupo tomado aqui tambien bloquea al request del mismo proceso.
+    with app.app_context(), app_module.hashing_slots.hold(wait_seconds=0):
+        start = time.perf_counter()
+        response = client.post("/login", data={"username": "admin", "password": ADMIN_PASSWORD})
+        elapsed = time.perf_counter() - start
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
+    assert elapsed < 1.0
+    assert app_module.hashing_slots.stats()["rejected"] == rejected_before + 1
+    login(client, "admin", ADMIN_PASSWORD)
+
+
+def test_login_rehashes_when_iterations_change(app):
+    assert stored_hash(app, "admin").startswith("pbkdf2_sha256$1000$")
+    app.config["PASSWORD_HASH_ITERATIONS"] = 1500
+    login(app.test_client(), "admin", ADMIN_PASSWORD)
+    rehashed = stored_hash(app, "admin")
+    assert rehashed.startswith("pbkdf2_sha256$1500$")
+    # El hash nuevo sigue validando la misma contrasena y no se vuelve a tocar en el siguiente login.
+    login(app.test_client(), "admin", ADMIN_PASSWORD)
+    assert stored_hash(app, "admin") == rehashed
+
+
+def test_pbkdf2_lets_other_threads_run():
+    done = threading.Event()
+    ticks = [0]
+
+    def spin():
+        while not done.is_set():
+            ticks[0] += 1
+
+    spinner = threading.Thread(target=spin, daemon=True)
+    spinner.start()
+    try:
+        time.sleep(0.05)
+        before, start = ticks[0], time.perf_counter()
+        time.sleep(0.2)
+        idle_rate = (ticks[0] - before) / (time.perf_counter() - start)
+        before, start = ticks[0], time.perf_counter()
+        app_module.pbkdf2_hex("contrasena", "sal", 600_000)
+        hash_rate = (ticks[0] - before) / (time.perf_counter() - start)
+    finally:
+        done.set()
+        spinner.join()
+    # Con el GIL tomado todo el hash el otro hilo solo correria un intervalo de cambio (5 ms).
+    assert hash_rate > 0.2 * idle_rate
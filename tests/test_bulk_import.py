@@ -0,0 +1,75 @@
+"""Carga masiva en pedazos: los cortes respetan los saltos de linea entre comillas y --workers 2 da lo mismo que 1.
+
+Uso: python -m pytest tests/test_bulk_import.py
+"""
+import csv
+import io
+
+import pytest
+
+import app as app_module
+
+ROWS = 60
+COMPARED_COLUMNS = ", ".join(app_module.PROJECT_COLUMNS)
+
+
+def write_quoted_csv(path) -> None:
+    # Notas con saltos de linea y comillas escapadas; un id repetido al final para ver quien gana.
+    with path.open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["id", "nombre_completo", "fecha_estado", "estado", "notas"])
+        for index in range(ROWS):
+            notes = f'linea {index}\n"equipo" con\r\nvarias lineas,\ny comas' if index % 3 else ""
+            writer.writerow([f"{index:07d}", f"USUARIO {index}", f"{index % 28 + 1:02d}/09/2025", "PENDIENTE", notes])
+        writer.writerow(["0000007", "USUARIO REPETIDO", "30/09/2025", "REALIZADO", "ultima\nversion"])
+        writer.writerow(["", "SIN ID", "30/09/2025", "PENDIENTE", ""])
+
+
+@pytest.fixture
+def quoted_csv(tmp_path, monkeypatch):
+    # Pedazos y bloques de lectura chicos: muchos cortes caen dentro de un campo entre comillas.
+    monkeypatch.setattr(app_module, "IMPORT_CHUNK_BYTES", 150)
+    monkeypatch.setattr(app_module, "IMPORT_SCAN_BLOCK_BYTES", 64)
+    path = tmp_path / "comillas.csv"
+    write_quoted_csv(path)
+    return path
+
+
+def test_chunks_split_only_between_rows(quoted_csv):
+    header, data_start = app_module.read_csv_header(quoted_csv)
+    chunks = app_module.split_csv_chunks(quoted_csv, data_start, app_module.IMPORT_CHUNK_BYTES)
+    assert len(chunks) > 10
+    assert chunks[0][0] == data_start and chunks[-1][1] == quoted_csv.stat().st_size
+    assert all(end == next_start for (_start, end), (next_start, _end) in zip(chunks, chunks[1:]))
+
+    data = quoted_csv.read_bytes()
+    expected = list(csv.reader(io.StringIO(data[data_start:].decode("utf-8"), newline="")))
+    rows = []
+    for start, end in chunks:
+        rows += csv.reader(io.StringIO(data[start:end].decode("utf-8"), newline=""))
+    assert rows == expected
+
+
+def import_with_workers(app, database: str, path, workers: int):
+    app.config["DATABASE"] = database
+    with app.app_context():
+        app_module.init_db()
+        db = app_module.get_db()
+        summary = app_module.bulk_import_csv(db, path, workers, batch_size=7)
+        rows = db.execute(f"SELECT {COMPARED_COLUMNS} FROM project_records ORDER BY record_id").fetchall()
+    return summary, [tuple(row) for row in rows]
+
+
+def test_two_workers_match_a_single_process(app, tmp_path, quoted_csv):
+    single, single_rows = import_with_workers(app, str(tmp_path / "uno.db"), quoted_csv, 1)
+    parallel, parallel_rows = import_with_workers(app, str(tmp_path / "dos.db"), quoted_csv, 2)
+
+    counters = app_module.IMPORT_JOB_COUNTERS
+    assert {key: single[key] for key in counters} == {key: parallel[key] for key in counters}
+    assert (single["rows_read"], single["rows_rejected"]) == (ROWS + 2, 1)
+    assert (single["inserted"], single["updated"]) == (ROWS, 1)
+    assert parallel_rows == single_rows
+    assert len(single_rows) == ROWS
+    repeated = dict(zip(app_module.PROJECT_COLUMNS, single_rows[7]))
+    assert (repeated["nombre_completo"], repeated["notas"]) == ("USUARIO REPETIDO", "ultima\nversion")
+    assert single_rows[1][-1] == 'linea 1\n"equipo" con\r\nvarias lineas,\ny comas'
@@ -0,0 +1,37 @@
+"""/api/changes: delta dentro de la ventana del registro y resync cuando since quedo fuera.
+
+Uso: python -m pytest tests/test_changes.py
+"""
+
+
+def rows_csv(first: int, count: int) -> bytes:
+    lines = ["id,nom_sede,estado"]
+    lines += [f"{index:07d},Surco,PENDIENTE" for index in range(first, first + count)]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def changes(client, since):
+    response = client.get("/api/changes", query_string={"since": since})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_since_older_than_the_change_log_forces_resync(app, admin_client, upload_csv):
+    app.config["CHANGE_LOG_RETENTION"] = 3
+    upload_csv(rows_csv(1, 2))
+    first_seq = admin_client.get("/api/summary").get_json()["change_seq"]
+    assert changes(admin_client, first_seq) == {"seq": first_seq, "resync": False, "changes": 0}
+
+    upload_csv(rows_csv(3, 2))
+    head = first_seq + 2
+    delta = changes(admin_client, first_seq)
+    assert (delta["seq"], delta["resync"], delta["changes"]) == (head, False, 2)
+    assert delta["delta"]["total"] == 2
+
+    # La retencion deja solo los ultimos 3 cambios: el cliente que se quedo en first_seq ya no tiene delta.
+    upload_csv(rows_csv(5, 2))
+    head += 2
+    assert changes(admin_client, first_seq) == {"seq": head, "resync": True, "reason": "fuera_de_rango"}
+    assert changes(admin_client, head + 1) == {"seq": head, "resync": True, "reason": "fuera_de_rango"}
+    assert changes(admin_client, head - 3)["changes"] == 3
+    assert changes(admin_client, head)["changes"] == 0
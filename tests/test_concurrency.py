@@ -0,0 +1,76 @@
+"""Una carga de CSV corre mientras varios lectores consultan /api/summary con conexiones del pool.
+
+Los lectores son hilos con su propio cliente de prueba, asi que cada uno toma sus conexiones
+de ConnectionPool. Falla si algun lector recibe "database is locked" o una respuesta distinta de 200.
+
+Uso: python -m pytest tests/test_concurrency.py
+"""
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+from common import populate, write_synthetic_csv  # noqa: E402
+from conftest import ADMIN_PASSWORD, login  # noqa: E402
+
+from app import connection_pool  # noqa: E402
+
+READERS = 4
+READER_FILTERS = [
+    {},
+    {"ubicacion": "OFICINAS LIMA"},
+    {"estado": "realizado"},
+    {"fecha_inicio": "2025-09-01", "fecha_fin": "2025-10-15"},
+    {"nombre": "quispe"},
+]
+
+
+def poll_summary(client, stop: threading.Event, results: dict) -> None:
+    request_number = 0
+    while not stop.is_set():
+        filters = READER_FILTERS[request_number % len(READER_FILTERS)]
+        request_number += 1
+        try:
+            response = client.get("/api/summary", query_string=filters)
+        except sqlite3.OperationalError as exc:
+            results["errors"].append(str(exc))
+            continue
+        if response.status_code != 200:
+            results["errors"].append(f"HTTP {response.status_code}")
+    results["requests"] = request_number
+
+
+@pytest.mark.parametrize("mode", ["merge", "snapshot"])
+def test_upload_while_readers_poll_summary(app, upload_csv, tmp_path, mode):
+    with app.app_context():
+        populate(5000)
+    csv_path = tmp_path / "carga.csv"
+    write_synthetic_csv(csv_path, 2)
+    clients = [login(app.test_client(), "admin", ADMIN_PASSWORD) for _ in range(READERS)]
+    lock_errors_before = connection_pool.stats()["lock_errors"]
+
+    stop = threading.Event()
+    results = [{"errors": [], "requests": 0} for _ in clients]
+    readers = [
+        threading.Thread(target=poll_summary, args=(client, stop, result), daemon=True)
+        for client, result in zip(clients, results)
+    ]
+    for reader in readers:
+        reader.start()
+    try:
+        job = upload_csv(csv_path.read_bytes(), mode=mode)
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join(timeout=30)
+
+    assert job["status"] == "done", job["error"]
+    assert not any(reader.is_alive() for reader in readers)
+    errors = [error for result in results for error in result["errors"]]
+    assert not errors, errors[:5]
+    assert all(result["requests"] > 0 for result in results)
+    assert connection_pool.stats()["lock_errors"] == lock_errors_before
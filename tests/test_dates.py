@@ -0,0 +1,44 @@
+"""Columnas de fechas con formatos mezclados: formato inferido por columna y celdas raras por el camino lento.
+
+Uso: python -m pytest tests/test_dates.py
+"""
+import app as app_module
+
+MIXED_DATES_CSV = (
+    "id,fecha_estado,fecha_programada,fecha_ejecucion,estado\n"
+    "0000001,05/09/2025,09/25/2025,25/09/2025,PENDIENTE\n"
+    "0000002,2025-09-10T08:00:00,10/13/2025,09/26/2025,PENDIENTE\n"
+    "0000003,13/09/2025,09/05/2025,03/04/2025,REALIZADO\n"
+    "0000004,2025-09-11 14:30,,sin fecha,REALIZADO\n"
+    "0000005,20/09/2025,09/30/2025,,EN PROCESO\n"
+).encode("utf-8")
+EXPECTED_DATES = {
+    "0000001": ("2025-09-05", "2025-09-25", "2025-09-25"),
+    "0000002": ("2025-09-10", "2025-10-13", "2025-09-26"),
+    # Sin dia mayor a 12, la celda ambigua sigue el formato dominante de su columna (mm/dd en fecha_programada).
+    "0000003": ("2025-09-13", "2025-09-05", "2025-04-03"),
+    "0000004": ("2025-09-11", None, "sin fecha"),
+    "0000005": ("2025-09-20", "2025-09-30", None),
+}
+
+
+def test_mixed_date_columns_are_normalized_per_column(app, upload_csv):
+    job = upload_csv(MIXED_DATES_CSV)
+    assert job["status"] == "done", job["error"]
+    assert job["inserted"] == 5
+    formats = job["date_formats"]
+    assert formats["fecha_estado"]["label"] == "dd/mm/aaaa"
+    assert formats["fecha_estado"]["fallback"] == 2
+    assert formats["fecha_programada"]["label"] == "mm/dd/aaaa"
+    assert formats["fecha_ejecucion"]["label"] == "mixto"
+    assert formats["fecha_ejecucion"]["ambiguous"] is True
+
+    with app.app_context():
+        rows = app_module.get_db().execute(
+            "SELECT record_id, fecha_estado, fecha_programada, fecha_ejecucion FROM project_records"
+        ).fetchall()
+    assert {row["record_id"]: tuple(value or None for value in row[1:]) for row in rows} == EXPECTED_DATES
+
+    # Volver a subir el mismo archivo no cambia nada: las fechas ya guardadas coinciden con las normalizadas.
+    again = upload_csv(MIXED_DATES_CSV)
+    assert (again["inserted"], again["updated"], again["unchanged"]) == (0, 0, 5)
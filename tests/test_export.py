@@ -0,0 +1,41 @@
+"""Exportacion y plantilla CSV: solo para admins, la plantilla responde 304 y lo exportado se vuelve a cargar igual.
+
+Uso: python -m pytest tests/test_export.py
+"""
+FIXTURE_CSV = (
+    "id,ubicacion,nom_sede,nombre_completo,marca,hostname,fecha_estado,estado,fecha_programada,notas\n"
+    "0000001,OFICINAS LIMA,Surco,PEREZ QUISPE,Lenovo,MINORISTAOP1,05/09/2025,PENDIENTE,12/09/2025,\n"
+    '0000002,OFICINAS LIMA,Agencia San Isidro,"NUNEZ, MARIA",HP,MINORISTAOP2,06/09/2025,REALIZADO,,"linea 1\nlinea 2"\n'
+    "0000003,OFICINAS PROVINCIA,Agencia Arequipa,DÍAZ ROJAS,Dell,MINORISTAOP3,,PROGRAMADO,20/09/2025,\n"
+).encode("utf-8")
+
+
+def test_export_and_template_require_admin(viewer_client):
+    for url in ("/api/export", "/api/download-template"):
+        response = viewer_client.get(url)
+        assert response.status_code == 302
+        assert response.headers["Location"].endswith("/dashboard")
+
+
+def test_template_etag_returns_304(admin_client):
+    first = admin_client.get("/api/download-template")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    again = admin_client.get("/api/download-template", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == etag
+
+
+def test_export_reimports_without_changes(admin_client, upload_csv):
+    loaded = upload_csv(FIXTURE_CSV)
+    assert (loaded["status"], loaded["inserted"]) == ("done", 3)
+    exported = admin_client.get("/api/export")
+    assert exported.status_code == 200
+    body = exported.get_data()
+    assert body.startswith(b"id,")
+
+    reloaded = upload_csv(body)
+    assert reloaded["status"] == "done", reloaded["error"]
+    assert (reloaded["rows_processed"], reloaded["rows_rejected"]) == (3, 0)
+    assert (reloaded["inserted"], reloaded["updated"], reloaded["unchanged"]) == (0, 0, 3)
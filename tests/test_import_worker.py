@@ -0,0 +1,22 @@
+"""Worker de cargas sobre una base sin init-db: un solo aviso, esperas crecientes y vuelta al ritmo normal.
+
+Uso: python -m pytest tests/test_import_worker.py
+"""
+import logging
+
+import app as app_module
+
+
+def test_worker_backs_off_until_the_schema_exists(app, tmp_path, caplog):
+    app.config.update(DATABASE=str(tmp_path / "sin_esquema.db"), IMPORT_POLL_SECONDS=1.0)
+    with caplog.at_level(logging.WARNING):
+        waits = [app_module.import_worker_pass("pruebas") for _ in range(8)]
+    assert waits == [1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 60.0, 60.0]
+    assert [record.levelno for record in caplog.records] == [logging.WARNING]
+    assert "import_jobs" in caplog.records[0].getMessage()
+
+    caplog.clear()
+    with app.app_context():
+        app_module.init_db()
+    assert app_module.import_worker_pass("pruebas") == 1.0
+    assert not caplog.records
@@ -0,0 +1,54 @@
+"""Ingesta por streaming: contadores del job contra un CSV fijo y memoria acotada por tamano de archivo.
+
+Uso: python -m pytest tests/test_ingest.py  (sin la prueba lenta: -m "not slow")
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+FIRST_CSV = (
+    "id,nombre_completo,nom_sede,fecha_estado,estado\n"
+    "0000001,PEREZ QUISPE,Surco,05/09/2025,pendiente\n"
+    "0000002,QUISPE LAURA,Agencia San Isidro,06/09/2025,REALIZADO\n"
+    ",SIN ID,Surco,07/09/2025,PENDIENTE\n"
+    "0000003,NUNEZ MENDOZA,Agencia Arequipa,08/09/2025,PROGRAMADO\n"
+).encode("utf-8")
+SECOND_CSV = (
+    "id,nombre_completo,nom_sede,fecha_estado,estado\n"
+    "0000001,PEREZ QUISPE,Surco,05/09/2025,PENDIENTE\n"
+    "0000002,QUISPE LAURA,Agencia San Isidro,09/09/2025,REALIZADO\n"
+    "0000004,DIAZ ROJAS,Surco,10/09/2025,EN PROCESO\n"
+    ",,,,\n"
+).encode("utf-8")
+
+
+def test_streaming_job_counts(upload_csv):
+    first = upload_csv(FIRST_CSV)
+    assert first["status"] == "done", first["error"]
+    assert (first["rows_processed"], first["rows_rejected"]) == (4, 1)
+    assert (first["inserted"], first["updated"], first["unchanged"]) == (3, 0, 0)
+
+    # 0000001 solo cambia de mayusculas en estado, que se normaliza: queda igual.
+    second = upload_csv(SECOND_CSV)
+    assert second["status"] == "done", second["error"]
+    assert (second["rows_processed"], second["rows_rejected"]) == (4, 1)
+    assert (second["inserted"], second["updated"], second["unchanged"]) == (1, 1, 1)
+
+
+@pytest.mark.slow
+def test_ingest_peak_memory_does_not_grow_with_file():
+    # Sin mmap y con 1 MB de cache, lo que queda es la memoria de Python, que debe depender del lote.
+    env = dict(os.environ, BANBIF_METRICS="0", BANBIF_SQLITE_MMAP_MB="0", BANBIF_SQLITE_CACHE_MB="1")
+    result = subprocess.run(
+        [sys.executable, "benchmarks/bench_ingest_memory.py", "--sizes-mb", "2", "16", "--tolerance-mb", "16"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,49 @@
+"""/metrics despues de unas peticiones, y el finalizador del cursor medido sin tomar el lock del registro.
+
+Uso: python -m pytest tests/test_metrics.py
+"""
+import re
+import sqlite3
+import threading
+
+import app as app_module
+
+
+def series_value(text: str, name: str, **labels: str) -> float:
+    for line in text.splitlines():
+        match = re.match(rf"{name}\{{(.*)\}} (\S+)$", line)
+        if match and all(f'{key}="{value}"' in match.group(1) for key, value in labels.items()):
+            return float(match.group(2))
+    raise AssertionError(f"No esta la serie {name} {labels}")
+
+
+def test_metrics_after_requests(app, admin_client):
+    for _ in range(3):
+        assert admin_client.get("/api/summary").status_code == 200
+    response = admin_client.get("/metrics")
+    assert response.status_code == 200
+    text = response.get_data(as_text=True)
+    assert series_value(text, "banbif_http_request_duration_seconds_count", route="/api/summary") == 3
+    assert series_value(text, "banbif_http_requests_total", route="/api/summary", status="200") == 3
+    # El login del admin lee su fila de users.
+    assert series_value(text, "banbif_sql_rows_total", operation="SELECT", table="users") >= 1
+
+
+def test_cursor_finalizer_does_not_take_the_metrics_lock(app):
+    db = sqlite3.connect(":memory:", factory=app_module.InstrumentedConnection)
+    cursors = [db.execute("SELECT 1 FROM (SELECT 1 UNION ALL SELECT 2 UNION ALL SELECT 3) AS filas")]
+    cursors[0].fetchone()
+    cursors[0].fetchone()
+
+    def collect_while_holding_lock():
+        # Equivale a que el GC libere el cursor mientras este hilo esta dentro de metrics.inc.
+        with app_module.metrics._lock:
+            cursors.pop()
+
+    collector = threading.Thread(target=collect_while_holding_lock, daemon=True)
+    collector.start()
+    collector.join(timeout=5)
+    assert not collector.is_alive(), "el finalizador quedo esperando metrics._lock"
+    labels = app_module.sql_statement_labels("SELECT 1 FROM (SELECT 1")
+    assert app_module.metrics.totals("banbif_sql_rows_total")[labels] == 2
+    db.close()
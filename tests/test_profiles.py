@@ -0,0 +1,33 @@
+"""Perfiles por pedido: las sentencias sobre users no dejan sus parametros en el JSON guardado.
+
+Uso: python -m pytest tests/test_profiles.py
+"""
+import json
+from pathlib import Path
+
+import app as app_module
+
+
+def test_profile_redacts_users_params(app, admin_client):
+    response = admin_client.post(
+        f"/admin/usuarios/nuevo?{app_module.PROFILE_QUERY_ARG}=1",
+        data={"username": "perfilado", "password": "Secreta12345", "confirm": "Secreta12345", "role": "standard"},
+    )
+    assert response.status_code == 302
+    name = response.headers[app_module.PROFILE_HEADER]
+    with app.app_context():
+        password_hash = app_module.get_db().execute(
+            "SELECT password_hash FROM users WHERE username = 'perfilado'"
+        ).fetchone()["password_hash"]
+
+    text = (Path(app.config["PROFILES_DIR"]) / f"{name}.json").read_text(encoding="utf-8")
+    assert password_hash not in text
+    assert password_hash.split("$")[-1] not in text
+    assert "perfilado" not in text
+    statements = json.loads(text)["statements"]
+    on_users = [statement for statement in statements if "INSERT INTO users" in statement["sql"]]
+    assert on_users and all(statement["redacted"] and statement["params"] is None for statement in on_users)
+
+    page = admin_client.get("/admin/perfiles")
+    assert page.status_code == 200
+    assert "par&aacute;metros ocultos" in page.get_data(as_text=True)
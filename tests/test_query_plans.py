@@ -0,0 +1,99 @@
+"""Las consultas del dashboard deben resolverse con indices y nunca recorrer project_records_store completo.
+
+Uso: python -m pytest tests/test_query_plans.py
+"""
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import (  # noqa: E402
+    RECORDS_STORE,
+    STATUS_CHOICES,
+    _facet_rows_cache,
+    app,
+    build_summary_payload,
+    fetch_records_page,
+    get_db,
+    init_db,
+    parse_summary_filters,
+)
+
+QUERY_PLAN_CASES = [
+    {},
+    {"ubicacion": "OFICINAS LIMA"},
+    {"nom_sede": "Surco"},
+    {"categoria_trab": "UPGRADE + WIN11"},
+    {"estado": "REALIZADO"},
+    {"fecha_inicio": "2025-09-01", "fecha_fin": "2025-10-31"},
+    {"ubicacion": "OFICINAS LIMA", "nom_sede": "Surco", "estado": "PENDIENTE"},
+    {"nom_sede": "Surco", "fecha_inicio": "2025-09-01"},
+    {"nombre": "perez"},
+    {"hostname": "MINORISTAOP1"},
+    {"ubicacion": "OFICINAS LIMA", "nombre": "quispe"},
+]
+TABLE_SCAN_PATTERN = re.compile(rf"^SCAN (TABLE )?{RECORDS_STORE}\b")
+INDEX_SCAN_PATTERN = re.compile(rf"^SCAN (TABLE )?{RECORDS_STORE}\b USING (COVERING )?INDEX")
+FIXTURE_ROWS = [
+    ("OFICINAS LIMA", "Surco", "UPGRADE + WIN11", "PEREZ QUISPE", "MINORISTAOP1"),
+    ("OFICINAS LIMA", "Agencia San Isidro", "REPOTENCIACION + WIN11", "QUISPE LAURA", "MINORISTAOP2"),
+    ("OFICINAS PROVINCIA", "Agencia Arequipa", "REASIGNACION + WIN11", "NUNEZ MENDOZA", "MINORISTAOP3"),
+]
+
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("planes")
+    previous = dict(app.config)
+    app.config.update(
+        DATABASE=str(directory / "planes.db"),
+        SUMMARY_CACHE_DATABASE=str(directory / "summary_cache.db"),
+        METRICS_DATABASE=str(directory / "metrics.db"),
+        IMPORT_WORKER_ENABLED=False,
+    )
+    try:
+        with app.app_context():
+            init_db()
+            db = get_db()
+            db.executemany(
+                "INSERT INTO project_records (record_id, ubicacion, nom_sede, categoria_trab, nombre_completo, "
+                "hostname, fecha_estado, estado) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (f"{index:07d}", *row, f"2025-09-{index + 1:02d}", STATUS_CHOICES[index % len(STATUS_CHOICES)])
+                    for index, row in enumerate(FIXTURE_ROWS)
+                ],
+            )
+            db.commit()
+            yield db
+    finally:
+        app.config.update(previous)
+
+
+@pytest.mark.parametrize("raw_filters", QUERY_PLAN_CASES, ids=lambda filters: "-".join(filters) or "sin_filtros")
+def test_dashboard_queries_use_indexes(db, raw_filters):
+    statements = []
+    filters = parse_summary_filters(raw_filters)
+    # Sin la cache de facetas cada caso ejecuta todas sus consultas.
+    _facet_rows_cache.clear()
+    db.set_trace_callback(statements.append)
+    try:
+        build_summary_payload(db, filters)
+        fetch_records_page(db, filters, app.config["RECORDS_PAGE_SIZE"])
+    finally:
+        db.set_trace_callback(None)
+    offenders = []
+    for statement in statements:
+        if not statement.lstrip().upper().startswith("SELECT"):
+            continue
+        for row in db.execute(f"EXPLAIN QUERY PLAN {statement}"):
+            detail = row[3]
+            if not TABLE_SCAN_PATTERN.match(detail):
+                continue
+            # Sin filtros es inevitable recorrer un indice completo, pero nunca la tabla.
+            if not raw_filters and INDEX_SCAN_PATTERN.match(detail):
+                continue
+            offenders.append(f"{detail}: {statement}")
+    assert not offenders, "\n".join(offenders)
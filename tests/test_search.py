@@ -0,0 +1,29 @@
+"""Busqueda por nombre sin tildes ni mayusculas, en /api/records y en los conteos de /api/summary.
+
+Uso: python -m pytest tests/test_search.py
+"""
+SEARCH_CSV = (
+    "id,nombre_completo,nom_sede,hostname,estado\n"
+    "0000001,DÍAZ ROJAS MARÍA,Surco,MINORISTAOP1,PENDIENTE\n"
+    "0000002,diaz quispe jose,Agencia San Isidro,MINORISTAOP2,REALIZADO\n"
+    "0000003,PEREZ NUÑEZ ANA,Surco,MINORISTAOP3,REALIZADO\n"
+).encode("utf-8")
+
+
+def record_ids(client, **filters):
+    response = client.get("/api/records", query_string=filters)
+    assert response.status_code == 200
+    return sorted(record["record_id"] for record in response.get_json()["records"])
+
+
+def test_name_search_ignores_accents_and_case(admin_client, upload_csv):
+    assert upload_csv(SEARCH_CSV)["inserted"] == 3
+    assert record_ids(admin_client, nombre="diaz") == ["0000001", "0000002"]
+    assert record_ids(admin_client, nombre="DÍAZ") == ["0000001", "0000002"]
+    assert record_ids(admin_client, nombre="maria") == ["0000001"]
+    assert record_ids(admin_client, nombre="nunez") == ["0000003"]
+
+    summary = admin_client.get("/api/summary", query_string={"nombre": "díaz"}).get_json()
+    assert summary["total"] == 2
+    assert summary["status_counts"] == {"PENDIENTE": 1, "REALIZADO": 1}
+    assert admin_client.get("/api/summary").get_json()["total"] == 3
@@ -0,0 +1,84 @@
+"""Streams SSE: cada suscriptor recibe la nueva data_version y el tope de suscriptores se respeta.
+
+Uso: python -m pytest tests/test_stream.py
+"""
+import json
+import threading
+import time
+
+import app as app_module
+
+SUBSCRIBERS = 3
+NEW_ROWS = [
+    {"record_id": f"{index:07d}", "nombre_completo": f"USUARIO {index}", "estado": "PENDIENTE"}
+    for index in range(1, 4)
+]
+
+
+def consume(broadcaster, events: list) -> None:
+    # Lee el stream hasta el primer evento con cambios contados; el primero solo fija la version inicial.
+    stream = app_module.stream_data_versions(broadcaster)
+    try:
+        for chunk in stream:
+            if not chunk.startswith("id: "):
+                continue
+            event = json.loads(chunk.split("data: ", 1)[1])
+            events.append(event)
+            if event["changes"] is not None:
+                return
+    finally:
+        stream.close()
+        broadcaster.unsubscribe()
+
+
+def wait_until(condition, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "tiempo de espera agotado"
+        time.sleep(0.02)
+
+
+def test_every_subscriber_receives_the_new_version(app):
+    app.config.update(STREAM_POLL_SECONDS=0.05, STREAM_HEARTBEAT_SECONDS=0.2, STREAM_MAX_SECONDS=10.0)
+    broadcaster = app_module.ChangeBroadcaster()
+    received = [[] for _ in range(SUBSCRIBERS)]
+    consumers = []
+    for events in received:
+        assert broadcaster.subscribe()
+        consumers.append(threading.Thread(target=consume, args=(broadcaster, events), daemon=True))
+    for consumer in consumers:
+        consumer.start()
+    wait_until(lambda: all(received))
+
+    with app.app_context():
+        db = app_module.get_db()
+        head_before = app_module.change_log_bounds(db)[1]
+        app_module.ingest_rows(db, NEW_ROWS, 100)
+        version = app_module.current_data_version(db)
+        head_after = app_module.change_log_bounds(db)[1]
+
+    for consumer in consumers:
+        consumer.join(timeout=10)
+    assert not any(consumer.is_alive() for consumer in consumers)
+    assert head_after - head_before == len(NEW_ROWS)
+    for events in received:
+        assert events[-1] == {"version": version, "seq": head_after, "changes": len(NEW_ROWS), "resync": False}
+    assert broadcaster.stats()["subscribers"] == 0
+
+
+def test_stream_turns_away_subscribers_over_the_cap(app, admin_client):
+    app.config["STREAM_MAX_SUBSCRIBERS"] = 2
+    stats = app_module.change_broadcaster.stats()
+    open_streams = [admin_client.get("/api/stream") for _ in range(2)]
+    try:
+        assert [response.status_code for response in open_streams] == [200, 200]
+        rejected = admin_client.get("/api/stream")
+        assert rejected.status_code == 503
+        assert rejected.headers["Retry-After"] == "60"
+        after = app_module.change_broadcaster.stats()
+        assert after["subscribers"] == stats["subscribers"] + 2
+        assert after["rejected"] == stats["rejected"] + 1
+    finally:
+        for response in open_streams:
+            response.close()
+    assert app_module.change_broadcaster.stats()["subscribers"] == stats["subscribers"]
@@ -0,0 +1,75 @@
+"""Escrituras por la vista project_records: los triggers INSTEAD OF guardan ids de diccionario y numeros de dia.
+
+Uso: python -m pytest tests/test_typed_storage.py
+"""
+from datetime import date
+
+import app as app_module
+
+RECORDS_STORE = app_module.RECORDS_STORE
+UPSERT_CSV = (
+    "id,nom_sede,marca,fecha_estado,estado\n"
+    "0000001,Surco,Lenovo,15/10/2025,realizado\n"
+    "0000002,Agencia Arequipa,Dell,16/10/2025,PENDIENTE\n"
+).encode("utf-8")
+
+
+def store_row(db, record_id: str):
+    return db.execute(f"SELECT * FROM {RECORDS_STORE} WHERE record_id = ?", (record_id,)).fetchone()
+
+
+def dictionary_value(db, value_id: int) -> str:
+    return db.execute(f"SELECT value FROM {app_module.DICTIONARY_TABLE} WHERE id = ?", (value_id,)).fetchone()[0]
+
+
+def day_number(iso: str) -> int:
+    # Numero de dia del calendario gregoriano proleptico, el mismo que julianday - DAY_NUMBER_OFFSET.
+    return date.fromisoformat(iso).toordinal()
+
+
+def test_view_writes_and_upload_upsert_use_typed_storage(app, upload_csv):
+    with app.app_context():
+        db = app_module.get_db()
+        db.execute(
+            "INSERT INTO project_records (record_id, nom_sede, marca, fecha_estado, fecha_programada, estado) "
+            "VALUES ('0000001', 'Surco', 'HP', '2025-09-05', 'por confirmar', 'PENDIENTE')"
+        )
+        db.commit()
+        row = store_row(db, "0000001")
+        assert dictionary_value(db, row["nom_sede_id"]) == "Surco"
+        assert dictionary_value(db, row["estado_id"]) == "PENDIENTE"
+        assert (row["fecha_estado_dia"], row["fecha_estado_texto"]) == (day_number("2025-09-05"), None)
+        # Un texto que no es fecha ISO se conserva tal cual, sin numero de dia.
+        assert (row["fecha_programada_dia"], row["fecha_programada_texto"]) == (None, "por confirmar")
+
+        db.execute(
+            "UPDATE project_records SET estado = 'EN PROCESO', fecha_estado = '2025-09-20' WHERE record_id = '0000001'"
+        )
+        db.commit()
+        row = store_row(db, "0000001")
+        assert dictionary_value(db, row["estado_id"]) == "EN PROCESO"
+        assert row["fecha_estado_dia"] == day_number("2025-09-20")
+
+    job = upload_csv(UPSERT_CSV)
+    assert (job["inserted"], job["updated"], job["unchanged"]) == (1, 1, 0)
+
+    with app.app_context():
+        db = app_module.get_db()
+        view = {
+            row["record_id"]: tuple(row)[1:]
+            for row in db.execute("SELECT record_id, nom_sede, marca, fecha_estado, estado FROM project_records")
+        }
+        assert view == {
+            "0000001": ("Surco", "Lenovo", "2025-10-15", "REALIZADO"),
+            "0000002": ("Agencia Arequipa", "Dell", "2025-10-16", "PENDIENTE"),
+        }
+        assert store_row(db, "0000001")["fecha_estado_dia"] == day_number("2025-10-15")
+        # El id de 'Surco' se reutiliza: cada valor esta una sola vez en el diccionario.
+        assert db.execute(
+            f"SELECT COUNT(*) FROM {app_module.DICTIONARY_TABLE} WHERE domain = 'nom_sede' AND value = 'Surco'"
+        ).fetchone()[0] == 1
+
+        db.execute("DELETE FROM project_records WHERE record_id = '0000002'")
+        db.commit()
+        assert store_row(db, "0000002") is None
+        assert app_module.diff_summary_cube(db) == []